@@ -1,37 +1,225 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, jsonify
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, flash, send_from_directory, send_file, jsonify, abort, make_response, stream_with_context, stream_template, session, g, has_app_context, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate, upgrade
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user, UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
 from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
+from itsdangerous import URLSafeSerializer, BadSignature
+from datetime import date, datetime, timedelta
 import calendar
+import functools
+import multiprocessing
+import hashlib
+import io
+import csv
+import json
+import mimetypes
+import gzip
+import random
+import re
+import zipfile
 import sys
-from ics import Calendar, Event
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import base64
+import secrets
+import click
 import os
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
-from email.mime.text import MIMEText
 import pytz
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+# reportlab, ics, PIL and the smtplib/email modules are imported where they
+# are used: most processes never build a PDF, invite, photo or email, and
+# they are the bulk of import time.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_super_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///warranty.db'
-app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
-app.config['ICS_FOLDER'] = os.path.join('static', 'ics')
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# SQLALCHEMY_ENGINE_OPTIONS for the 'concurrent' profile on SQLite (see create_app()).
+SQLITE_ENGINE_OPTIONS = {
+    'pool_size': 5,
+    'max_overflow': 5,
+    'pool_timeout': 10,
+    'pool_recycle': 3600,
+}
+WRITE_RETRIES = 3
+WRITE_RETRY_BASE_SECONDS = 0.05
 
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(app.config['ICS_FOLDER'], exist_ok=True)
+def load_config(app):
+    """Default settings; most can be overridden from the environment."""
+    app.config['SECRET_KEY'] = 'your_super_secret_key'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///warranty.db')
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', os.path.join('static', 'uploads'))
+    app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
+    # Resumable photo uploads (/api/uploads) send one chunk of at most
+    # UPLOAD_CHUNK_MAX_BYTES per request and stream it to a partial file, so a
+    # photo may be far larger than MAX_CONTENT_LENGTH without being buffered.
+    # UPLOAD_PARTIAL_FOLDER defaults to UPLOAD_FOLDER/partial (see create_app()).
+    app.config['UPLOAD_CHUNK_MAX_BYTES'] = 4 * 1024 * 1024
+    app.config['UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_BYTES', 100 * 1024 * 1024))
+    app.config['UPLOAD_EXPIRY_HOURS'] = 24  # `flask prune-uploads` default
+    app.config['ICS_FOLDER'] = os.path.join('static', 'ics')
+    app.config['DASHBOARD_PAGE_SIZE'] = 50
+    app.config['CLAIM_LOG_PAGE_SIZE'] = 100
+    # /events streams are short-lived (browsers reconnect with Last-Event-ID) so
+    # a sync or gthread worker is never tied up for long; EVENTS_MAX_STREAMS caps
+    # how many threads per process may be streaming at once.
+    app.config['EVENTS_STREAM_SECONDS'] = 25
+    app.config['EVENTS_POLL_SECONDS'] = 1.0
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = 15
+    app.config['EVENTS_RETRY_MS'] = 2000
+    app.config['EVENTS_MAX_STREAMS'] = int(os.environ.get('EVENTS_MAX_STREAMS', 4))
+    app.config['FEED_CACHE_FOLDER'] = os.path.join(app.instance_path, 'feeds')
+    app.config['FEED_UID_DOMAIN'] = 'warranty.thomsenhomes'
+    app.config['PDF_CACHE_FOLDER'] = os.path.join(app.instance_path, 'pdf_cache')
+    app.config['PDF_CACHE_MAX_BYTES'] = 64 * 1024 * 1024
+    app.config['PDF_RENDER_PROCESSES'] = os.cpu_count() or 2
+    app.config['PDF_POOL_THRESHOLD'] = 8
+    # Work order emails; leave MAIL_SERVER unset to disable them. For local
+    # testing: python -m aiosmtpd -n -l localhost:8025, then MAIL_SERVER=localhost
+    # MAIL_PORT=8025 MAIL_USE_TLS=0.
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1') == '1'
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_FROM'] = os.environ.get('MAIL_FROM', 'warranty@thomsenhomesllc.com')
+    app.config['MAIL_TIMEOUT'] = 20
+    app.config['MAIL_IDLE_SECONDS'] = 30
+    app.config['MAIL_MAX_PER_CONNECTION'] = 50
+    app.config['NOTIFY_HOMEOWNER'] = True
+    app.config['USER_CACHE_TTL'] = 300  # seconds; 0 disables the load_user cache
+    app.config['USER_CACHE_SIZE'] = 1024
+    # Carry the logged-in user's name/email in the signed session cookie so
+    # most requests never load the user at all. Renames show up at next login.
+    app.config['SESSION_USER_IDENTITY'] = os.environ.get('SESSION_USER_IDENTITY') == '1'
+    app.config['IMMUTABLE_MAX_AGE'] = 365 * 24 * 3600
+    # 'concurrent' (WAL, busy timeout, BEGIN IMMEDIATE for writes) or 'legacy'
+    # (SQLite/pysqlite defaults), for comparing the two under load.
+    app.config['SQLITE_ENGINE_PROFILE'] = os.environ.get('SQLITE_ENGINE_PROFILE', 'concurrent')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',   # durable at checkpoints; safe with WAL
+        'cache_size': -32000,      # KiB, per connection
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'],
+    }
+    # 'x-sendfile' (Apache/lighttpd) or 'x-accel' (nginx) hands file bytes to the proxy
+    app.config['SENDFILE_MODE'] = os.environ.get('SENDFILE_MODE', '').lower()
+    app.config['X_ACCEL_PREFIX'] = os.environ.get('X_ACCEL_PREFIX', '/_protected')
+    app.config['USE_X_SENDFILE'] = app.config['SENDFILE_MODE'] == 'x-sendfile'
+    # Request metrics served at /metrics; each process snapshots its counters
+    # into METRICS_FOLDER so any gunicorn worker can answer a scrape.
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+    app.config['METRICS_FOLDER'] = os.path.join(app.instance_path, 'metrics')
+    app.config['METRICS_FLUSH_SECONDS'] = 5
+    # With a token, /metrics wants "Authorization: Bearer <token>"; without
+    # one it only answers requests from this host.
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 0))  # 0 disables the slow-request log
+    app.config['N_PLUS_ONE_THRESHOLD'] = 5  # the same SELECT this many times in one request
+    app.config['FRAGMENT_CACHE_FOLDER'] = os.path.join(app.instance_path, 'fragments')
+    app.config['FRAGMENT_CACHE_ENABLED'] = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    app.config['ARCHIVE_AFTER_DAYS'] = 365  # `flask archive-claims` default: closed for over a year
 
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+# Extensions are bound to the app in create_app() at the end of the module.
+db = SQLAlchemy()
+def include_in_migrations(obj, name, type_, reflected, compare_to):
+    """Keeps the FTS5 search table and its shadow tables out of autogenerate."""
+    return not (type_ == 'table' and name.startswith('claim_search'))
 
-from datetime import datetime
-import pytz
+migrate = Migrate(render_as_batch=True, include_object=include_in_migrations)
+
+# Routes, request hooks and CLI commands; create_app() registers them on each app.
+bp = Blueprint('main', __name__, cli_group=None)
+
+# --- SQLITE ENGINE PROFILE ---
+def sqlite_profile_active(config):
+    return config['SQLITE_ENGINE_PROFILE'] == 'concurrent' and \
+        config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+
+def configure_sqlite_engine(engine, pragmas):
+    """Applies the 'concurrent' profile to one app's engine (see create_app())."""
+    @event.listens_for(engine, 'connect')
+    def configure_sqlite_connection(dbapi_connection, connection_record):
+        """Applies SQLITE_PRAGMAS and hands transaction control to SQLAlchemy.
+
+        pysqlite normally opens transactions lazily and in its own way; turning
+        that off lets begin_sqlite_transaction() choose the BEGIN mode.
+        """
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin_sqlite_transaction(connection):
+        """BEGIN IMMEDIATE inside write routes, plain BEGIN elsewhere.
+
+        Taking the write lock up front means a write route waits in
+        busy_timeout for its turn. With a deferred BEGIN it would fail with
+        "database is locked" when upgrading a read snapshot that went stale.
+        """
+        immediate = has_app_context() and g.get('write_transaction', False)
+        connection.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+def is_busy_error(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+def run_write_transaction(work, retries=WRITE_RETRIES):
+    """Calls work() in immediate transactions, retrying while the database is busy.
+
+    Whatever transaction the session has open is committed first, so the
+    write lock is taken by a fresh BEGIN IMMEDIATE rather than by upgrading
+    a read snapshot.
+    """
+    db.session.commit()
+    previous = g.get('write_transaction', False)
+    g.write_transaction = True
+    try:
+        for attempt in range(retries + 1):
+            try:
+                return work()
+            except exc.OperationalError as e:
+                db.session.rollback()
+                if attempt == retries or not is_busy_error(e):
+                    raise
+                time.sleep(WRITE_RETRY_BASE_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+    finally:
+        g.write_transaction = previous
+
+def write_transaction(retries=WRITE_RETRIES):
+    """Decorator for routes that write: immediate transactions, retried if busy.
+
+    Only retry views that are safe to run again from the top. A view that
+    consumes the request stream should pass ``retries=0``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+            return run_write_transaction(lambda: view(*args, **kwargs), retries)
+        return wrapper
+    return decorator
+
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 
 def cst_now():
     """Returns the current datetime in Central Time."""
@@ -67,18 +255,72 @@ class Claim(db.Model):
     warranty_type = db.Column(db.String(100))
     issue_description = db.Column(db.Text)
     date_reported = db.Column(db.Date, default=cst_now)
-    status = db.Column(db.String(20), default='Open')
+    status = db.Column(db.String(20), default='Open', index=True)
     assignee_id = db.Column(db.Integer, db.ForeignKey('assignee.id'))
     assignee = db.relationship('Assignee')
     closures = db.relationship('ClaimClosure', backref='claim', cascade='all, delete-orphan')
     logs = db.relationship('ClaimLog', backref='claim', cascade='all, delete-orphan')
     workorders = db.relationship('WorkOrder', backref='claim', cascade='all, delete-orphan')
 
+    # AUTOINCREMENT here and on the child tables archived with a claim: an
+    # archived row keeps its id, so a live row must never be given it again.
+    __table_args__ = {'sqlite_autoincrement': True}
+
+class PhotoBlob(db.Model):
+    """One stored photo file, shared by every ClaimPhoto with the same content."""
+    sha256 = db.Column(db.String(64), primary_key=True)
+    ext = db.Column(db.String(10), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    thumb_ready = db.Column(db.Boolean, nullable=False, default=False)
+    web_ready = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=cst_now)
+
+    @property
+    def filename(self):
+        return f"{self.sha256[:2]}/{self.sha256}.{self.ext}"
+
+    def derivative_filename(self, variant):
+        return f"{self.sha256[:2]}/{self.sha256}_{variant}.jpg"
+
 class ClaimPhoto(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), nullable=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), nullable=False, index=True)
     filename = db.Column(db.String(200), nullable=False)
+    content_hash = db.Column(db.String(64), db.ForeignKey('photo_blob.sha256'), index=True)
     claim = db.relationship('Claim', backref='photos')
+    blob = db.relationship('PhotoBlob', lazy='joined')
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    @property
+    def thumb_filename(self):
+        """Small preview if it has been generated, otherwise the original."""
+        if self.blob and self.blob.thumb_ready:
+            return self.blob.derivative_filename('thumb')
+        return self.filename
+
+    @property
+    def web_filename(self):
+        """Screen-sized copy if it has been generated, otherwise the original."""
+        if self.blob and self.blob.web_ready:
+            return self.blob.derivative_filename('web')
+        return self.filename
+
+class PhotoUpload(db.Model):
+    """A resumable photo upload; the bytes so far are in UPLOAD_PARTIAL_FOLDER.
+
+    Once complete, content_hash holds a reference to the stored PhotoBlob
+    until the upload is attached to a claim.
+    """
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    claim_id = db.Column(db.Integer)
+    filename = db.Column(db.String(200), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64))  # of the whole file, if the client sent one
+    content_hash = db.Column(db.String(64), db.ForeignKey('photo_blob.sha256'))
+    created_at = db.Column(db.DateTime, default=cst_now, index=True)
 
 class WorkOrder(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -89,9 +331,24 @@ class WorkOrder(db.Model):
     scheduled_time = db.Column(db.String(8))
     status = db.Column(db.String(20), default='Scheduled')
     notes = db.Column(db.String(200))
+    updated_at = db.Column(db.DateTime, default=cst_now, onupdate=cst_now, index=True)
+    # Optimistic-concurrency counter; every ORM flush bumps it.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     vendor = db.relationship('Vendor')
     assignee = db.relationship('Assignee')
 
+    __mapper_args__ = {'version_id_col': version}
+
+    __table_args__ = (
+        # view_claim: latest work order for a claim (ORDER BY id DESC)
+        db.Index('ix_work_order_claim_id_id', 'claim_id', 'id'),
+        # dashboard: latest scheduled work order per claim
+        db.Index('ix_work_order_claim_id_scheduled_date', 'claim_id', 'scheduled_date'),
+        # calendar range API: work orders in a date range
+        db.Index('ix_work_order_scheduled_date_claim_id', 'scheduled_date', 'claim_id'),
+        {'sqlite_autoincrement': True},
+    )
+
 class ClaimLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), nullable=False)
@@ -100,26 +357,507 @@ class ClaimLog(db.Model):
     action = db.Column(db.String(200), nullable=False)
     user = db.relationship('User')
 
+    __table_args__ = (
+        # view_claim_log: a claim's log, newest first
+        db.Index('ix_claim_log_claim_id_timestamp', 'claim_id', 'timestamp'),
+        {'sqlite_autoincrement': True},
+    )
+
 class ClaimClosure(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), nullable=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), nullable=False, index=True)
     reasons = db.Column(db.String(400))
     notes = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=cst_now)
 
+    __table_args__ = {'sqlite_autoincrement': True}
+
+class ClaimSummary(db.Model):
+    """Denormalized dashboard row per claim, maintained by refresh_claim_summaries()."""
+    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), primary_key=True)
+    address = db.Column(db.String(200), nullable=False)
+    homeowner_name = db.Column(db.String(100))
+    warranty_type = db.Column(db.String(100))
+    date_reported = db.Column(db.Date)
+    status = db.Column(db.String(20))
+    effective_status = db.Column(db.String(20), nullable=False)
+    latest_workorder_id = db.Column(db.Integer)
+    scheduled_date = db.Column(db.Date)
+    assignment = db.Column(db.String(210), nullable=False, default='Unassigned')
+    refreshed_at = db.Column(db.DateTime, default=cst_now)
+
+    __table_args__ = (
+        db.Index('ix_claim_summary_section', 'effective_status', 'date_reported', 'claim_id'),
+    )
+
+    @property
+    def id(self):
+        return self.claim_id
+
+
+# --- CLAIM ARCHIVE ---
+# Closed claims are moved here by `flask archive-claims` so the live tables
+# and their indexes only hold the working set. Rows keep their ids.
+class ArchivedClaim(db.Model):
+    """A closed claim moved out of the live tables; read-only."""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    address = db.Column(db.String(200), nullable=False)
+    homeowner_name = db.Column(db.String(100))
+    homeowner_email = db.Column(db.String(100))
+    homeowner_phone = db.Column(db.String(50))
+    cobuyer_name = db.Column(db.String(100))
+    cobuyer_email = db.Column(db.String(100))
+    cobuyer_phone = db.Column(db.String(50))
+    warranty_type = db.Column(db.String(100))
+    issue_description = db.Column(db.Text)
+    date_reported = db.Column(db.Date)
+    status = db.Column(db.String(20))
+    assignee_id = db.Column(db.Integer, db.ForeignKey('assignee.id'))
+    archived_at = db.Column(db.DateTime, nullable=False)
+    photos = db.relationship('ArchivedClaimPhoto', order_by='ArchivedClaimPhoto.id')
+    workorders = db.relationship('ArchivedWorkOrder', order_by='ArchivedWorkOrder.id')
+
+class ArchivedWorkOrder(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey('archived_claim.id'), nullable=False, index=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'))
+    assignee_id = db.Column(db.Integer, db.ForeignKey('assignee.id'))
+    scheduled_date = db.Column(db.Date)
+    scheduled_time = db.Column(db.String(8))
+    status = db.Column(db.String(20))
+    notes = db.Column(db.String(200))
+    updated_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+class ArchivedClaimLog(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey('archived_claim.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    timestamp = db.Column(db.DateTime)
+    action = db.Column(db.String(200), nullable=False)
+    user = db.relationship('User')
+
+class ArchivedClaimPhoto(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey('archived_claim.id'), nullable=False, index=True)
+    filename = db.Column(db.String(200), nullable=False)
+    content_hash = db.Column(db.String(64), db.ForeignKey('photo_blob.sha256'), index=True)
+    blob = db.relationship('PhotoBlob', lazy='joined')
+    thumb_filename = ClaimPhoto.thumb_filename
+    web_filename = ClaimPhoto.web_filename
+
+class ArchivedClaimClosure(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey('archived_claim.id'), nullable=False, index=True)
+    reasons = db.Column(db.String(400))
+    notes = db.Column(db.Text)
+    timestamp = db.Column(db.DateTime)
+
+# (live model, archive model); children of a claim, in insert order.
+ARCHIVED_CHILDREN = (
+    (WorkOrder, ArchivedWorkOrder),
+    (ClaimLog, ArchivedClaimLog),
+    (ClaimPhoto, ArchivedClaimPhoto),
+    (ClaimClosure, ArchivedClaimClosure),
+)
+
+
+class Job(db.Model):
+    """A unit of background work, run by `flask run-worker`."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, default=cst_now)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    result = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=cst_now)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # worker poll: oldest runnable queued job
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),
+    )
+
+
+class DataVersion(db.Model):
+    """Change counters that let per-process caches notice writes from any worker."""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ChangeEvent(db.Model):
+    """Append-only sequence of claim changes, tailed by the /events stream."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    claim_id = db.Column(db.Integer)
+    payload = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=cst_now)
+
+    # Ids must never be reused after old events are pruned.
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+def bump_data_version(connection, name):
+    """Increments a DataVersion counter inside the caller's transaction."""
+    table = DataVersion.__table__
+    connection.execute(
+        sqlite_insert(table).values(name=name, version=1)
+        .on_conflict_do_update(index_elements=[table.c.name], set_={'version': table.c.version + 1})
+    )
+
+# --- REQUEST METRICS ---
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+FROM_TABLE = re.compile(r'\bFROM\s+"?(\w+)', re.IGNORECASE)
+
+class RequestSqlStats:
+    """SQL statements run while serving one request."""
+    def __init__(self, keep_queries):
+        self.count = 0
+        self.seconds = 0.0
+        self.by_statement = Counter()
+        self.queries = [] if keep_queries else None
+
+    def record(self, statement, parameters, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.by_statement[statement] += 1
+        if self.queries is not None:
+            self.queries.append((seconds, statement, parameters))
+
+    def repeated_selects(self, threshold):
+        """(statement, times) for SELECTs run often enough to look like N+1 loads."""
+        return [(statement, times) for statement, times in self.by_statement.items()
+                if times >= threshold and statement.lstrip().upper().startswith('SELECT')]
+
+def metric_labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+
+class RequestMetrics:
+    """Prometheus-style counters and histograms for this process.
+
+    Series are keyed by their rendered label string, so snapshots from
+    several processes merge by plain addition.
+    """
+    COUNTERS = {
+        'warranty_http_requests_total': 'Requests served, by endpoint, method and status.',
+        'warranty_db_queries_total': 'SQL statements executed while serving requests.',
+        'warranty_db_query_seconds_total': 'Time spent in SQL statements while serving requests.',
+        'warranty_n_plus_one_total': 'Requests that repeated one SELECT at least N_PLUS_ONE_THRESHOLD times.',
+        'warranty_slow_requests_total': 'Requests slower than SLOW_REQUEST_MS.',
+    }
+    HISTOGRAMS = {
+        'warranty_http_request_duration_seconds': ('Time to build the response.', LATENCY_BUCKETS),
+        'warranty_db_queries_per_request': ('SQL statements per request.', QUERY_COUNT_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {name: {} for name in self.COUNTERS}
+        self.histograms = {name: {} for name in self.HISTOGRAMS}
+        self.flushed_at = 0.0
+
+    def inc(self, name, labels, amount=1):
+        series = self.counters[name]
+        series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = self.HISTOGRAMS[name][1]
+        series = self.histograms[name].setdefault(labels, [0] * (len(buckets) + 2))
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def record_request(self, endpoint, method, status, seconds, stats, n_plus_one, slow):
+        labels = metric_labels(endpoint=endpoint)
+        with self.lock:
+            self.inc('warranty_http_requests_total', metric_labels(endpoint=endpoint, method=method, status=status))
+            self.observe('warranty_http_request_duration_seconds', labels, seconds)
+            self.observe('warranty_db_queries_per_request', labels, stats.count)
+            self.inc('warranty_db_queries_total', labels, stats.count)
+            self.inc('warranty_db_query_seconds_total', labels, stats.seconds)
+            for table in n_plus_one:
+                self.inc('warranty_n_plus_one_total', metric_labels(endpoint=endpoint, table=table))
+            if slow:
+                self.inc('warranty_slow_requests_total', labels)
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps({'counters': self.counters, 'histograms': self.histograms}))
+
+    def flush(self, force=False):
+        """Writes this process's snapshot for /metrics, at most every METRICS_FLUSH_SECONDS."""
+        now = time.monotonic()
+        if not force and now - self.flushed_at < current_app.config['METRICS_FLUSH_SECONDS']:
+            return
+        self.flushed_at = now
+        path = metric_snapshot_path(os.getpid())
+        fd, tmp_path = tempfile.mkstemp(dir=current_app.config['METRICS_FOLDER'], suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+def merge_metric_snapshots(snapshots):
+    merged = {'counters': {}, 'histograms': {}}
+    for snapshot in snapshots:
+        for name, series in snapshot.get('counters', {}).items():
+            target = merged['counters'].setdefault(name, {})
+            for labels, value in series.items():
+                target[labels] = target.get(labels, 0) + value
+        for name, series in snapshot.get('histograms', {}).items():
+            target = merged['histograms'].setdefault(name, {})
+            for labels, values in series.items():
+                if labels in target:
+                    target[labels] = [a + b for a, b in zip(target[labels], values)]
+                else:
+                    target[labels] = list(values)
+    return merged
+
+def render_prometheus(merged):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name, help_text in RequestMetrics.COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for labels, value in sorted(merged['counters'].get(name, {}).items()):
+            lines.append(f"{name}{{{labels}}} {value:g}")
+    for name, (help_text, buckets) in RequestMetrics.HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, values in sorted(merged['histograms'].get(name, {}).items()):
+            for bound, count in zip(buckets, values):
+                lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {values[-1]}')
+            lines.append(f"{name}_sum{{{labels}}} {values[-2]:g}")
+            lines.append(f"{name}_count{{{labels}}} {values[-1]}")
+    return '\n'.join(lines) + '\n'
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is None or not has_request_context():
+        return
+    stats = g.get('sql_stats')
+    if stats is not None:
+        stats.record(statement, parameters, time.perf_counter() - started)
+
+@bp.before_app_request
+def start_request_metrics():
+    if current_app.config['METRICS_ENABLED']:
+        g.request_started = time.perf_counter()
+        g.sql_stats = RequestSqlStats(keep_queries=current_app.config['SLOW_REQUEST_MS'] > 0)
+
+@bp.after_app_request
+def finish_request_metrics(response):
+    """Records latency and SQL counts, and reports N+1 loads and slow requests.
+
+    Streamed bodies are timed up to the point the response is returned,
+    not until the last chunk is sent.
+    """
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    seconds = time.perf_counter() - g.request_started
+    endpoint = request.url_rule.endpoint if request.url_rule else 'unmatched'
+
+    n_plus_one = []
+    for statement, times in stats.repeated_selects(current_app.config['N_PLUS_ONE_THRESHOLD']):
+        match = FROM_TABLE.search(statement)
+        n_plus_one.append(match.group(1) if match else 'unknown')
+        current_app.logger.warning("Possible N+1 in %s: %d x %s", endpoint, times, ' '.join(statement.split())[:300])
+
+    slow_ms = current_app.config['SLOW_REQUEST_MS']
+    slow = bool(slow_ms) and seconds * 1000 >= slow_ms
+    if slow:
+        lines = [f"Slow request: {request.method} {request.full_path.rstrip('?')} -> {response.status_code} "
+                 f"in {seconds * 1000:.0f} ms, {stats.count} queries, {stats.seconds * 1000:.0f} ms in SQL"]
+        for query_seconds, statement, parameters in stats.queries:
+            lines.append(f"  {query_seconds * 1000:7.1f} ms  {' '.join(statement.split())[:500]}  {str(parameters)[:200]}")
+        current_app.logger.warning('\n'.join(lines))
+
+    metrics = app_state().request_metrics
+    metrics.record_request(endpoint, request.method, response.status_code, seconds, stats, n_plus_one, slow)
+    metrics.flush()
+    return response
+
+def metric_snapshot_path(pid):
+    return os.path.join(current_app.config['METRICS_FOLDER'], f"{pid}.json")
+
+def discard_metric_snapshot(pid):
+    """Removes the snapshot of a process that has exited (gunicorn's child_exit hook)."""
+    try:
+        os.remove(metric_snapshot_path(pid))
+    except OSError:
+        pass
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+@bp.route('/metrics')
+def metrics():
+    """Request metrics from every process that shares METRICS_FOLDER."""
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        if request.headers.get('Authorization') != f"Bearer {token}":
+            abort(401)
+    elif request.remote_addr not in LOOPBACK_ADDRESSES:
+        abort(404)
+    app_state().request_metrics.flush(force=True)
+    snapshots = []
+    for name in os.listdir(current_app.config['METRICS_FOLDER']):
+        pid, ext = os.path.splitext(name)
+        if ext != '.json' or not pid.isdigit():
+            continue
+        if not process_alive(int(pid)):
+            # Killed without child_exit running; its counters would linger.
+            discard_metric_snapshot(int(pid))
+            continue
+        try:
+            with open(os.path.join(current_app.config['METRICS_FOLDER'], name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    response = make_response(render_prometheus(merge_metric_snapshots(snapshots)))
+    response.mimetype = 'text/plain'
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# --- REFERENCE DATA CACHE ---
+ReferenceRow = namedtuple('ReferenceRow', 'id name contact_number email')
+
+class ReferenceData:
+    """Vendors and assignees as plain rows, plus id lookups."""
+    def __init__(self, version, vendors, assignees):
+        self.version = version
+        self.vendors = vendors
+        self.assignees = assignees
+        self.vendor_by_id = {vendor.id: vendor for vendor in vendors}
+        self.assignee_by_id = {assignee.id: assignee for assignee in assignees}
+
+def load_reference_rows(model):
+    columns = (model.id, model.name, model.contact_number, model.email)
+    return [ReferenceRow(*row) for row in db.session.query(*columns).order_by(model.id)]
+
+def reference_data():
+    """Vendors and assignees from memory, reloaded when the DB counter moves.
+
+    Costs one primary-key read of DataVersion per request; the result is
+    kept on flask.g so repeated calls within a request are free.
+    """
+    if 'reference_data' in g:
+        return g.reference_data
+    version = db.session.query(DataVersion.version).filter_by(name='reference').scalar() or 0
+    state = app_state()
+    data = state.reference_data
+    if data is None or data.version != version:
+        # Read after the version, so the rows are at least that new.
+        data = ReferenceData(version, load_reference_rows(Vendor), load_reference_rows(Assignee))
+        state.reference_data = data
+    g.reference_data = data
+    return data
+
+@event.listens_for(Vendor, 'after_insert')
+@event.listens_for(Vendor, 'after_update')
+@event.listens_for(Vendor, 'after_delete')
+@event.listens_for(Assignee, 'after_insert')
+@event.listens_for(Assignee, 'after_update')
+@event.listens_for(Assignee, 'after_delete')
+def reference_data_changed(mapper, connection, target):
+    bump_data_version(connection, 'reference')
+
+
+class SessionUser(UserMixin):
+    """The identity fields of a User, detached from the database session.
+
+    Requests only read current_user.id and .name, so this is what
+    load_user() hands out instead of an ORM instance.
+    """
+    def __init__(self, id, email, name):
+        self.id = id
+        self.email = email
+        self.name = name
+
+def cached_user(user_id):
+    """Per-process TTL/LRU lookup of a user's identity; None if unknown."""
+    ttl = current_app.config['USER_CACHE_TTL']
+    now = time.monotonic()
+    cache = app_state().user_cache
+    cached = cache.get(user_id)
+    if cached and cached[0] > now:
+        cache.move_to_end(user_id)
+        return cached[1]
+    row = db.session.query(User.id, User.email, User.name).filter(User.id == user_id).first()
+    if row is None:
+        cache.pop(user_id, None)
+        return None
+    user = SessionUser(*row)
+    if ttl > 0:
+        cache[user_id] = (now + ttl, user)
+        cache.move_to_end(user_id)
+        while len(cache) > current_app.config['USER_CACHE_SIZE']:
+            cache.popitem(last=False)
+    return user
+
+def invalidate_user(user_id):
+    """Drops a user from this process's cache; other workers expire by TTL."""
+    app_state().user_cache.pop(user_id, None)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def user_changed(mapper, connection, target):
+    invalidate_user(target.id)
+
+def sign_in(user):
+    """login_user() plus refreshing the cached and session-carried identity."""
+    invalidate_user(user.id)
+    login_user(user)
+    if current_app.config['SESSION_USER_IDENTITY']:
+        session['user_identity'] = [user.id, user.email, user.name]
+
+def sign_out():
+    if current_user.is_authenticated:
+        invalidate_user(current_user.id)
+    session.pop('user_identity', None)
+    logout_user()
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
-
-# Utility function for PDF generation
-def generate_workorder_pdf(claim, workorder, vendor=None, assignee=None, pdf_path="workorder.pdf"):
-    c = canvas.Canvas(pdf_path, pagesize=letter)
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(72, 720, "Work Order")
-    c.setFont("Helvetica", 12)
-    y = 700
-    lines = [
+    user_id = int(user_id)
+    if current_app.config['SESSION_USER_IDENTITY']:
+        identity = session.get('user_identity')
+        if identity and identity[0] == user_id:
+            return SessionUser(*identity)
+    return cached_user(user_id)
+
+# Utility functions for PDF generation
+def workorder_pdf_lines(claim, workorder, vendor=None, assignee=None):
+    """The text printed on a work order, as plain strings.
+
+    Plain data (not ORM objects) so it can be hashed for the cache and
+    handed to a rendering process.
+    """
+    return [
         f"Claim ID: {claim.id}",
         f"Address: {claim.address}",
         f"Homeowner: {claim.homeowner_name or ''}",
@@ -140,233 +878,1277 @@ def generate_workorder_pdf(claim, workorder, vendor=None, assignee=None, pdf_pat
         f"Notes: {workorder.notes or ''}",
         f"Status: {workorder.status or ''}",
     ]
-    for line in lines:
-        c.drawString(72, y, line)
-        y -= 20
+
+def render_workorder_pdf(pages):
+    """Renders one page per list of work order lines and returns the PDF bytes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    for lines in pages:
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(72, 720, "Work Order")
+        c.setFont("Helvetica", 12)
+        y = 700
+        for line in lines:
+            c.drawString(72, y, line)
+            y -= 20
+        c.showPage()
     c.save()
-    return pdf_path
+    return buffer.getvalue()
 
-@app.route('/')
-@login_required
-def index():
-    claims = Claim.query.all()
-    workorders = WorkOrder.query.all()
-
-    claim_assignments = {}
-    claim_status_override = {}
-    claim_scheduled_dates = {}
-    now = datetime.now().date()
-    for claim in claims:
-        wos = [wo for wo in workorders if wo.claim_id == claim.id]
-        # NEW LOGIC STARTS HERE
-        if claim.status == "Deferred":
-            claim_status_override[claim.id] = "Deferred"
-        elif claim.status == "Closed":
-            claim_status_override[claim.id] = "Closed"
-        else:
-            is_scheduled = any(wo.scheduled_date and wo.scheduled_date >= now for wo in wos)
-            if is_scheduled:
-                claim_status_override[claim.id] = "Scheduled"
-            else:
-                claim_status_override[claim.id] = "Open"
-        # NEW LOGIC ENDS HERE
-
-        # Scheduled date/assignment
-        if wos:
-            scheduled_wos = [wo for wo in wos if wo.scheduled_date]
-            if scheduled_wos:
-                latest_sched = max(scheduled_wos, key=lambda wo: wo.scheduled_date)
-                claim_scheduled_dates[claim.id] = latest_sched.scheduled_date.strftime('%Y-%m-%d')
-                assigned = []
-                if latest_sched.assignee:
-                    assigned.append(latest_sched.assignee.name)
-                if latest_sched.vendor:
-                    assigned.append(latest_sched.vendor.name)
-                claim_assignments[claim.id] = ', '.join(assigned) if assigned else "Unassigned"
-            else:
-                claim_scheduled_dates[claim.id] = ""
-                claim_assignments[claim.id] = "Unassigned"
-        else:
-            claim_scheduled_dates[claim.id] = ""
-            claim_assignments[claim.id] = "Unassigned"
+def pdf_content_hash(pages):
+    return hashlib.sha256(json.dumps(pages).encode('utf-8')).hexdigest()
 
-    open_claims = [c for c in claims if claim_status_override[c.id] == "Open"]
-    scheduled_claims = [c for c in claims if claim_status_override[c.id] == "Scheduled"]
-    deferred_claims = [c for c in claims if claim_status_override[c.id] == "Deferred"]
-    closed_claims = [c for c in claims if claim_status_override[c.id] == "Closed"]
+PDF_CACHE_PRUNE_EVERY = 50
 
-    closures = {}
-    deferrals = {}
+def pdf_cache_get(key):
+    """Returns cached PDF bytes or None; a hit marks the entry recently used."""
+    path = os.path.join(current_app.config['PDF_CACHE_FOLDER'], f"{key}.pdf")
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    os.utime(path)
+    return data
 
-    return render_template(
-        'dashboard.html',
-        open_claims=open_claims,
-        scheduled_claims=scheduled_claims,
-        deferred_claims=deferred_claims,
-        closed_claims=closed_claims,
-        claim_assignments=claim_assignments,
-        claim_scheduled_dates=claim_scheduled_dates,
-        claim_status_override=claim_status_override,
-        closures=closures,
-        deferrals=deferrals
-    )
+def prune_pdf_cache(folder, max_bytes, keep=None):
+    """Evicts least recently used entries over the size cap; returns the bytes left."""
+    entries = []
+    for entry in os.scandir(folder):
+        if entry.name.endswith('.pdf'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, old_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if old_path == keep:
+            continue
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
 
-@app.route('/api/update_workorder_date', methods=['POST'])
-@login_required
-def update_workorder_date():
-    from flask import jsonify  # make sure this import is present
-    data = request.get_json()
-    workorder_id = data.get('workorder_id')
-    new_date = data.get('new_date')  # expected as "YYYY-MM-DD"
-    try:
-        workorder = WorkOrder.query.get_or_404(workorder_id)
-        old_date = workorder.scheduled_date
-        workorder.scheduled_date = datetime.strptime(new_date, "%Y-%m-%d").date()
-        db.session.commit()
-        
-        # Log the change to ClaimLog
-        db.session.add(ClaimLog(
-            claim_id=workorder.claim_id,
-            user_id=current_user.id,
-            action=(
-                f"Work order rescheduled from {old_date} to {workorder.scheduled_date} "
-                f"by {current_user.name}."
-            )
-        ))
-        db.session.commit()
-        
-        return jsonify({"success": True})
-    except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+def pdf_cache_put(key, data):
+    """Stores PDF bytes, pruning the cache when it may have outgrown its cap.
 
+    Each process keeps a running total: the size found by its last scan
+    of the folder plus what it has written since. The folder is scanned
+    again only when that passes PDF_CACHE_MAX_BYTES, or every
+    PDF_CACHE_PRUNE_EVERY puts to pick up what other processes wrote.
+    """
+    config = current_app.config
+    path = os.path.join(config['PDF_CACHE_FOLDER'], f"{key}.pdf")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
 
+    state = app_state()
+    with state.lock:
+        state.pdf_cache_puts += 1
+        if state.pdf_cache_bytes is not None:
+            state.pdf_cache_bytes += len(data)
+        due = state.pdf_cache_bytes is None or state.pdf_cache_bytes > config['PDF_CACHE_MAX_BYTES'] or \
+            state.pdf_cache_puts % PDF_CACHE_PRUNE_EVERY == 0
+    if due:
+        state.pdf_cache_bytes = prune_pdf_cache(config['PDF_CACHE_FOLDER'], config['PDF_CACHE_MAX_BYTES'], keep=path)
 
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    if request.method == 'POST':
-        user = User.query.filter_by(email=request.form['email'].lower()).first()
-        if user and check_password_hash(user.password, request.form['password']):
-            login_user(user)
-            return redirect(url_for('index'))
-        else:
-            flash('Invalid credentials')
-    return render_template('login.html')
+def cached_workorder_pdf(pages):
+    """(content hash, PDF bytes) for the pages, rendering only on a cache miss."""
+    key = pdf_content_hash(pages)
+    data = pdf_cache_get(key)
+    if data is None:
+        data = render_workorder_pdf(pages)
+        pdf_cache_put(key, data)
+    return key, data
 
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    if request.method == 'POST':
-        email = request.form['email'].lower()
-        name = request.form['name']
-        password = request.form['password']
-        if User.query.filter_by(email=email).first():
-            flash('Email already registered. Please log in.')
-            return redirect(url_for('login'))
-        hashed = generate_password_hash(password)
-        user = User(email=email, name=name, password=hashed)
-        db.session.add(user)
-        db.session.commit()
-        flash('Registration successful! Please log in.')
-        return redirect(url_for('login'))
-    return render_template('register.html')
+def pdf_render_pool():
+    """This process's PDF render pool, started on first use and kept.
 
-@app.route('/logout')
-@login_required
-def logout():
-    logout_user()
-    return redirect(url_for('login'))
+    The pool's processes are spawned, not forked: a fork of a threaded
+    (gthread) worker would copy locks held by its other threads.
+    """
+    state = app_state()
+    with state.lock:
+        if state.pdf_pool is None or state.pdf_pool[0] != os.getpid():
+            pool = ProcessPoolExecutor(max_workers=current_app.config['PDF_RENDER_PROCESSES'],
+                                       mp_context=multiprocessing.get_context('spawn'))
+            state.pdf_pool = (os.getpid(), pool)
+        return state.pdf_pool[1]
 
-@app.route('/add_vendor', methods=['GET', 'POST'])
-@login_required
-def add_vendor():
-    if request.method == 'POST':
-        name = request.form['name']
-        contact_number = request.form['contact_number']
-        email = request.form['email']
-        vendor = Vendor(name=name, contact_number=contact_number, email=email)
-        db.session.add(vendor)
-        db.session.commit()
-        flash('Vendor added!')
-        return redirect(url_for('vendors'))
-    return render_template('add_vendor.html')
+def render_workorder_pdfs_parallel(page_sets):
+    """Renders several single work order PDFs, in a process pool if worthwhile.
 
-@app.route('/vendors')
-@login_required
-def vendors():
-    vendors = Vendor.query.all()
-    return render_template('vendors.html', vendors=vendors)
+    Returns {content hash: bytes}; cached entries are reused and misses are
+    written back to the cache.
+    """
+    results = {}
+    misses = {}
+    for pages in page_sets:
+        key = pdf_content_hash(pages)
+        data = pdf_cache_get(key)
+        if data is None:
+            misses[key] = pages
+        else:
+            results[key] = data
+    rendered = None
+    if len(misses) >= current_app.config['PDF_POOL_THRESHOLD']:
+        pool = pdf_render_pool()
+        try:
+            rendered = dict(zip(misses.keys(), pool.map(render_workorder_pdf, misses.values(), chunksize=8)))
+        except BrokenProcessPool:
+            # A render process died; start a new pool next time.
+            current_app.logger.exception("PDF render pool broke; rendering in this thread")
+            with app_state().lock:
+                app_state().pdf_pool = None
+    if rendered is None:
+        rendered = {key: render_workorder_pdf(pages) for key, pages in misses.items()}
+    for key, data in rendered.items():
+        pdf_cache_put(key, data)
+    results.update(rendered)
+    return results
 
-@app.route('/add_assignee', methods=['GET', 'POST'])
-@login_required
-def add_assignee():
-    if request.method == 'POST':
-        name = request.form['name']
-        contact_number = request.form['contact_number']
-        email = request.form['email']
-        assignee = Assignee(name=name, contact_number=contact_number, email=email)
-        db.session.add(assignee)
-        db.session.commit()
-        flash('Assignee added!')
-        return redirect(url_for('assignees'))
-    return render_template('add_assignee.html')
+JOB_HANDLERS = {}
 
-@app.route('/assignees')
-@login_required
-def assignees():
-    assignees = Assignee.query.all()
-    return render_template('assignees.html', assignees=assignees)
+def job_handler(kind):
+    """Registers a function as the handler for jobs of the given kind.
 
-@app.route('/add_claim', methods=['GET', 'POST'])
-@login_required
-def add_claim():
-    if request.method == 'POST':
-        try:
-            address = request.form['address']
-            homeowner_name = request.form['homeowner_name']
-            homeowner_email = request.form['homeowner_email']
-            homeowner_phone = request.form['homeowner_phone']
-            cobuyer_name = request.form['cobuyer_name']
-            cobuyer_email = request.form['cobuyer_email']
-            cobuyer_phone = request.form['cobuyer_phone']
-            warranty_type = request.form['warranty_type']
-            issue_description = request.form['issue_description']
+    Handlers get the decoded payload dict and may return a short result
+    string. Raising marks the attempt failed and schedules a retry.
+    """
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
 
-            claim = Claim(
-                address=address,
-                homeowner_name=homeowner_name,
-                homeowner_email=homeowner_email,
-                homeowner_phone=homeowner_phone,
-                cobuyer_name=cobuyer_name,
-                cobuyer_email=cobuyer_email,
-                cobuyer_phone=cobuyer_phone,
-                warranty_type=warranty_type,
-                issue_description=issue_description
+def enqueue_job(kind, payload, claim_id=None, max_attempts=5):
+    """Adds a job to the session; it becomes visible to workers on commit."""
+    job = Job(kind=kind, payload=json.dumps(payload), claim_id=claim_id,
+              max_attempts=max_attempts, run_after=cst_now())
+    db.session.add(job)
+    return job
+
+def claim_next_job():
+    """Atomically marks the oldest runnable job as running and returns it.
+
+    The conditional UPDATE means two workers polling at once can never
+    both take the same job.
+    """
+    now = cst_now()
+    while True:
+        job_id = (
+            db.session.query(Job.id)
+            .filter(Job.status == 'queued', Job.run_after <= now)
+            .order_by(Job.run_after, Job.id)
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            db.session.commit()
+            return None
+        try:
+            taken = (
+                Job.query
+                .filter(Job.id == job_id, Job.status == 'queued')
+                .update({'status': 'running', 'locked_at': now, 'attempts': Job.attempts + 1},
+                        synchronize_session=False)
             )
-            db.session.add(claim)
             db.session.commit()
+        except exc.OperationalError as e:
+            # Another process wrote since our read; look again with a fresh snapshot.
+            db.session.rollback()
+            if not is_busy_error(e):
+                raise
+            continue
+        if taken:
+            return Job.query.get(job_id)
 
-            files = request.files.getlist('photos')
-            for file in files:
-                if file and file.filename:
-                    filename = secure_filename(file.filename)
-                    file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                    photo = ClaimPhoto(claim_id=claim.id, filename=filename)
-                    db.session.add(photo)
-            db.session.commit()
+def run_job(job):
+    """Runs a claimed job and records success, a retry or final failure."""
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler for job kind {job.kind!r}")
+        result = handler(json.loads(job.payload))
+    except Exception as e:
+        db.session.rollback()
+        job = Job.query.get(job.id)
+        job.last_error = f"{type(e).__name__}: {e}"
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = cst_now() + timedelta(seconds=JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+        else:
+            job.status = 'failed'
+            job.finished_at = cst_now()
+        db.session.commit()
+        return False
+    job.status = 'done'
+    job.result = (result or '')[:200]
+    job.finished_at = cst_now()
+    db.session.commit()
+    return True
 
-            flash('Claim added!')
-            return redirect(url_for('index'))
-        except Exception as e:
-            flash(f"Error adding claim: {e}")
-    return render_template('add_claim.html')
+def requeue_stale_jobs():
+    """Puts jobs left running by a worker that died back in the queue."""
+    cutoff = cst_now() - timedelta(seconds=JOB_LEASE_SECONDS)
+    requeued = (
+        Job.query
+        .filter(Job.status == 'running', Job.locked_at < cutoff)
+        .update({'status': 'queued', 'last_error': 'Worker lease expired'}, synchronize_session=False)
+    )
+    db.session.commit()
+    return requeued
 
-@app.route('/view_claim/<int:claim_id>', methods=['GET', 'POST'])
-@login_required
+def run_pending_jobs(limit=None):
+    """Runs runnable jobs until the queue is empty or limit is reached."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+JOB_RETRY_BASE_SECONDS = 30
+JOB_LEASE_SECONDS = 10 * 60
+JOB_POLL_SECONDS = 2
+JOB_REQUEUE_SECONDS = 60  # how often to look for expired leases; it is a write
+JOB_ERROR_BACKOFF_SECONDS = (1, 2, 5, 10, 30)
+
+def worker_loop(once=False):
+    """Runs jobs until stopped.
+
+    Nothing restarts a dead worker, so an error (database busy or locked,
+    a failed commit) is logged and the loop carries on after a backoff.
+    The first pass each day also rolls the dashboard's claim summaries
+    over, since their Scheduled/Open split depends on the date.
+    """
+    next_requeue = 0.0
+    rolled_on = None
+    failures = 0
+    while True:
+        try:
+            today = datetime.now().date()
+            if rolled_on != today:
+                roll_claim_summaries(today)
+                rolled_on = today
+            if time.monotonic() >= next_requeue:
+                requeue_stale_jobs()
+                next_requeue = time.monotonic() + JOB_REQUEUE_SECONDS
+            ran = run_pending_jobs()
+        except Exception:
+            if once:
+                raise
+            db.session.rollback()
+            delay = JOB_ERROR_BACKOFF_SECONDS[min(failures, len(JOB_ERROR_BACKOFF_SECONDS) - 1)]
+            failures += 1
+            current_app.logger.exception("Job worker error; retrying in %s s", delay)
+            time.sleep(delay)
+            continue
+        failures = 0
+        if once:
+            return ran
+        if not ran:
+            app_state().mailer.close_if_idle()
+            time.sleep(JOB_POLL_SECONDS)
+
+def worker_process(app):
+    with app.app_context():
+        db.engine.dispose(close=False)
+        worker_loop()
+
+@bp.cli.command('run-worker')
+@click.option('--once', is_flag=True, help='Drain the queue once and exit.')
+@click.option('--processes', default=1, show_default=True,
+              help='Number of worker processes sharing the queue.')
+def run_worker_command(once, processes):
+    """Process background jobs (calendar invites, photos, ...) from the job table."""
+    click.echo(f"Job worker started for: {', '.join(sorted(JOB_HANDLERS))}")
+    if once:
+        click.echo(f"Ran {worker_loop(once=True)} job(s).")
+        return
+    if processes <= 1:
+        worker_loop()
+        return
+    app = current_app._get_current_object()
+    pool = [multiprocessing.Process(target=worker_process, args=(app,), daemon=True) for _ in range(processes)]
+    for process in pool:
+        process.start()
+    for process in pool:
+        process.join()
+
+def store_photo(stream, original_name):
+    """Saves an uploaded photo under its SHA-256 and returns its PhotoBlob.
+
+    The upload is streamed to a temp file while hashing, so memory use
+    does not depend on the photo size. Identical content is stored once;
+    each call adds a reference that release_photos() gives back. New
+    content gets a job to build its thumbnail and web-sized copies.
+    """
+    folder = current_app.config['UPLOAD_FOLDER']
+    ext = os.path.splitext(secure_filename(original_name))[1].lstrip('.').lower()[:10] or 'bin'
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_BYTES), b''):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        return adopt_photo_file(tmp_path, digest.hexdigest(), ext, size)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def adopt_photo_file(path, sha256, ext, size):
+    """Moves a fully written file into content-addressed storage.
+
+    Returns the PhotoBlob with one more reference. If the content is
+    already stored, the file at ``path`` is left for the caller to delete.
+    """
+    blob = db.session.get(PhotoBlob, sha256)
+    if blob is None:
+        blob = PhotoBlob(sha256=sha256, ext=ext, size=size, ref_count=0)
+        final_path = os.path.join(current_app.config['UPLOAD_FOLDER'], blob.filename)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(path, final_path)
+        db.session.add(blob)
+        db.session.flush()
+        enqueue_job('photo_derivatives', {'sha256': sha256})
+    PhotoBlob.query.filter_by(sha256=sha256).update(
+        {'ref_count': PhotoBlob.ref_count + 1}, synchronize_session=False)
+    return blob
+
+def release_photos(hashes):
+    """Drops one reference per hash; returns blobs that are no longer used.
+
+    Their rows are deleted in the current transaction. Remove the files
+    with remove_photo_blob_files() after commit.
+    """
+    unreferenced = []
+    for sha256 in hashes:
+        PhotoBlob.query.filter_by(sha256=sha256).update(
+            {'ref_count': PhotoBlob.ref_count - 1}, synchronize_session=False)
+    if hashes:
+        for blob in PhotoBlob.query.filter(PhotoBlob.sha256.in_(set(hashes)), PhotoBlob.ref_count <= 0):
+            unreferenced.append((blob.filename, blob.derivative_filename('thumb'), blob.derivative_filename('web')))
+            db.session.delete(blob)
+    return unreferenced
+
+def remove_upload_files(filenames):
+    for filename in filenames:
+        try:
+            os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+        except OSError:
+            pass
+
+def remove_photo_blob_files(unreferenced):
+    for filenames in unreferenced:
+        remove_upload_files(filenames)
+
+PHOTO_DERIVATIVES = {
+    # variant: (longest edge in pixels, JPEG quality)
+    'thumb': (320, 75),
+    'web': (1600, 82),
+}
+
+@job_handler('photo_derivatives')
+def photo_derivatives_job(payload):
+    """Writes the thumbnail and web-sized JPEGs for a stored photo.
+
+    Files Pillow cannot read (not an image, truncated, or gone) finish the
+    job without derivatives; the original is served as it is.
+    """
+    from PIL import Image, ImageOps
+    blob = db.session.get(PhotoBlob, payload['sha256'])
+    if blob is None:
+        return "Photo no longer exists."
+    folder = current_app.config['UPLOAD_FOLDER']
+    try:
+        with Image.open(os.path.join(folder, blob.filename)) as original:
+            image = ImageOps.exif_transpose(original).convert('RGB')
+    except OSError as e:  # includes PIL.UnidentifiedImageError
+        return f"Not an image: {e}"
+    for variant, (edge, quality) in PHOTO_DERIVATIVES.items():
+        copy = image.copy()
+        copy.thumbnail((edge, edge))
+        path = os.path.join(folder, blob.derivative_filename(variant))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        copy.save(tmp_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+        os.replace(tmp_path, path)
+    blob.thumb_ready = True
+    blob.web_ready = True
+    db.session.commit()
+    return f"{blob.sha256[:12]} thumb/web"
+
+@bp.cli.command('migrate-photos')
+def migrate_photos_command():
+    """Move photos saved before content-addressed storage into it."""
+    folder = current_app.config['UPLOAD_FOLDER']
+    moved = missing = 0
+    for photo in ClaimPhoto.query.filter(ClaimPhoto.content_hash.is_(None)).all():
+        path = os.path.join(folder, photo.filename)
+        if not os.path.exists(path):
+            missing += 1
+            continue
+        with open(path, 'rb') as f:
+            blob = store_photo(f, photo.filename)
+        photo.filename = blob.filename
+        photo.content_hash = blob.sha256
+        db.session.commit()
+        if not ClaimPhoto.query.filter(ClaimPhoto.filename == os.path.basename(path)).count():
+            os.remove(path)
+        moved += 1
+    click.echo(f"Moved {moved} photo(s); {missing} file(s) missing.")
+
+def latest_scheduled_workorders(claim_ids=None):
+    """Subquery of each claim's work order with the latest scheduled date.
+
+    Ties on the date go to the lowest work order id, matching the order the
+    dashboard used to pick them in Python.
+    """
+    ranked = (
+        db.session.query(
+            WorkOrder.id.label('workorder_id'),
+            WorkOrder.claim_id.label('claim_id'),
+            WorkOrder.scheduled_date.label('scheduled_date'),
+            WorkOrder.vendor_id.label('vendor_id'),
+            WorkOrder.assignee_id.label('assignee_id'),
+            db.func.row_number().over(
+                partition_by=WorkOrder.claim_id,
+                order_by=(WorkOrder.scheduled_date.desc(), WorkOrder.id),
+            ).label('rank'),
+        )
+        .filter(WorkOrder.scheduled_date.isnot(None))
+    )
+    if claim_ids is not None:
+        ranked = ranked.filter(WorkOrder.claim_id.in_(claim_ids))
+    ranked = ranked.subquery()
+    return (
+        db.session.query(ranked)
+        .filter(ranked.c.rank == 1)
+        .subquery('latest_wo')
+    )
+
+def claim_summary_rows(now, claim_ids=None):
+    """Computes ClaimSummary values from the raw claim and work order rows.
+
+    Joins each claim to its latest scheduled work order and that work
+    order's assignee and vendor in one query. This is the source of truth
+    the ClaimSummary projection is built from and checked against.
+    """
+    latest_wo = latest_scheduled_workorders(claim_ids)
+    query = (
+        db.session.query(
+            Claim.id, Claim.address, Claim.homeowner_name, Claim.warranty_type,
+            Claim.date_reported, Claim.status,
+            latest_wo.c.workorder_id, latest_wo.c.scheduled_date,
+            Assignee.id, Assignee.name,
+            Vendor.id, Vendor.name,
+        )
+        .outerjoin(latest_wo, latest_wo.c.claim_id == Claim.id)
+        .outerjoin(Assignee, Assignee.id == latest_wo.c.assignee_id)
+        .outerjoin(Vendor, Vendor.id == latest_wo.c.vendor_id)
+        .order_by(Claim.id)
+    )
+    if claim_ids is not None:
+        query = query.filter(Claim.id.in_(claim_ids))
+
+    summaries = []
+    for (claim_id, address, homeowner_name, warranty_type, date_reported, status,
+         workorder_id, scheduled_date, assignee_id, assignee_name, vendor_id, vendor_name) in query:
+        if status in ("Deferred", "Closed"):
+            effective_status = status
+        elif scheduled_date and scheduled_date >= now:
+            effective_status = "Scheduled"
+        else:
+            effective_status = "Open"
+
+        assigned = []
+        if assignee_id is not None:
+            assigned.append(assignee_name)
+        if vendor_id is not None:
+            assigned.append(vendor_name)
+
+        summaries.append({
+            'claim_id': claim_id,
+            'address': address,
+            'homeowner_name': homeowner_name,
+            'warranty_type': warranty_type,
+            'date_reported': date_reported,
+            'status': status,
+            'effective_status': effective_status,
+            'latest_workorder_id': workorder_id,
+            'scheduled_date': scheduled_date,
+            'assignment': ', '.join(assigned) if assigned else "Unassigned",
+        })
+    return summaries
+
+SUMMARY_BATCH_SIZE = 500
+
+def refresh_claim_summaries(claim_ids, now=None):
+    """Recomputes the ClaimSummary rows for the given claims.
+
+    Call this in the same transaction as any change to a claim or its work
+    orders. Claims that no longer exist have their summary removed. Also
+    bumps the 'claims' generation, which expires cached dashboard fragments.
+    """
+    now = now or datetime.now().date()
+    claim_ids = sorted(set(claim_ids))
+    bump_data_version(db.session.connection(), 'claims')
+    for start in range(0, len(claim_ids), SUMMARY_BATCH_SIZE):
+        batch = claim_ids[start:start + SUMMARY_BATCH_SIZE]
+        ClaimSummary.query.filter(ClaimSummary.claim_id.in_(batch)).delete(synchronize_session=False)
+        rows = claim_summary_rows(now, batch)
+        if rows:
+            refreshed_at = cst_now()
+            for row in rows:
+                row['refreshed_at'] = refreshed_at
+            db.session.execute(db.insert(ClaimSummary), rows)
+
+def commit_claim_changes(claim_ids, feed_owners=()):
+    """Commits pending changes to the given claims and their work orders.
+
+    Refreshes the claims' summaries and records change events in the same
+    transaction, then drops the cached calendar feeds of everyone with a work order on those claims.
+    Pass ``feed_owners`` for work orders that are being deleted. With no
+    claim ids it only commits, so the 'claims' generation, and with it every
+    cached fragment and ETag, stays put.
+    """
+    if not claim_ids:
+        db.session.commit()
+        invalidate_feeds(set(feed_owners))
+        return
+    refresh_claim_summaries(claim_ids)
+    record_claim_changes(claim_ids)
+    owners = feed_owners_for_claims(claim_ids) | set(feed_owners)
+    db.session.commit()
+    invalidate_feeds(owners)
+
+def rebuild_claim_summaries(now=None):
+    """Drops and recomputes every ClaimSummary row. Returns the row count."""
+    now = now or datetime.now().date()
+    ClaimSummary.query.delete(synchronize_session=False)
+    claim_ids = [claim_id for (claim_id,) in db.session.query(Claim.id).order_by(Claim.id)]
+    refresh_claim_summaries(claim_ids, now)
+    db.session.commit()
+    return len(claim_ids)
+
+def roll_claim_summaries(now=None):
+    """Moves Scheduled summaries whose latest date has passed back to Open."""
+    now = now or datetime.now().date()
+    rolled = (
+        ClaimSummary.query
+        .filter(ClaimSummary.effective_status == "Scheduled", ClaimSummary.scheduled_date < now)
+        .update({'effective_status': "Open"}, synchronize_session=False)
+    )
+    if rolled:
+        bump_data_version(db.session.connection(), 'claims')
+        record_change('reload')
+    db.session.commit()
+    return rolled
+
+SUMMARY_FIELDS = (
+    'address', 'homeowner_name', 'warranty_type', 'date_reported', 'status',
+    'effective_status', 'latest_workorder_id', 'scheduled_date', 'assignment',
+)
+
+def check_claim_summaries(now=None):
+    """Compares stored summaries with freshly computed ones.
+
+    Returns a list of (claim_id, field, stored, expected) mismatches, where
+    field is 'missing' or 'orphaned' for rows present on only one side.
+    """
+    now = now or datetime.now().date()
+    mismatches = []
+    claim_ids = sorted(
+        {claim_id for (claim_id,) in db.session.query(Claim.id)}
+        | {claim_id for (claim_id,) in db.session.query(ClaimSummary.claim_id)}
+    )
+    for start in range(0, len(claim_ids), SUMMARY_BATCH_SIZE):
+        batch = claim_ids[start:start + SUMMARY_BATCH_SIZE]
+        expected = {row['claim_id']: row for row in claim_summary_rows(now, batch)}
+        stored = {s.claim_id: s for s in ClaimSummary.query.filter(ClaimSummary.claim_id.in_(batch))}
+        for claim_id in batch:
+            if claim_id not in stored:
+                mismatches.append((claim_id, 'missing', None, expected[claim_id]))
+            elif claim_id not in expected:
+                mismatches.append((claim_id, 'orphaned', stored[claim_id], None))
+            else:
+                for field in SUMMARY_FIELDS:
+                    stored_value = getattr(stored[claim_id], field)
+                    if stored_value != expected[claim_id][field]:
+                        mismatches.append((claim_id, field, stored_value, expected[claim_id][field]))
+    return mismatches
+
+@bp.cli.command('rebuild-claim-summaries')
+def rebuild_claim_summaries_command():
+    """Recompute the ClaimSummary projection from scratch."""
+    count = rebuild_claim_summaries()
+    click.echo(f"Rebuilt {count} claim summaries.")
+
+@bp.cli.command('roll-claim-summaries')
+def roll_claim_summaries_command():
+    """Demote past-dated Scheduled summaries to Open (the job worker does this daily)."""
+    count = roll_claim_summaries()
+    click.echo(f"Rolled {count} claim summaries back to Open.")
+
+@bp.cli.command('check-claim-summaries')
+@click.option('--fix', is_flag=True, help='Refresh the summaries that differ.')
+def check_claim_summaries_command(fix):
+    """Report ClaimSummary rows that disagree with the raw tables."""
+    mismatches = check_claim_summaries()
+    for claim_id, field, stored, expected in mismatches[:50]:
+        click.echo(f"claim {claim_id}: {field} stored={stored!r} expected={expected!r}")
+    if len(mismatches) > 50:
+        click.echo(f"... and {len(mismatches) - 50} more")
+    if not mismatches:
+        click.echo("Claim summaries are consistent.")
+        return
+    if fix:
+        refresh_claim_summaries({claim_id for claim_id, _, _, _ in mismatches})
+        db.session.commit()
+        click.echo(f"Refreshed {len({m[0] for m in mismatches})} claim summaries.")
+    else:
+        sys.exit(1)
+
+def encode_claim_cursor(summary):
+    date_part = summary.date_reported.strftime('%Y-%m-%d') if summary.date_reported else ''
+    return f"{date_part}.{summary.claim_id}"
+
+def decode_claim_cursor(cursor):
+    """Parses a "YYYY-MM-DD.<id>" cursor; raises ValueError if malformed."""
+    date_part, _, id_part = cursor.partition('.')
+    after_date = datetime.strptime(date_part, '%Y-%m-%d').date() if date_part else None
+    return after_date, int(id_part)
+
+def claim_summary_page(status, after=None, limit=None):
+    """One dashboard section page, newest first, from the ClaimSummary table.
+
+    ``after`` is a (date_reported, claim_id) keyset cursor from the
+    previous page.
+    """
+    query = ClaimSummary.query.filter(ClaimSummary.effective_status == status)
+    if after:
+        after_date, after_id = after
+        if after_date is None:
+            query = query.filter(ClaimSummary.date_reported.is_(None), ClaimSummary.claim_id < after_id)
+        else:
+            query = query.filter(db.or_(
+                ClaimSummary.date_reported < after_date,
+                db.and_(ClaimSummary.date_reported == after_date, ClaimSummary.claim_id < after_id),
+                ClaimSummary.date_reported.is_(None),
+            ))
+    query = query.order_by(ClaimSummary.date_reported.desc(), ClaimSummary.claim_id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+DASHBOARD_SECTIONS = {
+    'open': 'Open',
+    'scheduled': 'Scheduled',
+    'deferred': 'Deferred',
+    'closed': 'Closed',
+}
+
+# --- DASHBOARD FRAGMENT CACHE ---
+# Dashboard HTML is cached per status section and keyed by the 'claims'
+# DataVersion counter. Every claim, work order or closure change goes
+# through commit_claim_changes(), whose summary refresh bumps it. Files
+# live in FRAGMENT_CACHE_FOLDER so all workers share them.
+DASHBOARD_FRAGMENT_TEMPLATES = ('dashboard_section.html', 'claims_table.html')
+_template_versions = {}
+
+def template_version(*names):
+    """Short hash of template sources, so cached HTML expires on deploy."""
+    digest = hashlib.sha256()
+    for name in names:
+        path = os.path.join(current_app.root_path, current_app.template_folder, name)
+        mtime = os.stat(path).st_mtime_ns
+        cached = _template_versions.get(name)
+        if not cached or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                cached = (mtime, hashlib.file_digest(f, 'sha256').hexdigest())
+            _template_versions[name] = cached
+        digest.update(cached[1].encode())
+    return digest.hexdigest()[:12]
+
+def claims_generation():
+    return db.session.query(DataVersion.version).filter_by(name='claims').scalar() or 0
+
+def fragment_cache_path(key):
+    return os.path.join(current_app.config['FRAGMENT_CACHE_FOLDER'], f"{key}.html")
+
+def read_fragment(key):
+    """(next cursor, html) for a cached fragment, or None."""
+    try:
+        with open(fragment_cache_path(key), encoding='utf-8', newline='') as f:
+            return f.readline().rstrip('\n'), f.read()
+    except FileNotFoundError:
+        return None
+
+def write_fragment(key, stale_prefix, next_cursor, html):
+    """Stores a fragment and removes older generations of the same one."""
+    path = fragment_cache_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(next_cursor + '\n')
+        f.write(html)
+    os.replace(tmp_path, path)
+    folder = current_app.config['FRAGMENT_CACHE_FOLDER']
+    for name in os.listdir(folder):
+        if name.startswith(stale_prefix) and name.endswith('.html') and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass
+
+@bp.route('/')
+@login_required
+def index():
+    # The page is a shell: claims arrive through dashboard_section(), which
+    # has its own validators. The shell changes only with its template, the
+    # static files it links and pending flash messages.
+    etag = None
+    if not session.get('_flashes'):
+        seed = f"{current_user.id}|{template_version('dashboard.html')}|{static_version('th_logo.jpg')}"
+        etag = hashlib.sha1(seed.encode()).hexdigest()
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+    response = make_response(render_template('dashboard.html', sections=DASHBOARD_SECTIONS))
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@bp.route('/dashboard/<section>')
+@login_required
+def dashboard_section(section):
+    """One page of a status section, from the fragment cache when possible.
+
+    The ETag is the claims generation plus the template version, so a tab
+    that is re-opened with nothing changed costs one counter read.
+    """
+    status = DASHBOARD_SECTIONS.get(section)
+    if status is None:
+        abort(404)
+    cursor = request.args.get('after')
+    try:
+        after = decode_claim_cursor(cursor) if cursor else None
+    except ValueError:
+        abort(400)
+
+    generation = claims_generation()
+    version = template_version(*DASHBOARD_FRAGMENT_TEMPLATES)
+    etag = f"{section}-{generation}-{version}"
+    if cursor:
+        etag += '-' + hashlib.sha1(cursor.encode()).hexdigest()[:12]
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
+    # Only first pages are cached; later pages are rarely fetched.
+    cached = None
+    key = f"dashboard-{section}-{version}-{generation}"
+    use_cache = current_app.config['FRAGMENT_CACHE_ENABLED'] and after is None
+    if use_cache:
+        cached = read_fragment(key)
+    if cached:
+        next_cursor, html = cached
+    else:
+        next_cursor, html = render_dashboard_section(status, after)
+        if use_cache:
+            write_fragment(key, f"dashboard-{section}-", next_cursor, html)
+    response = make_response(html)
+    response.headers['X-Next-Cursor'] = next_cursor
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def render_dashboard_section(status, after):
+    """Renders one page of a status section; returns (next cursor, html)."""
+    page_size = current_app.config['DASHBOARD_PAGE_SIZE']
+    claims = claim_summary_page(status, after=after, limit=page_size + 1)
+    has_more = len(claims) > page_size
+    claims = claims[:page_size]
+    html = render_claim_summaries(claims, status, rows_only=bool(after))
+    return (encode_claim_cursor(claims[-1]) if has_more else ''), html
+
+def render_claim_summaries(claims, status, rows_only=False):
+    """Renders ClaimSummary rows of one section as the claims table, or just its rows."""
+    claim_assignments = {claim.id: claim.assignment for claim in claims}
+    claim_scheduled_dates = {
+        claim.id: claim.scheduled_date.strftime('%Y-%m-%d') if claim.scheduled_date else ""
+        for claim in claims
+    }
+
+    claim_ids = [claim.id for claim in claims]
+    closures = {}
+    deferrals = {}
+    if claim_ids and status == "Closed":
+        closures = {
+            claim_id: True for (claim_id,) in
+            db.session.query(ClaimClosure.claim_id).filter(ClaimClosure.claim_id.in_(claim_ids)).distinct()
+        }
+    if claim_ids and status == "Deferred":
+        deferrals = {
+            claim_id: True for (claim_id,) in
+            db.session.query(ClaimLog.claim_id)
+            .filter(ClaimLog.claim_id.in_(claim_ids), ClaimLog.action.like('Claim deferred.%'))
+            .distinct()
+        }
+
+    return render_template(
+        'dashboard_section.html',
+        claims=claims,
+        rows_only=rows_only,
+        claim_assignments=claim_assignments,
+        claim_scheduled_dates=claim_scheduled_dates,
+        closures=closures,
+        deferrals=deferrals
+    )
+
+@bp.route('/dashboard/row/<int:claim_id>')
+@login_required
+def dashboard_row(claim_id):
+    """One claim's dashboard row, re-fetched by open dashboards after a change event."""
+    summary = db.session.get(ClaimSummary, claim_id)
+    if summary is None:
+        abort(404)
+    response = make_response(render_claim_summaries([summary], summary.effective_status, rows_only=True))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# --- CHANGE EVENTS ---
+# Write routes append a ChangeEvent per touched claim in their own
+# transaction; each /events stream polls the table by id, so every gunicorn
+# worker sees every change without a broker. Open dashboards and calendars
+# patch themselves from the events instead of reloading.
+CHANGE_EVENT_BATCH_LIMIT = 200
+CHANGE_EVENT_RETENTION = 5000
+CHANGE_EVENT_PRUNE_EVERY = 100
+SECTION_KEYS = {status: key for key, status in DASHBOARD_SECTIONS.items()}
+
+def record_change(kind, claim_id=None, payload=None):
+    """Adds one change event to the current transaction."""
+    db.session.add(ChangeEvent(kind=kind, claim_id=claim_id,
+                               payload=json.dumps(payload) if payload is not None else None))
+
+def record_claim_changes(claim_ids):
+    """Records where each claim now sits on the dashboard and calendar.
+
+    Call after refresh_claim_summaries(); claims without a summary were
+    deleted or archived. Large batches become a single 'reload' event.
+    """
+    claim_ids = sorted(set(claim_ids))
+    if not claim_ids:
+        return
+    if len(claim_ids) > CHANGE_EVENT_BATCH_LIMIT:
+        record_change('reload')
+    else:
+        # One INSERT ... SELECT straight from the just-refreshed summaries.
+        section = db.case(SECTION_KEYS, value=ClaimSummary.effective_status)
+        payload = db.func.json_object(
+            'section', section,
+            'status', ClaimSummary.status,
+            'assignment', ClaimSummary.assignment,
+            'scheduled_date', db.func.coalesce(ClaimSummary.scheduled_date, ''),
+        )
+        recorded = db.session.execute(db.insert(ChangeEvent).from_select(
+            ['kind', 'claim_id', 'payload', 'created_at'],
+            db.select(db.literal('claim'), ClaimSummary.claim_id, payload, db.literal(cst_now()))
+            .where(ClaimSummary.claim_id.in_(claim_ids))
+            .order_by(ClaimSummary.claim_id)
+        )).rowcount
+        if recorded < len(claim_ids):
+            present = {claim_id for (claim_id,) in
+                       db.session.query(ClaimSummary.claim_id).filter(ClaimSummary.claim_id.in_(claim_ids))}
+            for claim_id in claim_ids:
+                if claim_id not in present:
+                    record_change('removed', claim_id)
+    # Pruning is amortised over writes; ids only grow, so it is a primary key
+    # range delete.
+    if random.random() * CHANGE_EVENT_PRUNE_EVERY < len(claim_ids):
+        newest = db.session.query(db.func.max(ChangeEvent.id)).scalar_subquery()
+        ChangeEvent.query.filter(ChangeEvent.id <= newest - CHANGE_EVENT_RETENTION) \
+            .delete(synchronize_session=False)
+
+def latest_change_id():
+    return db.session.query(db.func.max(ChangeEvent.id)).scalar() or 0
+
+def change_events_after(last_id, limit=CHANGE_EVENT_BATCH_LIMIT):
+    return ChangeEvent.query.filter(ChangeEvent.id > last_id).order_by(ChangeEvent.id).limit(limit).all()
+
+def format_sse(data=None, event=None, event_id=None, comment=None):
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if data is not None:
+        lines.extend(f"data: {line}" for line in data.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+def change_event_message(change):
+    payload = json.loads(change.payload) if change.payload else {}
+    if change.claim_id is not None:
+        payload['id'] = change.claim_id
+    return format_sse(json.dumps(payload), change.kind, change.id)
+
+def event_stream(last_id):
+    """Yields SSE messages for changes after ``last_id`` until the stream times out."""
+    config = current_app.config
+    streams = app_state().event_streams
+    if not streams.acquire(blocking=False):
+        # Every stream slot in this process is busy; ask the browser to come back later.
+        yield f"retry: {config['EVENTS_RETRY_MS'] * 5}\n\n"
+        return
+    try:
+        deadline = time.monotonic() + config['EVENTS_STREAM_SECONDS']
+        if last_id is None:
+            last_id = latest_change_id()
+        else:
+            oldest = db.session.query(db.func.min(ChangeEvent.id)).scalar()
+            if oldest is not None and last_id < oldest - 1:
+                # Missed events were pruned; the page has to refetch.
+                yield format_sse('{}', 'reload')
+        yield f"retry: {config['EVENTS_RETRY_MS']}\n" + format_sse(event_id=last_id)
+        heartbeat = time.monotonic() + config['EVENTS_HEARTBEAT_SECONDS']
+        while True:
+            changes = change_events_after(last_id)
+            # Don't hold a connection or a read snapshot between polls.
+            db.session.close()
+            for change in changes:
+                last_id = change.id
+                yield change_event_message(change)
+            now = time.monotonic()
+            if changes:
+                heartbeat = now + config['EVENTS_HEARTBEAT_SECONDS']
+            elif now >= heartbeat:
+                yield format_sse(comment='keepalive')
+                heartbeat = now + config['EVENTS_HEARTBEAT_SECONDS']
+            if now >= deadline:
+                return
+            if len(changes) < CHANGE_EVENT_BATCH_LIMIT:
+                time.sleep(config['EVENTS_POLL_SECONDS'])
+    finally:
+        streams.release()
+
+@bp.route('/events')
+@login_required
+def events():
+    """Server-Sent Events feed of claim changes for open dashboards and calendars."""
+    try:
+        last_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        abort(400)
+    response = current_app.response_class(stream_with_context(event_stream(last_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+RESCHEDULE_BATCH_LIMIT = 500
+
+def parse_reschedule_move(move):
+    """Validates one {workorder_id, new_date, new_time?, version?} move."""
+    if not isinstance(move, dict):
+        raise ValueError("each move must be an object")
+    workorder_id = move.get('workorder_id')
+    try:
+        workorder_id = int(workorder_id)
+    except (TypeError, ValueError):
+        raise ValueError("workorder_id must be an integer")
+    try:
+        new_date = datetime.strptime(str(move.get('new_date'))[:10], "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("new_date must be YYYY-MM-DD")
+    new_time = move.get('new_time')
+    if new_time is not None:
+        try:
+            new_time = datetime.strptime(new_time, "%H:%M").strftime("%H:%M")
+        except (TypeError, ValueError):
+            raise ValueError("new_time must be HH:MM")
+    version = move.get('version')
+    if version is not None and (isinstance(version, bool) or not isinstance(version, int)):
+        raise ValueError("version must be an integer")
+    return workorder_id, new_date, new_time, version
+
+def reschedule_workorders(moves, user, atomic=False, base_url=None):
+    """Applies many work order moves in one transaction.
+
+    Each move is a conditional UPDATE on the work order's version, so a
+    move based on a stale calendar is reported as a conflict instead of
+    overwriting someone else's change. Omitting the version means
+    "whatever is current". The ClaimLog rows for the applied moves are
+    bulk-inserted in the same transaction, together with the notification
+    jobs. With ``atomic`` a single failed move rolls back all of them.
+
+    Returns one result dict per move, in order.
+    """
+    results = []
+    parsed = {}
+    for index, move in enumerate(moves):
+        try:
+            workorder_id, new_date, new_time, version = parse_reschedule_move(move)
+            if workorder_id in parsed:
+                raise ValueError("work order appears more than once in this batch")
+            parsed[workorder_id] = (index, new_date, new_time, version)
+            results.append({'workorder_id': workorder_id, 'status': 'pending'})
+        except ValueError as e:
+            results.append({'workorder_id': move.get('workorder_id') if isinstance(move, dict) else None,
+                            'status': 'invalid', 'message': str(e)})
+
+    current = {
+        row.id: row for row in db.session.query(
+            WorkOrder.id, WorkOrder.claim_id, WorkOrder.scheduled_date,
+            WorkOrder.scheduled_time, WorkOrder.version,
+        ).filter(WorkOrder.id.in_(list(parsed)))
+    } if parsed else {}
+
+    table = WorkOrder.__table__
+    now = cst_now()
+    logs = []
+    claim_ids = set()
+    for workorder_id, (index, new_date, new_time, version) in parsed.items():
+        row = current.get(workorder_id)
+        if row is None:
+            results[index].update(status='not_found', message="Work order not found.")
+            continue
+        expected = row.version if version is None else version
+        values = {'scheduled_date': new_date, 'version': expected + 1, 'updated_at': now}
+        if new_time is not None:
+            values['scheduled_time'] = new_time
+        updated = db.session.execute(
+            table.update()
+            .where(table.c.id == workorder_id, table.c.version == expected)
+            .values(**values)
+        ).rowcount
+        if not updated:
+            results[index].update(status='conflict', version=row.version,
+                                  message="Work order was changed by someone else; reload the calendar.")
+            continue
+        old = f"{row.scheduled_date} {row.scheduled_time or ''}".strip()
+        new = f"{new_date} {new_time or row.scheduled_time or ''}".strip()
+        logs.append({
+            'claim_id': row.claim_id,
+            'user_id': user.id,
+            'timestamp': now,
+            'action': f"Work order rescheduled from {old} to {new} by {user.name}.",
+        })
+        claim_ids.add(row.claim_id)
+        results[index].update(status='ok', version=expected + 1)
+        if notifications_enabled() and (new_time or row.scheduled_time):
+            enqueue_job('workorder_notify', {
+                'workorder_id': workorder_id,
+                'reason': 'rescheduled',
+                'base_url': base_url,
+            }, claim_id=row.claim_id)
+
+    failed = any(result['status'] != 'ok' for result in results)
+    if atomic and failed:
+        db.session.rollback()
+        for result in results:
+            if result['status'] == 'ok':
+                result.update(status='not_applied', message="Batch rolled back.")
+                result.pop('version')
+        return results
+    if logs:
+        db.session.execute(ClaimLog.__table__.insert(), logs)
+    commit_claim_changes(claim_ids)
+    return results
+
+@bp.route('/api/workorders/reschedule', methods=['POST'])
+@login_required
+@write_transaction()
+def reschedule_workorders_api():
+    data = request.get_json(silent=True) or {}
+    moves = data.get('moves')
+    if not isinstance(moves, list) or not moves:
+        return jsonify({"success": False, "message": "moves must be a non-empty list"}), 400
+    if len(moves) > RESCHEDULE_BATCH_LIMIT:
+        return jsonify({"success": False, "message": f"at most {RESCHEDULE_BATCH_LIMIT} moves per request"}), 400
+    results = reschedule_workorders(moves, current_user, atomic=bool(data.get('atomic')),
+                                    base_url=request.host_url)
+    return jsonify({
+        "success": all(result['status'] == 'ok' for result in results),
+        "applied": sum(result['status'] == 'ok' for result in results),
+        "results": results,
+    })
+
+@bp.route('/api/update_workorder_date', methods=['POST'])
+@login_required
+@write_transaction()
+def update_workorder_date():
+    data = request.get_json(silent=True) or {}
+    result, = reschedule_workorders([data], current_user, base_url=request.host_url)
+    if result['status'] == 'ok':
+        return jsonify({"success": True, "version": result['version']})
+    code = {'invalid': 400, 'not_found': 404, 'conflict': 409}[result['status']]
+    return jsonify({"success": False, "message": result['message'], "version": result.get('version')}), code
+
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        user = User.query.filter_by(email=request.form['email'].lower()).first()
+        if user and check_password_hash(user.password, request.form['password']):
+            sign_in(user)
+            return redirect(url_for('main.index'))
+        else:
+            flash('Invalid credentials')
+    return render_template('login.html')
+
+@bp.route('/register', methods=['GET', 'POST'])
+@write_transaction()
+def register():
+    if request.method == 'POST':
+        email = request.form['email'].lower()
+        name = request.form['name']
+        password = request.form['password']
+        if User.query.filter_by(email=email).first():
+            flash('Email already registered. Please log in.')
+            return redirect(url_for('main.login'))
+        hashed = generate_password_hash(password)
+        user = User(email=email, name=name, password=hashed)
+        db.session.add(user)
+        db.session.commit()
+        invalidate_user(user.id)
+        flash('Registration successful! Please log in.')
+        return redirect(url_for('main.login'))
+    return render_template('register.html')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    sign_out()
+    return redirect(url_for('main.login'))
+
+@bp.route('/add_vendor', methods=['GET', 'POST'])
+@login_required
+@write_transaction()
+def add_vendor():
+    if request.method == 'POST':
+        name = request.form['name']
+        contact_number = request.form['contact_number']
+        email = request.form['email']
+        vendor = Vendor(name=name, contact_number=contact_number, email=email)
+        db.session.add(vendor)
+        db.session.commit()
+        flash('Vendor added!')
+        return redirect(url_for('main.vendors'))
+    return render_template('add_vendor.html')
+
+@bp.route('/vendors')
+@login_required
+def vendors():
+    vendors = reference_data().vendors
+    feed_urls = {
+        vendor.id: url_for('main.calendar_feed', kind='vendor', person_id=vendor.id,
+                           token=feed_token('vendor', vendor.id), _external=True)
+        for vendor in vendors
+    }
+    return render_template('vendors.html', vendors=vendors, feed_urls=feed_urls)
+
+@bp.route('/add_assignee', methods=['GET', 'POST'])
+@login_required
+@write_transaction()
+def add_assignee():
+    if request.method == 'POST':
+        name = request.form['name']
+        contact_number = request.form['contact_number']
+        email = request.form['email']
+        assignee = Assignee(name=name, contact_number=contact_number, email=email)
+        db.session.add(assignee)
+        db.session.commit()
+        flash('Assignee added!')
+        return redirect(url_for('main.assignees'))
+    return render_template('add_assignee.html')
+
+@bp.route('/assignees')
+@login_required
+def assignees():
+    assignees = reference_data().assignees
+    feed_urls = {
+        assignee.id: url_for('main.calendar_feed', kind='assignee', person_id=assignee.id,
+                             token=feed_token('assignee', assignee.id), _external=True)
+        for assignee in assignees
+    }
+    return render_template('assignees.html', assignees=assignees, feed_urls=feed_urls)
+
+@bp.route('/add_claim', methods=['GET', 'POST'])
+@login_required
+@write_transaction(retries=0)
+def add_claim():
+    if request.method == 'POST':
+        try:
+            address = request.form['address']
+            homeowner_name = request.form['homeowner_name']
+            homeowner_email = request.form['homeowner_email']
+            homeowner_phone = request.form['homeowner_phone']
+            cobuyer_name = request.form['cobuyer_name']
+            cobuyer_email = request.form['cobuyer_email']
+            cobuyer_phone = request.form['cobuyer_phone']
+            warranty_type = request.form['warranty_type']
+            issue_description = request.form['issue_description']
+
+            claim = Claim(
+                address=address,
+                homeowner_name=homeowner_name,
+                homeowner_email=homeowner_email,
+                homeowner_phone=homeowner_phone,
+                cobuyer_name=cobuyer_name,
+                cobuyer_email=cobuyer_email,
+                cobuyer_phone=cobuyer_phone,
+                warranty_type=warranty_type,
+                issue_description=issue_description
+            )
+            db.session.add(claim)
+            db.session.flush()  # for claim.id; the claim commits with its photos
+
+            files = request.files.getlist('photos')
+            for file in files:
+                if file and file.filename:
+                    blob = store_photo(file.stream, file.filename)
+                    db.session.add(ClaimPhoto(claim_id=claim.id, filename=blob.filename, content_hash=blob.sha256))
+            # Photos sent ahead through /api/uploads
+            for upload_id in request.form.getlist('upload_id'):
+                upload = db.session.get(PhotoUpload, upload_id)
+                if upload is not None and upload.user_id == current_user.id:
+                    attach_upload(upload, claim.id)
+            commit_claim_changes([claim.id])
+
+            flash('Claim added!')
+            return redirect(url_for('main.index'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error adding claim: {e}")
+    return render_template('add_claim.html')
+
+@bp.route('/view_claim/<int:claim_id>', methods=['GET', 'POST'])
+@login_required
+@write_transaction()
 def view_claim(claim_id):
-    claim = Claim.query.get_or_404(claim_id)
-    vendors = Vendor.query.all()
-    assignees = Assignee.query.all()
-    workorders = WorkOrder.query.filter_by(claim_id=claim.id).order_by(WorkOrder.id.desc()).all()
-    latest_workorder = workorders[0] if workorders else None
+    claim = db.session.get(Claim, claim_id)
+    if claim is None:
+        return view_archived_claim(claim_id)
+    ref = reference_data()
+    latest_workorder = latest_workorder_query(claim.id).first()
+    jobs = Job.query.filter_by(claim_id=claim.id).order_by(Job.id.desc()).limit(10).all()
 
     if request.method == 'POST':
         vendor_id = request.form['vendor']
@@ -389,25 +2171,33 @@ def view_claim(claim_id):
         )
         db.session.add(workorder)
         claim.status = 'Scheduled'
-        db.session.commit()
+        commit_claim_changes([claim.id])
         flash('Workorder updated and claim scheduled!')
-        return redirect(url_for('view_claim', claim_id=claim.id))
+        return redirect(url_for('main.view_claim', claim_id=claim.id))
 
-    return render_template('view_claim.html', claim=claim, vendors=vendors, assignees=assignees, latest_workorder=latest_workorder)
+    return render_template('view_claim.html', claim=claim, vendors=ref.vendors, assignees=ref.assignees,
+                           latest_workorder=latest_workorder, jobs=jobs,
+                           vendor_by_id=ref.vendor_by_id, assignee_by_id=ref.assignee_by_id)
+
+def view_archived_claim(claim_id):
+    """Read-only view of an archived claim; 404 if it was never there."""
+    claim = ArchivedClaim.query.get_or_404(claim_id)
+    if request.method == 'POST':
+        flash(f'Claim #{claim_id} is archived. Run "flask restore-claim {claim_id}" to change it.')
+        return redirect(url_for('main.view_claim', claim_id=claim_id))
+    ref = reference_data()
+    latest_workorder = claim.workorders[-1] if claim.workorders else None
+    jobs = Job.query.filter_by(claim_id=claim.id).order_by(Job.id.desc()).limit(10).all()
+    return render_template('view_claim.html', claim=claim, archived=True, vendors=ref.vendors,
+                           assignees=ref.assignees, latest_workorder=latest_workorder, jobs=jobs,
+                           vendor_by_id=ref.vendor_by_id, assignee_by_id=ref.assignee_by_id)
 
-@app.route('/assign_workorder/<int:claim_id>', methods=['GET', 'POST'])
+@bp.route('/assign_workorder/<int:claim_id>', methods=['GET', 'POST'])
 @login_required
+@write_transaction()
 def assign_workorder(claim_id):
-    import pytz
-    from ics import Calendar, Event
-    import platform
-    import subprocess
-    from flask import url_for
-    from datetime import datetime
-
     claim = Claim.query.get_or_404(claim_id)
-    vendors = Vendor.query.all()
-    assignees = Assignee.query.all()
+    ref = reference_data()
 
     if request.method == 'POST':
         vendor_id = request.form['vendor']
@@ -420,8 +2210,9 @@ def assign_workorder(claim_id):
         vendor_id = int(vendor_id) if vendor_id else None
         assignee_id = int(assignee_id) if assignee_id else None
 
-        vendor = Vendor.query.get(vendor_id) if vendor_id else None
-        assignee = Assignee.query.get(assignee_id) if assignee_id else None
+        vendor = ref.vendor_by_id.get(vendor_id)
+        assignee = ref.assignee_by_id.get(assignee_id)
+        first_assignment = WorkOrder.query.filter_by(claim_id=claim_id).count() == 0
 
         # Save WorkOrder
         workorder = WorkOrder(
@@ -435,12 +2226,9 @@ def assign_workorder(claim_id):
         )
         db.session.add(workorder)
         claim.status = 'Scheduled'
-        db.session.commit()
-        flash('Work order assigned and claim set to Scheduled!')
 
         # --- LOG IF FIRST ASSIGNMENT ---
-        existing_wos = WorkOrder.query.filter_by(claim_id=claim_id).count()
-        if existing_wos == 1:
+        if first_assignment:
             parts = []
             if assignee:
                 parts.append(f"Assignee: {assignee.name}")
@@ -457,141 +2245,322 @@ def assign_workorder(claim_id):
                 user_id=current_user.id,
                 action=f"Claim first assigned to {assignment_text} by {current_user.name}{sched_str}"
             ))
-            db.session.commit()
 
-        # --- Prepare blocks for the event description ---
-        client_info = (
-            "CLIENT CONTACT INFORMATION\n"
-            "-------------------------\n"
-            f"Name: {claim.homeowner_name or 'N/A'}\n"
-            f"Email: {claim.homeowner_email or 'N/A'}\n"
-            f"Phone: {claim.homeowner_phone or 'N/A'}\n"
-            f"Cobuyer Name: {claim.cobuyer_name or 'N/A'}\n"
-            f"Cobuyer Email: {claim.cobuyer_email or 'N/A'}\n"
-            f"Cobuyer Phone: {claim.cobuyer_phone or 'N/A'}\n"
-        )
+        # The calendar invite is built by the job worker after this commit.
+        if scheduled_date and scheduled_time:
+            db.session.flush()
+            enqueue_job('workorder_ics', {
+                'workorder_id': workorder.id,
+                'base_url': request.host_url,
+            }, claim_id=claim_id)
+            enqueue_workorder_notification(workorder, 'assigned', request.host_url)
+        commit_claim_changes([claim_id])
+        flash('Work order assigned and claim set to Scheduled!')
+        if not (scheduled_date and scheduled_time):
+            flash("No calendar invite created: a scheduled date and time are required.", 'warning')
 
-        trade_info = (
-            "TRADE OR VENDOR ASSIGNED TO WORK ORDER\n"
-            "--------------------------------------\n"
-            f"Vendor: {vendor.name if vendor else 'N/A'}\n"
-            f"Vendor Email: {vendor.email if vendor else 'N/A'}\n"
-            f"Vendor Phone: {vendor.contact_number if vendor else 'N/A'}\n"
-            f"Assignee: {assignee.name if assignee else 'N/A'}\n"
-            f"Assignee Email: {assignee.email if assignee else 'N/A'}\n"
-            f"Assignee Phone: {assignee.contact_number if assignee else 'N/A'}\n"
-        )
+        return redirect(url_for('main.index'))
 
-        # Photo links
-        photo_links = []
-        if hasattr(claim, "photos"):
-            for photo in claim.photos:
-                url = url_for('uploaded_file', filename=photo.filename, _external=True)
-                photo_links.append(f"{photo.filename}: {url}")
-        photos_section = "Photos:\n" + ("\n".join(photo_links) if photo_links else "None attached")
-
-        claim_details = (
-            "CLAIM DETAILS\n"
-            "-------------\n"
-            f"Address: {claim.address}\n"
-            f"Warranty Type: {claim.warranty_type}\n"
-            f"Issue: {claim.issue_description}\n"
-            f"Notes: {notes or 'N/A'}\n"
-            f"{photos_section}"
-        )
+    return render_template('assign_workorder.html', claim=claim, vendors=ref.vendors, assignees=ref.assignees)
 
-        # Final event description, visually separated into sections
-        description = (
-            "==============================\n"
-            f"{client_info}"
-            "==============================\n"
-            f"{trade_info}"
-            "==============================\n"
-            f"{claim_details}"
-        )
+def build_workorder_ics(workorder):
+    """Returns the .ics invite text for a work order.
+
+    Needs a request context (real or test) for the external photo links.
+    """
+    claim = workorder.claim
+    vendor = workorder.vendor
+    assignee = workorder.assignee
+    scheduled_date = workorder.scheduled_date.strftime('%Y-%m-%d')
+    scheduled_time = workorder.scheduled_time
+    notes = workorder.notes
+
+    # --- Prepare blocks for the event description ---
+    client_info = (
+        "CLIENT CONTACT INFORMATION\n"
+        "-------------------------\n"
+        f"Name: {claim.homeowner_name or 'N/A'}\n"
+        f"Email: {claim.homeowner_email or 'N/A'}\n"
+        f"Phone: {claim.homeowner_phone or 'N/A'}\n"
+        f"Cobuyer Name: {claim.cobuyer_name or 'N/A'}\n"
+        f"Cobuyer Email: {claim.cobuyer_email or 'N/A'}\n"
+        f"Cobuyer Phone: {claim.cobuyer_phone or 'N/A'}\n"
+    )
+
+    trade_info = (
+        "TRADE OR VENDOR ASSIGNED TO WORK ORDER\n"
+        "--------------------------------------\n"
+        f"Vendor: {vendor.name if vendor else 'N/A'}\n"
+        f"Vendor Email: {vendor.email if vendor else 'N/A'}\n"
+        f"Vendor Phone: {vendor.contact_number if vendor else 'N/A'}\n"
+        f"Assignee: {assignee.name if assignee else 'N/A'}\n"
+        f"Assignee Email: {assignee.email if assignee else 'N/A'}\n"
+        f"Assignee Phone: {assignee.contact_number if assignee else 'N/A'}\n"
+    )
+
+    # Photo links
+    photo_links = []
+    for photo in claim.photos:
+        url = url_for('main.uploaded_file', filename=photo.filename, _external=True)
+        photo_links.append(f"{photo.filename}: {url}")
+    photos_section = "Photos:\n" + ("\n".join(photo_links) if photo_links else "None attached")
+
+    claim_details = (
+        "CLAIM DETAILS\n"
+        "-------------\n"
+        f"Address: {claim.address}\n"
+        f"Warranty Type: {claim.warranty_type}\n"
+        f"Issue: {claim.issue_description}\n"
+        f"Notes: {notes or 'N/A'}\n"
+        f"{photos_section}"
+    )
+
+    # Final event description, visually separated into sections
+    description = (
+        "==============================\n"
+        f"{client_info}"
+        "==============================\n"
+        f"{trade_info}"
+        "==============================\n"
+        f"{claim_details}"
+    )
+
+    # Generate .ics calendar invite with CST timezone and real invitees
+    central = pytz.timezone('America/Chicago')
+    event_start_naive = datetime.strptime(f"{scheduled_date} {scheduled_time}", "%Y-%m-%d %H:%M")
+    event_start = central.localize(event_start_naive)
+    event_end = event_start + timedelta(hours=1)
 
-        # Generate .ics calendar invite with CST timezone and real invitees
+    from ics import Calendar, Event
+    cal = Calendar()
+    event = Event()
+    event.name = f"Work Order for {claim.address}"
+    event.begin = event_start
+    event.end = event_end
+    event.description = description
+    cal.events.add(event)
+
+    # --- Manual Attendee Injection ---
+    ics_content = str(cal)
+    attendee_lines = []
+    if assignee and assignee.email:
+        attendee_lines.append(f"ATTENDEE;CN={assignee.name}:mailto:{assignee.email}")
+    if vendor and vendor.email:
+        attendee_lines.append(f"ATTENDEE;CN={vendor.name}:mailto:{vendor.email}")
+
+    # Insert attendee lines after DTSTART
+    if attendee_lines:
+        lines = ics_content.splitlines()
+        new_lines = []
+        inserted = False
+        for line in lines:
+            new_lines.append(line)
+            if not inserted and line.startswith('DTSTART'):
+                new_lines.extend(attendee_lines)
+                inserted = True
+        ics_content = "\r\n".join(new_lines) + "\r\n"
+    return ics_content
+
+@job_handler('workorder_ics')
+def workorder_ics_job(payload):
+    """Writes static/ics/workorder_claim_<claim id>.ics for a work order."""
+    workorder = WorkOrder.query.get(payload['workorder_id'])
+    if workorder is None:
+        return "Work order no longer exists."
+    with current_app.test_request_context(base_url=payload.get('base_url')):
+        ics_content = build_workorder_ics(workorder)
+    ics_path = os.path.join(current_app.config['ICS_FOLDER'], f"workorder_claim_{workorder.claim_id}.ics")
+    tmp_path = ics_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(ics_content)
+    os.replace(tmp_path, ics_path)
+    return os.path.basename(ics_path)
+
+# --- WORK ORDER NOTIFICATIONS ---
+class Mailer:
+    """A reusable SMTP session for one worker process.
+
+    Consecutive email jobs share one connection until it sits idle for
+    MAIL_IDLE_SECONDS or has sent MAIL_MAX_PER_CONNECTION messages.
+    """
+    def __init__(self):
+        self.smtp = None
+        self.sent = 0
+        self.last_used = 0.0
+
+    def connect(self):
+        import smtplib
+        config = current_app.config
+        smtp = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=config['MAIL_TIMEOUT'])
+        if config['MAIL_USE_TLS']:
+            smtp.starttls()
+        if config['MAIL_USERNAME']:
+            smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        self.smtp = smtp
+        self.sent = 0
+
+    def send(self, message):
+        import smtplib
+        if self.smtp is not None and (
+                self.sent >= current_app.config['MAIL_MAX_PER_CONNECTION']
+                or time.monotonic() - self.last_used > current_app.config['MAIL_IDLE_SECONDS']):
+            self.close()
+        if self.smtp is None:
+            self.connect()
         try:
-            central = pytz.timezone('America/Chicago')
-            event_start_naive = datetime.strptime(f"{scheduled_date} {scheduled_time}", "%Y-%m-%d %H:%M")
-            event_start = central.localize(event_start_naive)
-            event_end = event_start + timedelta(hours=1)
-
-            cal = Calendar()
-            event = Event()
-            event.name = f"Work Order for {claim.address}"
-            event.begin = event_start
-            event.end = event_end
-            event.description = description
-            cal.events.add(event)
-
-            # --- Manual Attendee Injection ---
-            ics_content = str(cal)
-            attendee_lines = []
-            if assignee and assignee.email:
-                attendee_lines.append(f"ATTENDEE;CN={assignee.name}:mailto:{assignee.email}")
-            if vendor and vendor.email:
-                attendee_lines.append(f"ATTENDEE;CN={vendor.name}:mailto:{vendor.email}")
-
-            # Insert attendee lines after DTSTART
-            if attendee_lines:
-                lines = ics_content.splitlines()
-                new_lines = []
-                inserted = False
-                for line in lines:
-                    new_lines.append(line)
-                    if not inserted and line.startswith('DTSTART'):
-                        new_lines.extend(attendee_lines)
-                        inserted = True
-                ics_content = "\r\n".join(new_lines) + "\r\n"
-
-            # Save the .ics file
-            ics_folder = os.path.join('static', 'ics')
-            os.makedirs(ics_folder, exist_ok=True)
-            ics_path = os.path.join(ics_folder, f"workorder_claim_{claim_id}.ics")
-            with open(ics_path, 'w', encoding='utf-8') as f:
-                f.write(ics_content)
-
-            # Try to auto-open the .ics file
-            abs_path = os.path.abspath(ics_path)
-            if platform.system() == 'Windows':
-                os.startfile(abs_path)
-            elif platform.system() == 'Darwin':  # macOS
-                subprocess.call(('open', abs_path))
-            else:  # Linux
-                subprocess.call(('xdg-open', abs_path))
+            self.smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped a pooled session; one fresh attempt, then let the job retry.
+            self.close()
+            self.connect()
+            self.smtp.send_message(message)
+        self.sent += 1
+        self.last_used = time.monotonic()
 
-        except Exception as e:
-            flash(f"Failed to generate calendar invite: {e}", 'warning')
+    def close_if_idle(self):
+        if self.smtp is not None and time.monotonic() - self.last_used > current_app.config['MAIL_IDLE_SECONDS']:
+            self.close()
+
+    def close(self):
+        import smtplib
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self.smtp = None
+
+def notifications_enabled():
+    return bool(current_app.config['MAIL_SERVER'])
+
+def enqueue_workorder_notification(workorder, reason, base_url):
+    """Queues the emails for a new or moved work order, if mail is configured.
+
+    Only one job row is written on the request path. The worker fans it
+    out into one email job per recipient.
+    """
+    if not notifications_enabled() or not (workorder.scheduled_date and workorder.scheduled_time):
+        return None
+    return enqueue_job('workorder_notify', {
+        'workorder_id': workorder.id,
+        'reason': reason,
+        'base_url': base_url,
+    }, claim_id=workorder.claim_id)
+
+def workorder_recipients(workorder):
+    """(role, address) pairs for a work order, one per distinct address."""
+    candidates = [
+        ('vendor', workorder.vendor.email if workorder.vendor else None),
+        ('assignee', workorder.assignee.email if workorder.assignee else None),
+    ]
+    if current_app.config['NOTIFY_HOMEOWNER']:
+        candidates.append(('homeowner', workorder.claim.homeowner_email))
+    recipients = {}
+    for role, address in candidates:
+        address = (address or '').strip()
+        if '@' in address and address.lower() not in recipients:
+            recipients[address.lower()] = (role, address)
+    return list(recipients.values())
+
+@job_handler('workorder_notify')
+def workorder_notify_job(payload):
+    """Splits a work order notification into one email job per recipient."""
+    workorder = db.session.get(WorkOrder, payload['workorder_id'])
+    if workorder is None:
+        return "Work order no longer exists."
+    recipients = workorder_recipients(workorder)
+    for role, address in recipients:
+        enqueue_job('workorder_email', dict(payload, to=address, role=role), claim_id=workorder.claim_id)
+    db.session.commit()
+    return f"{len(recipients)} recipient(s)"
+
+def build_workorder_email(workorder, to, role, reason, ics_text, pdf_bytes):
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.utils import formatdate, make_msgid
+    claim = workorder.claim
+    when = f"{workorder.scheduled_date} {workorder.scheduled_time}"
+    verb = 'rescheduled' if reason == 'rescheduled' else 'scheduled'
+    message = MIMEMultipart()
+    message['Subject'] = f"Work order {verb}: Claim #{claim.id} - {claim.address} on {when}"
+    message['From'] = current_app.config['MAIL_FROM']
+    message['To'] = to
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid(domain=current_app.config['FEED_UID_DOMAIN'])
+    greeting = "Your warranty appointment" if role == 'homeowner' else "A warranty work order"
+    message.attach(MIMEText(
+        f"{greeting} at {claim.address} has been {verb} for {when}.\n\n"
+        f"The calendar invite and work order are attached.\n\n"
+        f"Thomsen Homes Warranty\n", 'plain', 'utf-8'))
+    invite = MIMEText(ics_text, 'calendar', 'utf-8')
+    invite.add_header('Content-Disposition', 'attachment', filename=f"workorder_claim_{claim.id}.ics")
+    message.attach(invite)
+    if role != 'homeowner':
+        pdf = MIMEApplication(pdf_bytes, 'pdf')
+        pdf.add_header('Content-Disposition', 'attachment', filename=f"workorder_{workorder.id}.pdf")
+        message.attach(pdf)
+    return message
 
-        return redirect(url_for('index'))
+@job_handler('workorder_email')
+def workorder_email_job(payload):
+    """Sends one recipient the invite (and, for trades, the work order PDF)."""
+    workorder = db.session.get(WorkOrder, payload['workorder_id'])
+    if workorder is None:
+        return "Work order no longer exists."
+    with current_app.test_request_context(base_url=payload.get('base_url')):
+        ics_text = build_workorder_ics(workorder)
+    pdf_bytes = None
+    if payload['role'] != 'homeowner':
+        _, pdf_bytes = cached_workorder_pdf(
+            [workorder_pdf_lines(workorder.claim, workorder, workorder.vendor, workorder.assignee)])
+    app_state().mailer.send(build_workorder_email(
+        workorder, payload['to'], payload['role'], payload['reason'], ics_text, pdf_bytes))
+    return f"Sent to {payload['to']}"
 
-    return render_template('assign_workorder.html', claim=claim, vendors=vendors, assignees=assignees)
+@bp.cli.command('send-test-email')
+@click.argument('to')
+def send_test_email_command(to):
+    """Send a plain message through the configured SMTP server."""
+    if not notifications_enabled():
+        click.echo("MAIL_SERVER is not set.")
+        sys.exit(1)
+    from email.mime.text import MIMEText
+    message = MIMEText("Test message from the warranty app.\n", 'plain', 'utf-8')
+    message['Subject'] = "Warranty app test email"
+    message['From'] = current_app.config['MAIL_FROM']
+    message['To'] = to
+    mailer = app_state().mailer
+    mailer.send(message)
+    mailer.close()
+    click.echo(f"Sent to {to}.")
 
 
-@app.route('/update_claim_status/<int:claim_id>', methods=['POST'])
+@bp.route('/update_claim_status/<int:claim_id>', methods=['POST'])
 @login_required
+@write_transaction()
 def update_claim_status(claim_id):
     claim = Claim.query.get_or_404(claim_id)
     old_status = claim.status
     new_status = request.form.get('status')
     if new_status != old_status:
         if new_status == "Deferred":
-            return redirect(url_for('defer_claim', claim_id=claim_id))
+            return redirect(url_for('main.defer_claim', claim_id=claim_id))
         if new_status == "Closed":
-            return redirect(url_for('close_claim', claim_id=claim_id))
+            return redirect(url_for('main.close_claim', claim_id=claim_id))
         claim.status = new_status
         db.session.add(ClaimLog(
             claim_id=claim.id,
             user_id=current_user.id,
             action=f"Status changed from {old_status} to {new_status}"
         ))
-        db.session.commit()
+        commit_claim_changes([claim.id])
         flash('Claim status updated and action logged.')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/defer_claim/<int:claim_id>', methods=['GET', 'POST'])
+@bp.route('/defer_claim/<int:claim_id>', methods=['GET', 'POST'])
 @login_required
+@write_transaction()
 def defer_claim(claim_id):
     claim = Claim.query.get_or_404(claim_id)
     if request.method == 'POST':
@@ -602,85 +2571,357 @@ def defer_claim(claim_id):
             user_id=current_user.id,
             action=f"Claim deferred. Notes: {notes or '(none)'}"
         ))
-        db.session.commit()
+        commit_claim_changes([claim.id])
         flash('Claim deferred.')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     return render_template('defer_claim.html', claim=claim)
 
-@app.route('/delete_claim/<int:claim_id>', methods=['POST'])
+CLOSURE_REASONS = [
+    "Repair completed",
+    "Not covered by warranty",
+    "Homeowner maintenance item",
+    "Duplicate claim",
+    "Withdrawn by homeowner",
+]
+
+@bp.route('/close_claim/<int:claim_id>', methods=['GET', 'POST'])
+@login_required
+@write_transaction()
+def close_claim(claim_id):
+    claim = Claim.query.get_or_404(claim_id)
+    closure = ClaimClosure.query.filter_by(claim_id=claim_id).order_by(ClaimClosure.id.desc()).first()
+    if request.method == 'POST':
+        reasons = ', '.join(request.form.getlist('reasons'))
+        notes = request.form.get('notes')
+        if closure:
+            closure.reasons = reasons
+            closure.notes = notes
+        else:
+            db.session.add(ClaimClosure(claim_id=claim.id, reasons=reasons, notes=notes))
+        claim.status = "Closed"
+        db.session.add(ClaimLog(
+            claim_id=claim.id,
+            user_id=current_user.id,
+            action=f"Claim closed. Reasons: {reasons or '(none)'}"
+        ))
+        commit_claim_changes([claim.id])
+        flash('Claim closed.')
+        return redirect(url_for('main.index'))
+    checked = closure.reasons.split(', ') if closure and closure.reasons else []
+    return render_template('close_claim.html', claim=claim, closure=closure,
+                           reasons_list=CLOSURE_REASONS, checked=checked)
+
+@bp.route('/delete_claim/<int:claim_id>', methods=['POST'])
 @login_required
+@write_transaction()
 def delete_claim(claim_id):
     claim = Claim.query.get_or_404(claim_id)
+    feed_owners = feed_owners_for_claims([claim_id])
     WorkOrder.query.filter_by(claim_id=claim_id).delete()
     ClaimLog.query.filter_by(claim_id=claim_id).delete()
-    for photo in claim.photos:
-        try:
-            os.remove(os.path.join(app.config['UPLOAD_FOLDER'], photo.filename))
-        except Exception:
-            pass
+    legacy_files = [photo.filename for photo in claim.photos if not photo.content_hash]
+    unreferenced = release_photos([photo.content_hash for photo in claim.photos if photo.content_hash])
     ClaimPhoto.query.filter_by(claim_id=claim_id).delete()
+    Job.query.filter_by(claim_id=claim_id).delete()
     db.session.delete(claim)
-    db.session.commit()
+    commit_claim_changes([claim_id], feed_owners)
+    remove_upload_files(legacy_files)
+    remove_photo_blob_files(unreferenced)
     flash('Claim deleted successfully.')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 
-@app.route('/claim_log/<int:claim_id>')
-@login_required
-def view_claim_log(claim_id):
-    logs = ClaimLog.query.filter_by(claim_id=claim_id).order_by(ClaimLog.timestamp.desc()).all()
-    return render_template('claim_log.html', logs=logs, claim_id=claim_id)
+def latest_workorder_query(claim_id):
+    return WorkOrder.query.filter_by(claim_id=claim_id).order_by(WorkOrder.id.desc())
 
-@app.route('/static/uploads/<filename>')
-def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+def claim_log_query(claim_id, model=ClaimLog, after=None):
+    """A claim's log, newest first, with each entry's user joined in.
 
-@app.route('/calendar')
-@login_required
-def calendar_view():
-    now = datetime.now()
-    year = int(request.args.get('year', now.year))
-    month = int(request.args.get('month', now.month))
+    ``after`` is a (timestamp, id) keyset cursor from the previous page, so
+    every page is an index range scan however long the log is.
+    """
+    query = model.query.filter_by(claim_id=claim_id).options(db.joinedload(model.user))
+    if after:
+        after_stamp, after_id = after
+        if after_stamp is None:
+            query = query.filter(model.timestamp.is_(None), model.id < after_id)
+        else:
+            query = query.filter(db.or_(
+                db.tuple_(model.timestamp, model.id) < (after_stamp, after_id),
+                model.timestamp.is_(None),
+            ))
+    return query.order_by(model.timestamp.desc(), model.id.desc())
 
-    start_date = datetime(year, month, 1).date()
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1).date()
-    else:
-        end_date = datetime(year, month + 1, 1).date()
+def encode_log_cursor(log):
+    stamp = log.timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f') if log.timestamp else ''
+    return f"{stamp}.{log.id}"
 
-    workorders = (
-        WorkOrder.query
+def decode_log_cursor(cursor):
+    """Parses a "YYYY-MM-DDTHH:MM:SS.ffffff.<id>" cursor; raises ValueError if malformed."""
+    stamp, _, id_part = cursor.rpartition('.')
+    after_stamp = datetime.strptime(stamp, '%Y-%m-%dT%H:%M:%S.%f') if stamp else None
+    return after_stamp, int(id_part)
+
+def claim_log_page(claim_id, model=ClaimLog, after=None, limit=None):
+    """One page of a claim's log; returns (entries, next cursor or '')."""
+    limit = limit or current_app.config['CLAIM_LOG_PAGE_SIZE']
+    logs = claim_log_query(claim_id, model, after).limit(limit + 1).all()
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    return logs, (encode_log_cursor(logs[-1]) if has_more else '')
+
+def calendar_events_query(start_date, end_date):
+    """Latest scheduled work order per open claim within a date range.
+
+    Returns (workorder id, claim id, date, address, vendor name, assignee
+    name, version) rows, with the per-claim pick done by row_number() in SQL.
+    """
+    ranked = (
+        db.session.query(
+            WorkOrder.id.label('workorder_id'),
+            WorkOrder.claim_id.label('claim_id'),
+            WorkOrder.scheduled_date.label('scheduled_date'),
+            WorkOrder.version.label('version'),
+            WorkOrder.vendor_id.label('vendor_id'),
+            WorkOrder.assignee_id.label('assignee_id'),
+            Claim.address.label('address'),
+            db.func.row_number().over(
+                partition_by=WorkOrder.claim_id,
+                order_by=(WorkOrder.scheduled_date.desc(), WorkOrder.id),
+            ).label('rank'),
+        )
         .join(Claim, WorkOrder.claim_id == Claim.id)
         .filter(
             WorkOrder.scheduled_date >= start_date,
             WorkOrder.scheduled_date < end_date,
             Claim.status != "Closed"
         )
-        .all()
+        .subquery()
+    )
+    return (
+        db.session.query(
+            ranked.c.workorder_id, ranked.c.claim_id, ranked.c.scheduled_date,
+            ranked.c.address, Vendor.name, Assignee.name, ranked.c.version,
+        )
+        .outerjoin(Vendor, Vendor.id == ranked.c.vendor_id)
+        .outerjoin(Assignee, Assignee.id == ranked.c.assignee_id)
+        .filter(ranked.c.rank == 1)
+        .order_by(ranked.c.scheduled_date, ranked.c.claim_id)
+    )
+
+def explain_query_plan(query):
+    """Returns the detail lines of SQLite's EXPLAIN QUERY PLAN for a query."""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = compiled.construct_params()
+    values = tuple(
+        params[name].isoformat() if hasattr(params[name], 'isoformat') else params[name]
+        for name in compiled.positiontup
     )
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), values)
+    return [row[-1] for row in rows]
+
+def hot_query_plans():
+    """(name, query, required plan fragment, forbidden plan fragments) for each hot path."""
+    today = datetime.now().date()
+    return [
+        ('view_claim latest work order', latest_workorder_query(1),
+         'USING INDEX ix_work_order_claim_id_id', ['TEMP B-TREE']),
+        ('view_claim photos', ClaimPhoto.query.filter_by(claim_id=1),
+         'USING INDEX ix_claim_photo_claim_id', []),
+        ('view_claim_log', claim_log_query(1).limit(101),
+         'USING INDEX ix_claim_log_claim_id_timestamp', ['TEMP B-TREE']),
+        ('view_claim_log next page', claim_log_query(1, after=(datetime.now(), 1)).limit(101),
+         'USING INDEX ix_claim_log_claim_id_timestamp', ['TEMP B-TREE']),
+        ('calendar range', calendar_events_query(today.replace(day=1), today + timedelta(days=31)),
+         'USING INDEX ix_work_order_scheduled_date_claim_id', ['SCAN work_order']),
+        ('dashboard section', ClaimSummary.query.filter(ClaimSummary.effective_status == 'Open')
+         .order_by(ClaimSummary.date_reported.desc(), ClaimSummary.claim_id.desc()).limit(51),
+         'USING INDEX ix_claim_summary_section', ['TEMP B-TREE']),
+    ]
+
+@bp.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if a hot query stops using the index it was tuned for."""
+    failures = 0
+    for name, query, required, forbidden in hot_query_plans():
+        plan = explain_query_plan(query)
+        ok = any(required in line for line in plan) and \
+            not any(bad in line for bad in forbidden for line in plan)
+        failures += not ok
+        click.echo(f"{'ok  ' if ok else 'FAIL'} {name}")
+        for line in plan:
+            click.echo(f"       {line}")
+    if failures:
+        sys.exit(1)
 
-    # Only show the workorder with the LATEST scheduled_date for each claim
-    latest_workorder_per_claim = {}
-    for wo in workorders:
-        if wo.claim_id not in latest_workorder_per_claim:
-            latest_workorder_per_claim[wo.claim_id] = wo
+def claim_log_model(claim_id):
+    """ClaimLog for live claims, ArchivedClaimLog once a claim is archived."""
+    if db.session.query(Claim.id).filter_by(id=claim_id).scalar() is None and \
+            db.session.query(ArchivedClaim.id).filter_by(id=claim_id).scalar() is not None:
+        return ArchivedClaimLog
+    return ClaimLog
+
+def claim_log_request_page(claim_id):
+    """The log page named by the request's ?after= cursor (400 if malformed)."""
+    cursor = request.args.get('after')
+    try:
+        after = decode_log_cursor(cursor) if cursor else None
+    except ValueError:
+        abort(400)
+    return claim_log_page(claim_id, claim_log_model(claim_id), after)
+
+@bp.route('/claim_log/<int:claim_id>')
+@login_required
+def view_claim_log(claim_id):
+    """Streams the first page of the log; the rest loads from /api/claim_log."""
+    logs, next_cursor = claim_log_request_page(claim_id)
+    # stream_template renders inside stream_with_context, so the header is
+    # flushed before the rows are rendered.
+    return current_app.response_class(stream_template(
+        'claim_log.html', logs=logs, claim_id=claim_id, next_cursor=next_cursor))
+
+@bp.route('/api/claim_log/<int:claim_id>')
+@login_required
+def api_claim_log(claim_id):
+    logs, next_cursor = claim_log_request_page(claim_id)
+    return jsonify({
+        "entries": [{
+            "id": log.id,
+            "timestamp": log.timestamp.strftime('%Y-%m-%d %H:%M') if log.timestamp else '',
+            "user": log.user.name,
+            "action": log.action,
+        } for log in logs],
+        "next": next_cursor,
+    })
+
+# --- STATIC AND UPLOAD SERVING ---
+PRECOMPRESS_EXTENSIONS = {'.css', '.js', '.svg', '.ics', '.html', '.json', '.txt', '.map'}
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CONTENT_HASHED_UPLOAD = re.compile(r'^[0-9a-f]{2}/(?P<etag>[0-9a-f]{64}(_[a-z]+)?)\.[a-z0-9]+$')
+_static_versions = {}
+
+def static_version(filename):
+    """Short content hash of a static file, recomputed only when it changes."""
+    path = safe_join(current_app.static_folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+    cached = _static_versions.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        version = hashlib.file_digest(f, 'sha256').hexdigest()[:12]
+    _static_versions[filename] = (mtime, version)
+    return version
+
+@bp.app_url_defaults
+def add_static_version(endpoint, values):
+    """Stamps url_for('static', ...) with ?v=<hash> so the URL can be cached forever."""
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        version = static_version(values['filename'])
+        if version:
+            values['v'] = version
+
+def precompressed_variant(folder, filename):
+    """Returns (encoding, filename) of an up-to-date .br/.gz copy the client accepts."""
+    if os.path.splitext(filename)[1].lower() not in PRECOMPRESS_EXTENSIONS:
+        return None, filename
+    path = safe_join(folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime
+    except (OSError, TypeError):
+        return None, filename
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        try:
+            if os.stat(path + suffix).st_mtime >= mtime:
+                return encoding, filename + suffix
+        except OSError:
+            pass
+    return None, filename
+
+def send_asset(folder, filename, etag=True, immutable=False, private=False):
+    """send_from_directory with precompression, long-lived caching and proxy offload.
+
+    Conditional requests and Range are handled by Werkzeug. With
+    SENDFILE_MODE=x-accel only the headers are built here and nginx
+    streams the file from an internal location at X_ACCEL_PREFIX.
+    """
+    folder = os.path.join(current_app.root_path, folder)
+    encoding, served = precompressed_variant(folder, filename)
+    if isinstance(etag, str) and encoding:
+        etag = f"{etag}-{encoding}"
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    max_age = current_app.config['IMMUTABLE_MAX_AGE'] if immutable else None
+    if current_app.config['SENDFILE_MODE'] == 'x-accel':
+        path = safe_join(folder, served)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = (
+            current_app.config['X_ACCEL_PREFIX'] + '/' + os.path.relpath(path, current_app.root_path).replace(os.sep, '/'))
+        response.mimetype = mimetype
+        if max_age:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
         else:
-            if wo.scheduled_date and wo.scheduled_date > latest_workorder_per_claim[wo.claim_id].scheduled_date:
-                latest_workorder_per_claim[wo.claim_id] = wo
-
-    workorders_by_day = {}
-    for wo in latest_workorder_per_claim.values():
-        if wo.scheduled_date:
-            day = wo.scheduled_date.day
-            wo_dict = {
-                'id': wo.id,
-                'claim_id': wo.claim_id,
-                'vendor': {'name': wo.vendor.name} if wo.vendor else None,
-                'assignee': {'name': wo.assignee.name} if wo.assignee else None,
-                'scheduled_date': wo.scheduled_date.strftime('%Y-%m-%d'),
-                'claim': {'address': wo.claim.address if wo.claim else ''}
-            }
-            workorders_by_day.setdefault(day, []).append(wo_dict)
+            response.cache_control.no_cache = True
+    else:
+        response = send_from_directory(folder, served, mimetype=mimetype, etag=etag, max_age=max_age)
+    if encoding:
+        response.content_encoding = encoding
+    if os.path.splitext(filename)[1].lower() in PRECOMPRESS_EXTENSIONS:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.immutable = True
+    if private:
+        response.cache_control.public = False
+        response.cache_control.private = True
+    return response
+
+def serve_static(filename):
+    version = request.args.get('v')
+    return send_asset(current_app.static_folder, filename, immutable=bool(version) and version == static_version(filename))
+
+
+@bp.route('/static/uploads/<path:filename>')
+def uploaded_file(filename):
+    if filename.startswith('partial/'):
+        abort(404)  # unfinished resumable uploads
+    hashed = CONTENT_HASHED_UPLOAD.match(filename)
+    if hashed:
+        return send_asset(current_app.config['UPLOAD_FOLDER'], filename, etag=hashed.group('etag'), immutable=True, private=True)
+    return send_asset(current_app.config['UPLOAD_FOLDER'], filename, private=True)
+
+@bp.cli.command('compress-static')
+def compress_static_command():
+    """Write .gz (and .br, if brotli is installed) copies of text assets."""
+    written = 0
+    for root, dirs, files in os.walk(current_app.static_folder):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in PRECOMPRESS_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', brotli.compress(data, quality=11)))
+            for suffix, compressed in variants:
+                if len(compressed) < len(data):
+                    with open(path + suffix, 'wb') as f:
+                        f.write(compressed)
+                    written += 1
+    click.echo(f"Wrote {written} precompressed file(s).")
+
+@bp.route('/calendar')
+@login_required
+def calendar_view():
+    now = datetime.now()
+    year = int(request.args.get('year', now.year))
+    month = int(request.args.get('month', now.month))
 
     cal = calendar.monthcalendar(year, month)
     month_name = calendar.month_name[month]
@@ -688,19 +2929,1260 @@ def calendar_view():
     return render_template(
         'calendar.html',
         cal=cal,
-        workorders_by_day=workorders_by_day,
         month=month,
         year=year,
         month_name=month_name,
         now=now
     )
 
+def calendar_events(start_date, end_date):
+    """FullCalendar events for work orders scheduled in [start_date, end_date)."""
+    events = []
+    for workorder_id, claim_id, scheduled_date, address, vendor_name, assignee_name, version in \
+            calendar_events_query(start_date, end_date):
+        title = f"Claim #{claim_id} - "
+        if address:
+            title += address + ' '
+        if vendor_name:
+            title += f"({vendor_name})"
+        elif assignee_name:
+            title += f"({assignee_name})"
+        else:
+            title += '(Unassigned)'
+        events.append({
+            'id': workorder_id,
+            'title': title,
+            'start': scheduled_date.strftime('%Y-%m-%d'),
+            'url': url_for('main.view_claim', claim_id=claim_id),
+            'extendedProps': {
+                'claim_id': claim_id,
+                'address': address,
+                'vendor': vendor_name,
+                'assignee': assignee_name,
+                'version': version,
+            },
+        })
+    return events
+
+def calendar_version():
+    """ETag seed that changes whenever the calendar could: two primary-key reads.
+
+    Claim and work order changes (deletions included) commit through
+    commit_claim_changes(), which bumps the 'claims' counter; vendor and
+    assignee edits, whose names appear in event titles, bump 'reference'.
+    """
+    versions = dict(db.session.query(DataVersion.name, DataVersion.version)
+                    .filter(DataVersion.name.in_(('claims', 'reference'))))
+    return f"{versions.get('claims', 0)}|{versions.get('reference', 0)}"
+
+def not_modified_response(etag, last_modified=None):
+    """Returns a 304 response if the request's validators still match, else None."""
+    if request.if_none_match:
+        matched = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified:
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    response = make_response('', 304)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+# --- CLAIM SEARCH ---
+# claim_search is an FTS5 table keyed by claim id and maintained by
+# triggers. It is created by a migration; batch migrations that rebuild
+# claim or claim_log drop the triggers, so run `flask rebuild-search-index`
+# after them.
+CLAIM_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS claim_search USING fts5(
+        address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_ai AFTER INSERT ON claim BEGIN
+        INSERT INTO claim_search(rowid, address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text)
+        VALUES (new.id, new.address, new.homeowner_name, new.cobuyer_name, new.issue_description, new.warranty_type, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_au
+    AFTER UPDATE OF address, homeowner_name, cobuyer_name, issue_description, warranty_type ON claim BEGIN
+        UPDATE claim_search SET address = new.address, homeowner_name = new.homeowner_name,
+            cobuyer_name = new.cobuyer_name, issue_description = new.issue_description,
+            warranty_type = new.warranty_type
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_ad AFTER DELETE ON claim BEGIN
+        DELETE FROM claim_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_log_ai AFTER INSERT ON claim_log BEGIN
+        UPDATE claim_search SET log_text = coalesce(log_text, '') || ' ' || new.action
+        WHERE rowid = new.claim_id;
+    END""",
+    # Skipped once the claim itself is gone, so deleting a claim before its
+    # log (as archive_claims() does) costs no per-row re-aggregation.
+    """CREATE TRIGGER IF NOT EXISTS claim_search_log_ad AFTER DELETE ON claim_log
+    WHEN EXISTS (SELECT 1 FROM claim WHERE id = old.claim_id) BEGIN
+        UPDATE claim_search SET log_text = coalesce(
+            (SELECT group_concat(action, ' ') FROM claim_log WHERE claim_id = old.claim_id), '')
+        WHERE rowid = old.claim_id;
+    END""",
+]
+
+CLAIM_SEARCH_BACKFILL = """
+    INSERT INTO claim_search(rowid, address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text)
+    SELECT c.id, c.address, c.homeowner_name, c.cobuyer_name, c.issue_description, c.warranty_type,
+           coalesce((SELECT group_concat(l.action, ' ') FROM claim_log l WHERE l.claim_id = c.id), '')
+    FROM claim c
+"""
+# Archived claims have no triggers; archive_claims() indexes them itself.
+ARCHIVED_CLAIM_SEARCH_BACKFILL = """
+    INSERT INTO claim_search(rowid, address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text)
+    SELECT a.id, a.address, a.homeowner_name, a.cobuyer_name, a.issue_description, a.warranty_type,
+           coalesce((SELECT group_concat(l.action, ' ') FROM archived_claim_log l WHERE l.claim_id = a.id), '')
+    FROM archived_claim a
+"""
+SEARCH_COLUMNS = ('address', 'homeowner_name', 'cobuyer_name', 'issue_description', 'warranty_type', 'log_text')
+SEARCH_WEIGHTS = (10.0, 8.0, 5.0, 2.0, 1.0, 1.0)  # bm25 weight per column, in SEARCH_COLUMNS order
+SEARCH_MAX_RESULTS = 100  # per page; /api/search pages on with ?offset=
+SEARCH_SNIPPET_CHARS = 60
+
+def search_terms(text):
+    return re.findall(r'\w+', text or '')[:16]
+
+def fts_query(terms):
+    """FTS5 query in which every term must match as a prefix."""
+    return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+def search_snippet(row, terms):
+    """Returns (before, match, after) around the first term hit in the row's columns."""
+    pattern = re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in terms) + r')\w*', re.IGNORECASE)
+    for column in SEARCH_COLUMNS:
+        text = row[column] or ''
+        hit = pattern.search(text)
+        if hit:
+            before = text[max(0, hit.start() - SEARCH_SNIPPET_CHARS):hit.start()]
+            after = text[hit.end():hit.end() + SEARCH_SNIPPET_CHARS]
+            return ('…' if hit.start() > SEARCH_SNIPPET_CHARS else '') + before, hit.group(0), after
+    return '', '', ''
+
+def search_claims(text, limit=25, offset=0):
+    """BM25-ranked claims matching ``text``; returns [] for an empty query.
+
+    Every match is ranked and ``offset``/``limit`` pick the page. Ranking
+    only reads the FTS index; display columns for the page are then
+    fetched by rowid, and the snippet is cut in Python.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+    ranked = db.session.execute(db.text(f"""
+        SELECT rowid, bm25(claim_search, {weights}) AS score FROM claim_search
+        WHERE claim_search MATCH :match
+        ORDER BY score, rowid DESC LIMIT :limit OFFSET :offset
+    """), {'match': fts_query(terms), 'limit': min(limit, SEARCH_MAX_RESULTS), 'offset': max(0, offset)}).all()
+    if not ranked:
+        return []
+    rows = db.session.execute(db.text(f"""
+        SELECT s.rowid AS id, {', '.join('s.' + column for column in SEARCH_COLUMNS)},
+               coalesce(c.status, a.status) AS status,
+               coalesce(c.date_reported, a.date_reported) AS date_reported,
+               c.id IS NULL AS archived
+        FROM claim_search s
+        LEFT JOIN claim c ON c.id = s.rowid
+        LEFT JOIN archived_claim a ON a.id = s.rowid
+        WHERE s.rowid IN :ids AND (c.id IS NOT NULL OR a.id IS NOT NULL)
+    """).bindparams(db.bindparam('ids', expanding=True)), {'ids': [r.rowid for r in ranked]})
+    by_id = {row.id: row._mapping for row in rows}
+    results = []
+    for claim_id, score in ranked:
+        row = by_id.get(claim_id)
+        if row is None:
+            continue
+        results.append({
+            'id': claim_id,
+            'address': row['address'],
+            'homeowner_name': row['homeowner_name'],
+            'warranty_type': row['warranty_type'],
+            'status': row['status'],
+            'archived': bool(row['archived']),
+            'date_reported': str(row['date_reported'])[:10] if row['date_reported'] else None,
+            'snippet': search_snippet(row, terms),
+            'score': score,
+        })
+    return results
+
+def rebuild_search_index():
+    """Recreates missing triggers and refills claim_search from the raw tables."""
+    for statement in CLAIM_SEARCH_DDL:
+        db.session.execute(db.text(statement))
+    db.session.execute(db.text("DELETE FROM claim_search"))
+    db.session.execute(db.text(CLAIM_SEARCH_BACKFILL))
+    db.session.execute(db.text(ARCHIVED_CLAIM_SEARCH_BACKFILL))
+    db.session.commit()
+    return db.session.execute(db.text("SELECT count(*) FROM claim_search")).scalar()
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Backfill the claim search index and restore its triggers."""
+    click.echo(f"Indexed {rebuild_search_index()} claims.")
+
+@bp.route('/search')
+@login_required
+def search():
+    q = request.args.get('q', '').strip()
+    results = search_claims(q, limit=SEARCH_MAX_RESULTS)
+    return render_template('search.html', q=q, results=results)
+
+@bp.route('/api/search')
+@login_required
+def api_search():
+    limit = request.args.get('limit', 25, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    results = search_claims(request.args.get('q', ''), limit=max(1, limit), offset=offset)
+    for result in results:
+        result['snippet'] = ''.join(result['snippet'])
+        result['url'] = url_for('main.view_claim', claim_id=result['id'])
+    return jsonify({"success": True, "results": results})
+
+# --- CLAIM ARCHIVING ---
+ARCHIVE_BATCH_SIZE = 200
+
+def claim_closed_at():
+    """SQL expression: when a claim was closed, from its closure or log rows."""
+    return db.func.coalesce(
+        db.session.query(db.func.max(ClaimClosure.timestamp))
+        .filter(ClaimClosure.claim_id == Claim.id).scalar_subquery(),
+        db.session.query(db.func.max(ClaimLog.timestamp))
+        .filter(ClaimLog.claim_id == Claim.id).scalar_subquery(),
+        Claim.date_reported,
+    )
+
+def archive_candidates(cutoff, limit):
+    """Ids of claims closed before ``cutoff`` with no queued or running jobs."""
+    busy = db.session.query(Job.id).filter(Job.claim_id == Claim.id, Job.status.in_(('queued', 'running')))
+    query = (
+        db.session.query(Claim.id)
+        .filter(Claim.status == 'Closed', claim_closed_at() < cutoff, ~busy.exists())
+        .order_by(Claim.id)
+    )
+    return [claim_id for (claim_id,) in query.limit(limit)]
+
+def copy_rows(source, target, where, extra=None):
+    """INSERT INTO target SELECT the shared columns FROM source WHERE ..."""
+    columns = [column.name for column in source.__table__.columns if column.name in target.__table__.columns]
+    selected = [source.__table__.c[name] for name in columns]
+    if extra:
+        columns += list(extra)
+        selected += [db.literal(value) for value in extra.values()]
+    db.session.execute(target.__table__.insert().from_select(columns, db.select(*selected).where(where)))
+
+def archive_claims(claim_ids):
+    """Moves the claims and their child rows into the archive tables.
+
+    Runs in the caller's transaction and commits through
+    commit_claim_changes(), which drops the claims' summaries.
+    """
+    feed_owners = feed_owners_for_claims(claim_ids)
+    copy_rows(Claim, ArchivedClaim, Claim.id.in_(claim_ids), {'archived_at': cst_now()})
+    for live, archive in ARCHIVED_CHILDREN:
+        copy_rows(live, archive, live.claim_id.in_(claim_ids))
+    # Claims first: their delete trigger drops the search rows, and the
+    # claim_log trigger then skips every log row of a deleted claim.
+    Claim.query.filter(Claim.id.in_(claim_ids)).delete(synchronize_session=False)
+    for live, _ in reversed(ARCHIVED_CHILDREN):
+        live.query.filter(live.claim_id.in_(claim_ids)).delete(synchronize_session=False)
+    # Finished jobs go with the claim, as in delete_claim (candidates have no pending ones).
+    Job.query.filter(Job.claim_id.in_(claim_ids)).delete(synchronize_session=False)
+    db.session.execute(
+        db.text(ARCHIVED_CLAIM_SEARCH_BACKFILL + " WHERE a.id IN :ids")
+        .bindparams(db.bindparam('ids', expanding=True)), {'ids': list(claim_ids)})
+    commit_claim_changes(claim_ids, feed_owners)
+
+def archive_closed_claims(older_than_days, batch_size=ARCHIVE_BATCH_SIZE, limit=None, progress=None):
+    """Archives claims closed more than ``older_than_days`` ago, one batch per transaction.
+
+    Each batch commits on its own, so an interrupted run loses nothing
+    and the next run carries on where it stopped. Returns the number of
+    claims archived.
+    """
+    cutoff = cst_now().replace(tzinfo=None) - timedelta(days=older_than_days)
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+
+        def next_batch():
+            claim_ids = archive_candidates(cutoff, size)
+            if claim_ids:
+                archive_claims(claim_ids)
+            return len(claim_ids)
+        archived = run_write_transaction(next_batch)
+        if not archived:
+            break
+        total += archived
+        if progress:
+            progress(total)
+    return total
+
+def restore_claim(claim_id):
+    """Moves an archived claim back into the live tables. Returns False if it is not archived."""
+    if db.session.get(ArchivedClaim, claim_id) is None:
+        return False
+    db.session.execute(db.text("DELETE FROM claim_search WHERE rowid = :id"), {'id': claim_id})
+    # The live claim and claim_log triggers re-index it as rows go back.
+    copy_rows(ArchivedClaim, Claim, ArchivedClaim.id == claim_id)
+    for live, archive in ARCHIVED_CHILDREN:
+        copy_rows(archive, live, archive.claim_id == claim_id)
+    for _, archive in reversed(ARCHIVED_CHILDREN):
+        archive.query.filter_by(claim_id=claim_id).delete(synchronize_session=False)
+    ArchivedClaim.query.filter_by(id=claim_id).delete(synchronize_session=False)
+    commit_claim_changes([claim_id])
+    return True
+
+@bp.cli.command('archive-claims')
+@click.option('--older-than', 'days', type=int, default=None,
+              help='Archive claims closed more than this many days ago (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, show_default=True)
+@click.option('--limit', type=int, default=None, help='Stop after this many claims.')
+def archive_claims_command(days, batch_size, limit):
+    """Move long-closed claims into the archive tables (safe to interrupt and rerun)."""
+    if days is None:
+        days = current_app.config['ARCHIVE_AFTER_DAYS']
+    total = archive_closed_claims(days, batch_size, limit,
+                                  progress=lambda n: click.echo(f"Archived {n} claims...", err=True))
+    click.echo(f"Archived {total} claims closed more than {days} days ago.")
+
+@bp.cli.command('restore-claim')
+@click.argument('claim_id', type=int)
+def restore_claim_command(claim_id):
+    """Move an archived claim back into the live tables."""
+    if not run_write_transaction(lambda: restore_claim(claim_id)):
+        raise click.ClickException(f"Claim {claim_id} is not archived.")
+    click.echo(f"Restored claim {claim_id}.")
+
+# --- RESUMABLE PHOTO UPLOADS ---
+# The client creates an upload, then PATCHes chunks at the offset the
+# server reports; after a dropped connection it asks for the offset (HEAD)
+# and carries on from there. Chunks are appended to a partial file as they
+# arrive and the file's size is the offset, so a chunk is never held in
+# memory and never takes the database write lock. The finished file goes
+# into the same content-addressed storage as form uploads.
+UPLOAD_CHECKSUM = re.compile(r'^sha256 ([A-Za-z0-9+/]+={0,2})$')
+SHA256_HEX = re.compile(r'^[0-9a-f]{64}$')
+
+def upload_part_path(upload_id):
+    return os.path.join(current_app.config['UPLOAD_PARTIAL_FOLDER'], f"{upload_id}.part")
+
+def upload_offset(upload):
+    if upload.content_hash:
+        return upload.size
+    try:
+        return os.path.getsize(upload_part_path(upload.id))
+    except OSError:
+        return 0
+
+def upload_response(upload, code=200, **extra):
+    offset = upload_offset(upload)
+    response = jsonify({
+        "success": code < 400,
+        "id": upload.id,
+        "filename": upload.filename,
+        "size": upload.size,
+        "offset": offset,
+        "complete": upload.content_hash is not None,
+        "claim_id": upload.claim_id,
+        "chunk_bytes": current_app.config['UPLOAD_CHUNK_MAX_BYTES'],
+        **extra,
+    })
+    response.status_code = code
+    response.headers['Upload-Offset'] = str(offset)
+    response.headers['Upload-Length'] = str(upload.size)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def user_upload_or_404(upload_id):
+    upload = db.session.get(PhotoUpload, upload_id)
+    if upload is None or upload.user_id != current_user.id:
+        abort(404)
+    return upload
+
+def attach_upload(upload, claim_id):
+    """Attaches a completed upload to a claim, or marks an unfinished one to
+    be attached when its last chunk arrives. Commit with commit_claim_changes()."""
+    if upload.content_hash is None:
+        upload.claim_id = claim_id
+        return
+    blob = db.session.get(PhotoBlob, upload.content_hash)
+    # The upload's reference on the blob passes to the ClaimPhoto.
+    db.session.add(ClaimPhoto(claim_id=claim_id, filename=blob.filename, content_hash=blob.sha256))
+    db.session.delete(upload)
+
+def discard_upload(upload):
+    """Deletes an upload in the current transaction; returns blob files to
+    remove with remove_photo_blob_files() after commit."""
+    unreferenced = release_photos([upload.content_hash]) if upload.content_hash else []
+    db.session.delete(upload)
+    return unreferenced
+
+def finish_upload(upload_id):
+    """Moves a fully received partial file into photo storage.
+
+    Returns (upload or None, message). Run in a write transaction; commits.
+    """
+    upload = db.session.get(PhotoUpload, upload_id)
+    if upload is None or upload.content_hash:
+        return upload, None
+    path = upload_part_path(upload.id)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    if upload.sha256 and upload.sha256 != sha256:
+        db.session.delete(upload)
+        db.session.commit()
+        os.remove(path)
+        return None, "The file's SHA-256 does not match; upload it again."
+    ext = os.path.splitext(secure_filename(upload.filename))[1].lstrip('.').lower()[:10] or 'bin'
+    blob = adopt_photo_file(path, sha256, ext, upload.size)
+    upload.content_hash = blob.sha256
+    claim_id = upload.claim_id
+    if claim_id is not None and db.session.get(Claim, claim_id) is not None:
+        attach_upload(upload, claim_id)
+        commit_claim_changes([claim_id])
+    else:
+        db.session.commit()
+    if os.path.exists(path):
+        # Identical content was already stored.
+        os.remove(path)
+    return upload, None
+
+@bp.route('/api/uploads', methods=['POST'])
+@login_required
+@write_transaction()
+def api_create_upload():
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename')
+    size = data.get('size')
+    sha256 = data.get('sha256')
+    claim_id = data.get('claim_id')
+    if not isinstance(filename, str) or not filename or not isinstance(size, int) or size <= 0:
+        return jsonify({"success": False, "message": "filename and a positive size are required"}), 400
+    if sha256 is not None and not (isinstance(sha256, str) and SHA256_HEX.match(sha256)):
+        return jsonify({"success": False, "message": "sha256 must be 64 lowercase hex digits"}), 400
+    if size > current_app.config['UPLOAD_MAX_BYTES']:
+        return jsonify({"success": False, "message": f"photos are limited to {current_app.config['UPLOAD_MAX_BYTES']} bytes"}), 413
+    if claim_id is not None and (not isinstance(claim_id, int) or db.session.get(Claim, claim_id) is None):
+        return jsonify({"success": False, "message": "no such claim"}), 404
+    upload = PhotoUpload(id=secrets.token_hex(16), user_id=current_user.id, claim_id=claim_id,
+                         filename=filename[:200], size=size, sha256=sha256)
+    db.session.add(upload)
+    db.session.commit()
+    open(upload_part_path(upload.id), 'wb').close()
+    response = upload_response(upload, 201)
+    response.headers['Location'] = url_for('main.api_upload', upload_id=upload.id)
+    return response
+
+@bp.route('/api/uploads/<upload_id>')
+@login_required
+def api_upload(upload_id):
+    """Upload status; HEAD gives just the Upload-Offset header to resume from."""
+    return upload_response(user_upload_or_404(upload_id))
+
+@bp.route('/api/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+def api_upload_chunk(upload_id):
+    """Appends the request body at Upload-Offset (tus-style).
+
+    An optional "Upload-Checksum: sha256 <base64>" header is checked
+    against the chunk; a mismatched or interrupted checksummed chunk is
+    dropped so the client can resend it.
+    """
+    upload = user_upload_or_404(upload_id)
+    if upload.content_hash:
+        return upload_response(upload)
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({"success": False, "message": "Upload-Offset header is required"}), 400
+    expected = None
+    if request.headers.get('Upload-Checksum'):
+        match = UPLOAD_CHECKSUM.match(request.headers['Upload-Checksum'])
+        if not match:
+            return jsonify({"success": False, "message": "Upload-Checksum must be \"sha256 <base64>\""}), 400
+        expected = base64.b64decode(match.group(1))
+    size = upload.size
+    # End the read transaction before streaming: a slow chunk must not pin
+    # a snapshot or hold up writers.
+    db.session.commit()
+
+    request.max_content_length = current_app.config['UPLOAD_CHUNK_MAX_BYTES']
+    with open(upload_part_path(upload_id), 'ab') as out:
+        if fcntl is not None:
+            try:
+                fcntl.flock(out, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return upload_response(upload, 423, message="another request is writing this upload")
+        start = out.seek(0, os.SEEK_END)
+        if offset != start:
+            return upload_response(upload, 409, message=f"upload is at offset {start}")
+        digest = hashlib.sha256()
+        end = start
+        try:
+            for chunk in iter(lambda: request.stream.read(UPLOAD_CHUNK_BYTES), b''):
+                end += len(chunk)
+                if end > size:
+                    out.truncate(start)
+                    return upload_response(upload, 413, message="chunk runs past the upload's size")
+                digest.update(chunk)
+                out.write(chunk)
+        except Exception:
+            if expected is not None:
+                out.truncate(start)
+            raise
+        if expected is not None and digest.digest() != expected:
+            out.truncate(start)
+            return upload_response(upload, 460, message="chunk checksum mismatch")
+        out.flush()
+        os.fsync(out.fileno())
+
+    if end < size:
+        return upload_response(upload)
+    upload, message = run_write_transaction(lambda: finish_upload(upload_id), retries=0)
+    if upload is None:
+        return jsonify({"success": False, "message": message or "upload is gone"}), 460 if message else 404
+    if db.session.get(PhotoUpload, upload_id) is None:
+        # Attached to its claim and gone.
+        return jsonify({"success": True, "id": upload_id, "offset": size, "size": size, "complete": True,
+                        "claim_id": upload.claim_id}), 200, {'Upload-Offset': str(size), 'Cache-Control': 'no-store'}
+    return upload_response(upload)
+
+@bp.route('/api/uploads/<upload_id>/attach', methods=['POST'])
+@login_required
+@write_transaction()
+def api_attach_upload(upload_id):
+    """Attaches an upload to a claim created after the upload started."""
+    upload = user_upload_or_404(upload_id)
+    claim_id = (request.get_json(silent=True) or {}).get('claim_id')
+    if not isinstance(claim_id, int) or db.session.get(Claim, claim_id) is None:
+        return jsonify({"success": False, "message": "no such claim"}), 404
+    complete = upload.content_hash is not None
+    attach_upload(upload, claim_id)
+    commit_claim_changes([claim_id])
+    return jsonify({"success": True, "id": upload_id, "claim_id": claim_id, "complete": complete})
+
+@bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+@write_transaction()
+def api_cancel_upload(upload_id):
+    unreferenced = discard_upload(user_upload_or_404(upload_id))
+    db.session.commit()
+    remove_upload_files([os.path.relpath(upload_part_path(upload_id), current_app.config['UPLOAD_FOLDER'])])
+    remove_photo_blob_files(unreferenced)
+    return jsonify({"success": True})
+
+@bp.cli.command('prune-uploads')
+@click.option('--older-than', 'hours', type=int, help='Hours; defaults to UPLOAD_EXPIRY_HOURS.')
+def prune_uploads_command(hours):
+    """Delete uploads that were started but never attached to a claim."""
+    hours = current_app.config['UPLOAD_EXPIRY_HOURS'] if hours is None else hours
+    cutoff = cst_now().replace(tzinfo=None) - timedelta(hours=hours)
+    pruned = 0
+    for upload in PhotoUpload.query.filter(PhotoUpload.created_at < cutoff).all():
+        unreferenced = discard_upload(upload)
+        db.session.commit()
+        remove_upload_files([os.path.relpath(upload_part_path(upload.id), current_app.config['UPLOAD_FOLDER'])])
+        remove_photo_blob_files(unreferenced)
+        pruned += 1
+    click.echo(f"Pruned {pruned} upload(s) older than {hours} hours.")
+
+# --- BULK IMPORT / EXPORT ---
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_BYTES = 512 * 1024 * 1024
+IMPORT_ERROR_LIMIT = 1000
+EXPORT_BATCH_SIZE = 1000
+CLAIM_STATUSES = ('Open', 'Scheduled', 'Deferred', 'Closed')
+BULK_MODELS = {
+    'claims': Claim,
+    'workorders': WorkOrder,
+    'vendors': Vendor,
+    'assignees': Assignee,
+    'logs': ClaimLog,  # export only
+}
+IMPORT_KINDS = ('claims', 'workorders', 'vendors', 'assignees')
+# column -> model whose ids it must reference
+IMPORT_REFERENCES = {
+    'claim_id': Claim,
+    'vendor_id': Vendor,
+    'assignee_id': Assignee,
+}
+
+class ImportRowError(ValueError):
+    pass
+
+def parse_import_value(column, value):
+    """Converts a CSV string or JSON value to the column's Python type."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    python_type = column.type.python_type
+    try:
+        if python_type is int:
+            if isinstance(value, bool):
+                raise ValueError
+            return int(value)
+        if python_type is bool:
+            if isinstance(value, bool):
+                return value
+            return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+        if python_type is datetime:
+            return datetime.fromisoformat(str(value).strip())
+        if python_type is date:
+            return datetime.fromisoformat(str(value).strip()[:10]).date()
+    except ValueError:
+        raise ImportRowError(f"{column.name}: invalid {python_type.__name__} {value!r}")
+    value = str(value).strip()
+    length = getattr(column.type, 'length', None)
+    if length and len(value) > length:
+        raise ImportRowError(f"{column.name}: longer than {length} characters")
+    return value
+
+def column_default(column):
+    default = column.default
+    if default is None:
+        return None
+    value = default.arg(None) if default.is_callable else default.arg
+    if column.type.python_type is date and isinstance(value, datetime):
+        return value.date()
+    return value
+
+def validate_import_row(kind, record):
+    """Returns a dict of every importable column for one input record."""
+    table = BULK_MODELS[kind].__table__
+    unknown = set(record) - set(table.columns.keys())
+    if unknown:
+        raise ImportRowError(f"unknown column(s): {', '.join(sorted(unknown))}")
+    row = {}
+    for column in table.columns:
+        value = parse_import_value(column, record.get(column.name))
+        if value is None and not column.primary_key:
+            value = column_default(column)
+        if value is None and not column.nullable and not column.primary_key:
+            raise ImportRowError(f"{column.name}: required")
+        row[column.name] = value
+    if kind == 'claims' and row['status'] not in CLAIM_STATUSES:
+        raise ImportRowError(f"status: must be one of {', '.join(CLAIM_STATUSES)}")
+    return row
+
+def check_import_references(kind, rows):
+    """Drops rows whose ids already exist or whose foreign keys do not.
+
+    Returns (good_rows, [(line, message), ...]); rows are (line, dict) pairs.
+    """
+    table = BULK_MODELS[kind].__table__
+    errors = []
+    wanted = {name: {row[name] for _, row in rows if row[name] is not None}
+              for name in IMPORT_REFERENCES if name in table.columns}
+    found = {}
+    for name, ids in wanted.items():
+        model = IMPORT_REFERENCES[name]
+        found[name] = {i for (i,) in db.session.query(model.id).filter(model.id.in_(ids))} if ids else set()
+    explicit_ids = {row['id'] for _, row in rows if row['id'] is not None}
+    taken = {i for (i,) in db.session.query(table.c.id).filter(table.c.id.in_(explicit_ids))} if explicit_ids else set()
+    good = []
+    for line, row in rows:
+        problems = [f"{name}: no {IMPORT_REFERENCES[name].__tablename__} with id {row[name]}"
+                    for name in found if row[name] is not None and row[name] not in found[name]]
+        if row['id'] is not None and row['id'] in taken:
+            problems.append(f"id: {row['id']} already exists")
+        if problems:
+            errors.append((line, '; '.join(problems)))
+        else:
+            good.append((line, row))
+    return good, errors
+
+def insert_import_chunk(kind, rows):
+    """Bulk-inserts validated rows in one transaction.
+
+    If the multi-row insert is rejected, the rows are retried one at a time
+    under savepoints so the error can be pinned to its line.
+    """
+    table = BULK_MODELS[kind].__table__
+    insert = table.insert().returning(table.c.id)
+    errors = []
+    new_ids = []
+    inserted = []
+    try:
+        with db.session.begin_nested():
+            new_ids = db.session.scalars(insert, [row for _, row in rows]).all()
+        inserted = rows
+    except exc.IntegrityError:
+        for line, row in rows:
+            try:
+                with db.session.begin_nested():
+                    new_ids.append(db.session.scalars(insert, [row]).one())
+                inserted.append((line, row))
+            except exc.IntegrityError as e:
+                errors.append((line, str(e.orig)))
+    claim_ids = set()
+    if kind in ('vendors', 'assignees') and inserted:
+        # Core inserts skip the mapper events that normally bump this.
+        bump_data_version(db.session.connection(), 'reference')
+    if kind == 'claims':
+        claim_ids = set(new_ids)
+    elif kind == 'workorders':
+        claim_ids = {row['claim_id'] for _, row in inserted}
+    if claim_ids:
+        commit_claim_changes(claim_ids)
+    else:
+        db.session.commit()
+    return len(inserted), errors
+
+def read_import_records(stream, fmt):
+    """Yields (line number, dict) from a binary CSV or JSONL stream.
+
+    A CSV record with quoted newlines spans several lines; its number is
+    the line it ends on.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, ImportRowError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield number, ImportRowError("expected a JSON object")
+            continue
+        yield number, record
+
+def import_records(kind, stream, fmt, dry_run=False):
+    """Validates and inserts records in chunks of IMPORT_CHUNK_SIZE.
+
+    Returns {'inserted', 'failed', 'errors': [(line, message), ...]}. Only
+    the first IMPORT_ERROR_LIMIT errors are kept, but all of them are counted.
+    """
+    report = {'inserted': 0, 'failed': 0, 'errors': []}
+
+    def fail(errors):
+        report['failed'] += len(errors)
+        room = IMPORT_ERROR_LIMIT - len(report['errors'])
+        report['errors'].extend(errors[:max(room, 0)])
+
+    def flush(chunk):
+        good, errors = check_import_references(kind, chunk)
+        if not dry_run and good:
+            inserted, insert_errors = insert_import_chunk(kind, good)
+            report['inserted'] += inserted
+            errors += insert_errors
+        elif dry_run:
+            report['inserted'] += len(good)
+        fail(errors)
+
+    chunk = []
+    for line, record in read_import_records(stream, fmt):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            chunk.append((line, validate_import_row(kind, record)))
+        except ImportRowError as e:
+            fail([(line, str(e))])
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    report['errors'].sort()
+    return report
+
+def export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def export_rows(kind):
+    """Yields table rows as dicts, EXPORT_BATCH_SIZE at a time from the DB."""
+    table = BULK_MODELS[kind].__table__
+    result = db.session.execute(
+        db.select(table).order_by(table.c.id).execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for row in result.mappings():
+        yield {key: export_value(value) for key, value in row.items()}
+
+def export_lines(kind, fmt):
+    """Yields the export as text chunks; nothing is held beyond one batch."""
+    if fmt == 'jsonl':
+        batch = []
+        for row in export_rows(kind):
+            batch.append(json.dumps(row) + '\n')
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield ''.join(batch)
+                batch = []
+        yield ''.join(batch)
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=BULK_MODELS[kind].__table__.columns.keys())
+    writer.writeheader()
+    for count, row in enumerate(export_rows(kind), start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def bulk_format(fmt, filename=''):
+    fmt = (fmt or os.path.splitext(filename)[1].lstrip('.') or 'csv').lower()
+    if fmt == 'json':
+        fmt = 'jsonl'
+    if fmt not in ('csv', 'jsonl'):
+        raise click.BadParameter("format must be csv or jsonl")
+    return fmt
+
+@bp.cli.command('import-data')
+@click.argument('kind', type=click.Choice(IMPORT_KINDS))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--dry-run', is_flag=True, help='Validate only; insert nothing.')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False), help='Write the error report as CSV.')
+def import_data_command(kind, path, fmt, dry_run, errors_path):
+    """Stream-import claims, work orders, vendors or assignees from CSV/JSONL."""
+    with open(path, 'rb') as f:
+        report = import_records(kind, f, bulk_format(fmt, path), dry_run=dry_run)
+    verb = 'Would insert' if dry_run else 'Inserted'
+    click.echo(f"{verb} {report['inserted']} {kind}; {report['failed']} row(s) rejected.")
+    if errors_path:
+        with open(errors_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'error'])
+            writer.writerows(report['errors'])
+    else:
+        for line, message in report['errors'][:50]:
+            click.echo(f"line {line}: {message}", err=True)
+    if report['failed']:
+        sys.exit(1)
+
+@bp.cli.command('export-data')
+@click.argument('kind', type=click.Choice(list(BULK_MODELS)))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+@click.option('--output', type=click.Path(dir_okay=False), help='Defaults to stdout.')
+def export_data_command(kind, fmt, output):
+    """Stream a table out as CSV or JSONL."""
+    f = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+    try:
+        for chunk in export_lines(kind, fmt):
+            f.write(chunk)
+    finally:
+        if output:
+            f.close()
+
+@bp.route('/api/import/<kind>', methods=['POST'])
+@login_required
+@write_transaction(retries=0)
+def api_import(kind):
+    if kind not in IMPORT_KINDS:
+        abort(404)
+    request.max_content_length = IMPORT_MAX_BYTES
+    upload = request.files.get('file')
+    try:
+        fmt = bulk_format(request.args.get('format'), upload.filename if upload else '')
+    except click.BadParameter as e:
+        return jsonify({"success": False, "message": e.message}), 400
+    stream = upload.stream if upload else request.stream
+    report = import_records(kind, stream, fmt, dry_run=request.args.get('dry_run') == '1')
+    return jsonify({
+        "success": not report['failed'],
+        "inserted": report['inserted'],
+        "failed": report['failed'],
+        "errors": [{"line": line, "error": message} for line, message in report['errors']],
+    })
+
+@bp.route('/api/export/<kind>.<fmt>')
+@login_required
+def api_export(kind, fmt):
+    if kind not in BULK_MODELS or fmt not in ('csv', 'jsonl'):
+        abort(404)
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = current_app.response_class(stream_with_context(export_lines(kind, fmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+CALENDAR_CACHE_SIZE = 64
+
+@bp.route('/api/calendar')
+@login_required
+def api_calendar():
+    try:
+        # FullCalendar sends ISO datetimes; only the date part matters here.
+        start_date = datetime.strptime(request.args['start'][:10], '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args['end'][:10], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        return jsonify({"success": False, "message": "start and end must be YYYY-MM-DD dates"}), 400
+    if end_date <= start_date or (end_date - start_date).days > 366:
+        return jsonify({"success": False, "message": "range must be between 1 and 366 days"}), 400
+
+    etag = hashlib.sha1(f"{start_date}|{end_date}|{calendar_version()}".encode()).hexdigest()
+    response = not_modified_response(etag)
+    if response is not None:
+        return response
+
+    key = (start_date, end_date)
+    cache = app_state().calendar_cache
+    cached = cache.get(key)
+    if cached and cached[0] == etag:
+        cache.move_to_end(key)
+        body = cached[1]
+    else:
+        body = json.dumps(calendar_events(start_date, end_date))
+        cache[key] = (etag, body)
+        cache.move_to_end(key)
+        while len(cache) > CALENDAR_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    response = make_response(body)
+    response.mimetype = 'application/json'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def load_workorders_for_pdf(workorder_ids):
+    """Work orders with their claim, vendor and assignee loaded in one query."""
+    return (
+        WorkOrder.query
+        .options(db.joinedload(WorkOrder.claim), db.joinedload(WorkOrder.vendor),
+                 db.joinedload(WorkOrder.assignee))
+        .filter(WorkOrder.id.in_(workorder_ids))
+        .order_by(WorkOrder.scheduled_date, WorkOrder.scheduled_time, WorkOrder.id)
+        .all()
+    )
+
+def send_pdf(key, data, download_name, mimetype='application/pdf'):
+    response = send_file(io.BytesIO(data), mimetype=mimetype, download_name=download_name,
+                         etag=key, max_age=0)
+    return response.make_conditional(request)
+
+@bp.route('/workorder/<int:workorder_id>/pdf')
+@login_required
+def workorder_pdf(workorder_id):
+    workorders = load_workorders_for_pdf([workorder_id])
+    if not workorders:
+        abort(404)
+    wo = workorders[0]
+    key, data = cached_workorder_pdf([workorder_pdf_lines(wo.claim, wo, wo.vendor, wo.assignee)])
+    return send_pdf(key, data, f"workorder_{wo.id}.pdf")
+
+@bp.route('/workorders/pdf')
+@login_required
+def workorders_run_sheet():
+    """All work orders shown on the calendar for one day, as one PDF or a zip."""
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        abort(400)
+    output = request.args.get('format', 'pdf')
+    if output not in ('pdf', 'zip'):
+        abort(400)
+
+    workorder_ids = [row[0] for row in calendar_events_query(day, day + timedelta(days=1))]
+    if not workorder_ids:
+        flash(f"No work orders scheduled for {day}.")
+        return redirect(url_for('main.calendar_view', year=day.year, month=day.month))
+    workorders = load_workorders_for_pdf(workorder_ids)
+    page_sets = [[workorder_pdf_lines(wo.claim, wo, wo.vendor, wo.assignee)] for wo in workorders]
+
+    if output == 'pdf':
+        key, data = cached_workorder_pdf([pages[0] for pages in page_sets])
+        return send_pdf(key, data, f"run_sheet_{day}.pdf")
+
+    rendered = render_workorder_pdfs_parallel(page_sets)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for wo, pages in zip(workorders, page_sets):
+            archive.writestr(f"workorder_{wo.id}_claim_{wo.claim_id}.pdf", rendered[pdf_content_hash(pages)])
+    key = hashlib.sha256(''.join(pdf_content_hash(pages) for pages in page_sets).encode()).hexdigest()
+    return send_pdf(key, buffer.getvalue(), f"run_sheet_{day}.zip", mimetype='application/zip')
+
+FEED_KINDS = {'assignee': Assignee, 'vendor': Vendor}
+
+def feed_token(kind, person_id):
+    """Signed token that authorizes a calendar client to read one feed."""
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendar-feed').dumps([kind, person_id])
+
+def feed_token_valid(kind, person_id, token):
+    try:
+        return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendar-feed').loads(token) == [kind, person_id]
+    except BadSignature:
+        return False
+
+def feed_cache_path(kind, person_id, suffix='.ics'):
+    return os.path.join(current_app.config['FEED_CACHE_FOLDER'], f"{kind}-{person_id}{suffix}")
+
+def feed_owners_for_claims(claim_ids):
+    """(kind, id) of every assignee and vendor with a work order on the claims."""
+    owners = set()
+    rows = (
+        db.session.query(WorkOrder.assignee_id, WorkOrder.vendor_id)
+        .filter(WorkOrder.claim_id.in_(list(claim_ids)))
+        .distinct()
+    )
+    for assignee_id, vendor_id in rows:
+        if assignee_id:
+            owners.add(('assignee', assignee_id))
+        if vendor_id:
+            owners.add(('vendor', vendor_id))
+    return owners
+
+def invalidate_feeds(owners):
+    """Drops cached feeds so the next poll regenerates them.
+
+    A fresh generation token is written first; a regeneration that started
+    before the change sees the token move and does not cache its result.
+    """
+    for kind, person_id in owners:
+        with open(feed_cache_path(kind, person_id, '.gen'), 'w') as f:
+            f.write(str(time.time_ns()))
+        try:
+            os.remove(feed_cache_path(kind, person_id))
+        except FileNotFoundError:
+            pass
+
+def read_feed_generation(kind, person_id):
+    try:
+        with open(feed_cache_path(kind, person_id, '.gen')) as f:
+            return f.read()
+    except FileNotFoundError:
+        return ''
+
+def ics_escape(text):
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+def ics_line(line):
+    """Folds a content line to 75 octets as RFC 5545 requires."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Don't split a multi-byte character.
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+def feed_events(kind, person_id):
+    """Yields VEVENT text for the person's current scheduled work orders.
+
+    Only each open claim's latest scheduled work order counts, so a
+    reassigned appointment drops off the previous person's feed.
+    """
+    central = pytz.timezone('America/Chicago')
+    latest_wo = latest_scheduled_workorders()
+    owner_column = latest_wo.c.assignee_id if kind == 'assignee' else latest_wo.c.vendor_id
+    rows = (
+        db.session.query(WorkOrder, Claim.address, Claim.homeowner_name, Claim.homeowner_phone,
+                         Claim.issue_description)
+        .join(latest_wo, latest_wo.c.workorder_id == WorkOrder.id)
+        .join(Claim, Claim.id == WorkOrder.claim_id)
+        .filter(owner_column == person_id, Claim.status != "Closed")
+        .order_by(WorkOrder.scheduled_date, WorkOrder.id)
+        .yield_per(200)
+    )
+    uid_domain = current_app.config['FEED_UID_DOMAIN']
+    for workorder, address, homeowner_name, homeowner_phone, issue in rows:
+        stamp = workorder.updated_at or datetime(2000, 1, 1)
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:workorder-{workorder.id}@{uid_domain}',
+            'DTSTAMP:' + central.localize(stamp).astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ'),
+        ]
+        start = None
+        if workorder.scheduled_time:
+            try:
+                start = datetime.strptime(
+                    f"{workorder.scheduled_date:%Y-%m-%d} {workorder.scheduled_time}", "%Y-%m-%d %H:%M")
+            except ValueError:
+                start = None
+        if start:
+            start = central.localize(start).astimezone(pytz.utc)
+            lines.append('DTSTART:' + start.strftime('%Y%m%dT%H%M%SZ'))
+            lines.append('DTEND:' + (start + timedelta(hours=1)).strftime('%Y%m%dT%H%M%SZ'))
+        else:
+            lines.append(f'DTSTART;VALUE=DATE:{workorder.scheduled_date:%Y%m%d}')
+            lines.append(f'DTEND;VALUE=DATE:{workorder.scheduled_date + timedelta(days=1):%Y%m%d}')
+        description = (
+            f"Claim #{workorder.claim_id}\n"
+            f"Homeowner: {homeowner_name or 'N/A'} {homeowner_phone or ''}\n"
+            f"Issue: {issue or 'N/A'}\n"
+            f"Notes: {workorder.notes or 'N/A'}"
+        )
+        lines += [
+            'SUMMARY:' + ics_escape(f"Work Order for {address}"),
+            'LOCATION:' + ics_escape(address),
+            'DESCRIPTION:' + ics_escape(description),
+            'END:VEVENT',
+        ]
+        yield ''.join(ics_line(line) for line in lines)
+
+def write_feed_cache(kind, person_id, name):
+    """Regenerates a feed into its cache file; returns (etag, path).
+
+    The file's first line is the ETag so a poll can be answered without
+    reading the body.
+    """
+    generation = read_feed_generation(kind, person_id)
+    path = feed_cache_path(kind, person_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    digest = hashlib.sha1()
+    with open(tmp_path + '.body', 'w', encoding='utf-8', newline='') as body:
+        for chunk in [
+            'BEGIN:VCALENDAR\r\n',
+            'VERSION:2.0\r\n',
+            'PRODID:-//Thomsen Homes//Warranty Claims//EN\r\n',
+            ics_line('X-WR-CALNAME:' + ics_escape(f"Thomsen Homes Work Orders - {name}")),
+        ]:
+            body.write(chunk)
+            digest.update(chunk.encode('utf-8'))
+        for chunk in feed_events(kind, person_id):
+            body.write(chunk)
+            digest.update(chunk.encode('utf-8'))
+        body.write('END:VCALENDAR\r\n')
+        digest.update(b'END:VCALENDAR\r\n')
+    etag = digest.hexdigest()
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as out, \
+            open(tmp_path + '.body', encoding='utf-8', newline='') as body:
+        out.write(etag + '\n')
+        for chunk in iter(lambda: body.read(65536), ''):
+            out.write(chunk)
+    os.remove(tmp_path + '.body')
+    if read_feed_generation(kind, person_id) == generation:
+        os.replace(tmp_path, path)
+        return etag, path
+    # Work orders changed while we were reading; serve this copy once, uncached.
+    return etag, tmp_path
+
+def stream_feed_file(handle, cleanup=None):
+    try:
+        for chunk in iter(lambda: handle.read(65536), b''):
+            yield chunk
+    finally:
+        handle.close()
+        if cleanup:
+            os.remove(cleanup)
+
+@bp.route('/feeds/<kind>/<int:person_id>.ics')
+def calendar_feed(kind, person_id):
+    if kind not in FEED_KINDS or not feed_token_valid(kind, person_id, request.args.get('token', '')):
+        abort(404)
+
+    path = feed_cache_path(kind, person_id)
+    cleanup = None
+    try:
+        handle = open(path, 'rb')
+    except FileNotFoundError:
+        person = db.session.get(FEED_KINDS[kind], person_id)
+        if person is None:
+            abort(404)
+        _, path = write_feed_cache(kind, person_id, person.name)
+        handle = open(path, 'rb')
+        if not path.endswith('.ics'):
+            cleanup = path
+
+    etag = handle.readline().decode().strip()
+    if request.if_none_match.contains(etag):
+        handle.close()
+        if cleanup:
+            os.remove(cleanup)
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+
+    response = current_app.response_class(stream_feed_file(handle, cleanup), mimetype='text/calendar')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
+
 # ... (defer_claim, update_claim_status, claim_log, delete_claim, close_claim, file serving, api, etc. unchanged)
 
+# --- APPLICATION FACTORY ---
+APP_FOLDERS = ('UPLOAD_FOLDER', 'UPLOAD_PARTIAL_FOLDER', 'ICS_FOLDER', 'FEED_CACHE_FOLDER', 'PDF_CACHE_FOLDER',
+               'METRICS_FOLDER', 'FRAGMENT_CACHE_FOLDER')
+
+class AppState:
+    """Caches and per-process resources of one app, in app.extensions['warranty']."""
+    def __init__(self, config):
+        self.lock = threading.Lock()
+        self.reference_data = None
+        self.user_cache = OrderedDict()
+        self.calendar_cache = OrderedDict()
+        self.event_streams = threading.BoundedSemaphore(config['EVENTS_MAX_STREAMS'])
+        self.request_metrics = RequestMetrics()
+        self.mailer = Mailer()
+        self.pdf_pool = None  # (pid, ProcessPoolExecutor), see pdf_render_pool()
+        self.pdf_cache_bytes = None  # see pdf_cache_put()
+        self.pdf_cache_puts = 0
+
+def app_state():
+    return current_app.extensions['warranty']
+
+def create_app(config=None):
+    """Builds a new app: settings, extensions, routes and CLI commands.
+
+    Importing this module only declares the models, routes and commands;
+    it touches neither the database nor the disk. Each call returns an
+    independent app with its own config, engine and caches. ``config``
+    overrides the defaults (tests point the app at a temporary database),
+    then settings derived from others are filled in, the upload/cache
+    folders are created and the extensions are bound. Nothing here
+    connects to the database, so gunicorn can build the app in the master
+    (preload_app) and fork workers from it.
+    """
+    app = Flask(__name__)
+    load_config(app)
+    app.config.update(config or {})
+    app.config.setdefault('UPLOAD_PARTIAL_FOLDER', os.path.join(app.config['UPLOAD_FOLDER'], 'partial'))
+    concurrent_sqlite = sqlite_profile_active(app.config)
+    if concurrent_sqlite:
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', dict(
+            SQLITE_ENGINE_OPTIONS, connect_args={'timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}))
+    for key in APP_FOLDERS:
+        os.makedirs(app.config[key], exist_ok=True)
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+    login_manager.init_app(app)
+    app.register_blueprint(bp)
+    app.view_functions['static'] = serve_static
+    app.extensions['warranty'] = AppState(app.config)
+    with app.app_context():
+        engine = db.engine
+    if concurrent_sqlite:
+        configure_sqlite_engine(engine, app.config['SQLITE_PRAGMAS'])
+    # Forked children (preloaded gunicorn workers, job and PDF pools) must
+    # not share the parent's pooled SQLite connections.
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+    return app
+
+def __getattr__(name):
+    """``app``, built on first use, for ``gunicorn app:app`` and ``flask --app app``."""
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    os.makedirs(app.config['ICS_FOLDER'], exist_ok=True)
+    app = create_app()
     with app.app_context():
-        db.create_all()
+        upgrade()
+        roll_claim_summaries()
     app.run(debug=True)
-
@@ -0,0 +1,191 @@
+"""Deterministic synthetic data for benchmarks.
+
+Fills a database with claims, work orders, log entries, closures and
+photos at realistic ratios. The same --claims, --seed and --anchor always
+produce the same rows; dates are offsets from --anchor (default: today)
+so the Open/Scheduled split on the dashboard looks like production.
+
+    python bench/seed.py --database /tmp/bench.db --claims 10000 [--seed 1]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK = 5000
+BENCH_USER = ('bench@example.com', 'bench')
+
+STREETS = ['Oak', 'Maple', 'Cedar', 'Elm', 'Willow', 'Prairie', 'Bluestem', 'Sunflower',
+           'Cottonwood', 'Meadowlark', 'Hickory', 'Juniper']
+SUFFIXES = ['St', 'Ave', 'Ct', 'Dr', 'Ln', 'Way', 'Cir']
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda',
+               'David', 'Elizabeth', 'Chris', 'Sarah', 'Daniel', 'Karen', 'Matthew', 'Nancy']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson',
+              'Anderson', 'Thomas', 'Taylor', 'Moore', 'Martin', 'Thompson', 'Nguyen', 'Clark']
+WARRANTY_TYPES = ['1-Year Limited Warranty', 'Extended Warranty', 'HVAC', 'Plumbing', 'Electrical',
+                  'Appliances', 'Foundation', 'Framing', 'Siding', 'Roofing (Shingles/Surface)',
+                  'Windows & Doors', 'Flooring - Carpet', 'Flooring - Wood', 'Cabinets']
+ISSUES = ['Water stain on ceiling below upstairs bath', 'Hairline crack in garage slab',
+          'Back door sticks when closing', 'Breaker trips when microwave runs',
+          'AC not cooling upstairs bedrooms', 'Grout cracking in shower',
+          'Kitchen faucet drips constantly', 'Nail pops in living room drywall',
+          'Cabinet door hinge loose', 'Siding panel buckled on north side']
+# Claim status mix; work orders drive Scheduled vs Open on the dashboard.
+STATUS_WEIGHTS = [('Open', 30), ('Scheduled', 35), ('Deferred', 10), ('Closed', 25)]
+TIMES = ['08:00', '09:00', '10:30', '13:00', '14:30', '16:00']
+VENDORS = 25
+ASSIGNEES = 12
+PHOTO_POOL = 40
+
+
+def load_app(database, upload_folder=None):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + database
+    if upload_folder:
+        os.environ['UPLOAD_FOLDER'] = upload_folder
+    sys.path.insert(0, ROOT)
+    import app as module  # module.app is built from the settings above on first use
+    return module
+
+
+def person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def photo_bytes(n):
+    """A small distinct JPEG, so photos exercise content-addressed storage."""
+    from PIL import Image
+    image = Image.new('RGB', (64, 48), ((n * 53) % 256, (n * 97) % 256, (n * 29) % 256))
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=80)
+    out.seek(0)
+    return out
+
+
+def insert_chunks(db, table, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(table.insert(), rows[start:start + CHUNK])
+
+
+def generate(module, claims, seed=1, anchor=None):
+    """Adds ``claims`` synthetic claims and their children. Returns row counts."""
+    db = module.db
+    rng = random.Random(seed)
+    anchor = anchor or date.today()
+    counts = {'claims': claims, 'workorders': 0, 'logs': 0, 'closures': 0, 'photos': 0}
+
+    user = module.User.query.filter_by(email=BENCH_USER[0]).first()
+    if user is None:
+        user = module.User(email=BENCH_USER[0], name='Bench User',
+                           password=module.generate_password_hash(BENCH_USER[1]))
+        db.session.add(user)
+    for n in range(VENDORS):
+        trade = rng.choice(['Plumbing', 'Electric', 'HVAC', 'Drywall', 'Roofing'])
+        db.session.add(module.Vendor(name=f"{rng.choice(LAST_NAMES)} {trade} #{n}",
+                                     contact_number=f"316-555-{n:04d}", email=f"vendor{n}@example.com"))
+    for n in range(ASSIGNEES):
+        db.session.add(module.Assignee(name=f"{person(rng)} #{n}",
+                                       contact_number=f"316-555-{1000 + n:04d}", email=f"tech{n}@example.com"))
+    db.session.flush()
+    vendor_ids = [v for (v,) in db.session.query(module.Vendor.id)]
+    assignee_ids = [a for (a,) in db.session.query(module.Assignee.id)]
+    blobs = [module.store_photo(photo_bytes(n), f"site{n}.jpg") for n in range(PHOTO_POOL)]
+    first_id = (db.session.query(db.func.max(module.Claim.id)).scalar() or 0) + 1
+
+    statuses = [s for s, _ in STATUS_WEIGHTS]
+    weights = [w for _, w in STATUS_WEIGHTS]
+    claim_rows, workorder_rows, log_rows, closure_rows, photo_rows = [], [], [], [], []
+    for claim_id in range(first_id, first_id + claims):
+        status = rng.choices(statuses, weights)[0]
+        reported = anchor - timedelta(days=rng.randint(0, 720))
+        claim_rows.append({
+            'id': claim_id,
+            'address': f"{rng.randint(100, 9999)} {rng.choice(STREETS)} {rng.choice(SUFFIXES)}",
+            'homeowner_name': person(rng),
+            'homeowner_email': f"owner{claim_id}@example.com",
+            'homeowner_phone': f"316-555-{rng.randint(0, 9999):04d}",
+            'warranty_type': rng.choice(WARRANTY_TYPES),
+            'issue_description': rng.choice(ISSUES),
+            'date_reported': reported,
+            'status': status,
+        })
+        stamp = datetime.combine(reported, datetime.min.time()) + timedelta(hours=9)
+        log_rows.append({'claim_id': claim_id, 'user_id': user.id, 'timestamp': stamp,
+                         'action': 'Claim created'})
+        workorders = 0 if status == 'Open' and rng.random() < 0.5 else rng.choice([1, 1, 2, 2, 3, 4])
+        for _ in range(workorders):
+            scheduled = reported + timedelta(days=rng.randint(1, 60))
+            if status == 'Scheduled':
+                # Keep most scheduled claims in the calendar window around the anchor.
+                scheduled = anchor + timedelta(days=rng.randint(-20, 40))
+            workorder_rows.append({
+                'claim_id': claim_id,
+                'vendor_id': rng.choice(vendor_ids) if rng.random() < 0.7 else None,
+                'assignee_id': rng.choice(assignee_ids) if rng.random() < 0.8 else None,
+                'scheduled_date': scheduled,
+                'scheduled_time': rng.choice(TIMES),
+                'status': 'Scheduled',
+                'notes': rng.choice(ISSUES)[:200],
+                'updated_at': stamp,
+                'version': 1,
+            })
+        for _ in range(workorders + rng.randint(1, 4)):
+            stamp += timedelta(hours=rng.randint(1, 96))
+            log_rows.append({'claim_id': claim_id, 'user_id': user.id, 'timestamp': stamp,
+                             'action': rng.choice(['Status changed from Open to Scheduled',
+                                                   'Called homeowner to confirm access',
+                                                   'Vendor on site', 'Parts ordered'])})
+        if status == 'Closed':
+            closure_rows.append({'claim_id': claim_id, 'reasons': 'Repaired', 'notes': 'Completed',
+                                 'timestamp': stamp})
+        for _ in range(rng.choice([0, 0, 1, 2, 3])):
+            blob = rng.choice(blobs)
+            photo_rows.append({'claim_id': claim_id, 'filename': blob.filename,
+                               'content_hash': blob.sha256})
+
+    insert_chunks(db, module.Claim.__table__, claim_rows)
+    insert_chunks(db, module.WorkOrder.__table__, workorder_rows)
+    insert_chunks(db, module.ClaimLog.__table__, log_rows)
+    insert_chunks(db, module.ClaimClosure.__table__, closure_rows)
+    insert_chunks(db, module.ClaimPhoto.__table__, photo_rows)
+    db.session.execute(db.text(
+        "UPDATE photo_blob SET ref_count = "
+        "(SELECT count(*) FROM claim_photo WHERE claim_photo.content_hash = photo_blob.sha256)"))
+    db.session.commit()
+    module.rebuild_claim_summaries()
+    counts.update(workorders=len(workorder_rows), logs=len(log_rows),
+                  closures=len(closure_rows), photos=len(photo_rows))
+    return counts
+
+
+def seed_database(database, claims, seed=1, anchor=None, upload_folder=None):
+    """Creates ``database`` from the migrations and fills it."""
+    module = load_app(database, upload_folder)
+    with module.app.app_context():
+        module.upgrade(directory=os.path.join(ROOT, 'migrations'))
+        counts = generate(module, claims, seed, anchor)
+        # Closing the last connection checkpoints the WAL into the main file.
+        module.db.session.remove()
+        module.db.engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--claims', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--anchor', type=date.fromisoformat, help='YYYY-MM-DD; defaults to today')
+    parser.add_argument('--upload-folder', help='where photo files go (default: UPLOAD_FOLDER)')
+    args = parser.parse_args()
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists")
+    counts = seed_database(os.path.abspath(args.database), args.claims, args.seed, args.anchor,
+                           args.upload_folder and os.path.abspath(args.upload_folder))
+    print(', '.join(f"{value} {name}" for name, value in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Concurrency stress test: N processes doing mixed reads and writes.
+
+Each process logs in with its own test client and, for --seconds, picks
+a read (dashboard section, calendar API, claim view) or a write (claim
+status change, work order reschedule, defer note) at random. Every
+profile runs against its own copy of instance/warranty.db.
+
+    python bench/sqlite_stress.py [--processes 8] [--seconds 10] [--write-ratio 0.3]
+                                  [--profile concurrent --profile legacy]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_CLAIMS = 200
+
+
+def load_app(database, profile):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + database
+    os.environ['SQLITE_ENGINE_PROFILE'] = profile
+    sys.path.insert(0, ROOT)
+    import app as module
+    return module, module.create_app({'TESTING': True})
+
+
+def setup(database, profile):
+    module, app = load_app(database, profile)
+    db = module.db
+    with app.app_context():
+        module.upgrade()
+        if profile == 'legacy':
+            db.session.execute(db.text("PRAGMA journal_mode = DELETE"))
+        user = module.User.query.filter_by(email='stress@example.com').first()
+        if user is None:
+            db.session.add(module.User(email='stress@example.com', name='Stress',
+                                       password=module.generate_password_hash('stress')))
+        for i in range(SEED_CLAIMS):
+            claim = module.Claim(address=f"{i} Stress Test Way", homeowner_name=f"Owner {i}",
+                                 warranty_type='Plumbing', issue_description='stress', status='Scheduled')
+            db.session.add(claim)
+            db.session.flush()
+            db.session.add(module.WorkOrder(claim_id=claim.id, scheduled_date=module.date(2026, 11, 1 + i % 28),
+                                            scheduled_time='09:00', status='Scheduled'))
+        db.session.commit()
+        module.rebuild_claim_summaries()
+        claim_ids = [c for (c,) in db.session.query(module.Claim.id)]
+        workorder_ids = [w for (w,) in db.session.query(module.WorkOrder.id)]
+    return claim_ids, workorder_ids
+
+
+def worker(database, profile, seconds, write_ratio, claim_ids, workorder_ids, seed, results):
+    module, app = load_app(database, profile)
+    random.seed(seed)
+    client = app.test_client()
+    client.post('/login', data={'email': 'stress@example.com', 'password': 'stress'})
+    reads = [
+        lambda: client.get('/dashboard/open'),
+        lambda: client.get('/api/calendar?start=2026-11-01&end=2026-12-01'),
+        lambda: client.get(f'/view_claim/{random.choice(claim_ids)}'),
+    ]
+    writes = [
+        lambda: client.post(f'/update_claim_status/{random.choice(claim_ids)}',
+                            data={'status': random.choice(['Open', 'Scheduled'])}),
+        lambda: client.post('/api/update_workorder_date', json={
+            'workorder_id': random.choice(workorder_ids),
+            'new_date': f"2026-11-{random.randint(1, 28):02d}"}),
+        lambda: client.post(f'/defer_claim/{random.choice(claim_ids)}', data={'notes': 'stress'}),
+    ]
+    stats = {'read': [], 'write': [], 'errors': 0, 'conflicts': 0}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        kind = 'write' if random.random() < write_ratio else 'read'
+        started = time.perf_counter()
+        try:
+            response = random.choice(writes if kind == 'write' else reads)()
+            status = response.status_code
+        except Exception:
+            status = 500
+        elapsed = time.perf_counter() - started
+        if status == 409:
+            stats['conflicts'] += 1
+        elif status >= 500:
+            stats['errors'] += 1
+            continue
+        stats[kind].append(elapsed)
+    results.put(stats)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def run_profile(profile, args, ctx):
+    workdir = tempfile.mkdtemp()
+    database = os.path.join(workdir, 'warranty.db')
+    source = os.path.join(ROOT, 'instance', 'warranty.db')
+    if os.path.exists(source):
+        shutil.copy(source, database)
+    with ctx.Pool(1) as pool:
+        claim_ids, workorder_ids = pool.apply(setup, (database, profile))
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(database, profile, args.seconds, args.write_ratio,
+                                         claim_ids, workorder_ids, n, results))
+        for n in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    shutil.rmtree(workdir)
+    reads = [t for stats in collected for t in stats['read']]
+    writes = [t for stats in collected for t in stats['write']]
+    return {
+        'profile': profile,
+        'ops': (len(reads) + len(writes)) / args.seconds,
+        'reads': len(reads),
+        'writes': len(writes),
+        'errors': sum(stats['errors'] for stats in collected),
+        'conflicts': sum(stats['conflicts'] for stats in collected),
+        'read_p50': percentile(reads, 0.5),
+        'read_p95': percentile(reads, 0.95),
+        'write_p50': percentile(writes, 0.5),
+        'write_p95': percentile(writes, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--profile', action='append', choices=['concurrent', 'legacy'])
+    args = parser.parse_args()
+    ctx = multiprocessing.get_context('spawn')
+
+    print(f"{args.processes} processes, {args.seconds:g}s, {args.write_ratio:.0%} writes")
+    print(f"{'profile':<11} {'ops/s':>8} {'reads':>7} {'writes':>7} {'errors':>7} {'409s':>5} "
+          f"{'read p50/p95 ms':>16} {'write p50/p95 ms':>17}")
+    for profile in args.profile or ['legacy', 'concurrent']:
+        r = run_profile(profile, args, ctx)
+        print(f"{r['profile']:<11} {r['ops']:>8.1f} {r['reads']:>7} {r['writes']:>7} {r['errors']:>7} "
+              f"{r['conflicts']:>5} {r['read_p50']:>7.1f}/{r['read_p95']:<8.1f} "
+              f"{r['write_p50']:>7.1f}/{r['write_p95']:<8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Cold-start cost: import time of app.py and memory per gunicorn worker.
+
+Imports the app in fresh interpreters (median of --runs) and reports the
+time, RSS and module count, then starts gunicorn the way production does
+(`gunicorn app:app` in the app directory, so its gunicorn.conf.py applies),
+warms every worker with the benchmark scenarios and reports RSS, PSS and
+private memory per process. PSS splits shared pages between the processes
+that map them, so its total is what the workers really cost.
+
+    python bench/startup.py [--app-dir DIR] [--app-spec app:app] [--workers 2] [--runs 5]
+
+Point --app-dir at a checkout of another commit to compare before/after
+(with --app-spec 'app:create_app()' for commits where create_app() returned
+the one module-level app).
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+import seed  # noqa: E402
+import suite  # noqa: E402
+
+HEAVY_MODULES = ('reportlab.pdfgen.canvas', 'ics', 'arrow', 'PIL.Image', 'smtplib', 'email.mime.multipart',
+                 'alembic', 'sqlalchemy.orm')
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+seconds = time.perf_counter() - started
+with open('/proc/self/status') as f:
+    rss = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+print(json.dumps({'seconds': seconds, 'rss_kb': rss, 'modules': len(sys.modules),
+                  'heavy': [name for name in %r if name in sys.modules]}))
+"""
+
+
+def app_env(database, uploads):
+    return dict(os.environ, DATABASE_URL='sqlite:///' + database, UPLOAD_FOLDER=uploads,
+                PYTHONDONTWRITEBYTECODE='1')
+
+
+def measure_import(app_dir, database, uploads, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', IMPORT_PROBE % (HEAVY_MODULES,)], cwd=app_dir,
+                             env=app_env(database, uploads), capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        'ms': round(statistics.median(s['seconds'] for s in samples) * 1000),
+        'rss_mb': round(statistics.median(s['rss_kb'] for s in samples) / 1024, 1),
+        'modules': samples[-1]['modules'],
+        'heavy': samples[-1]['heavy'],
+    }
+
+
+def memory_kb(pid):
+    """(rss, pss, private) of one process in kB, from smaps_rollup."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values['Rss'], values['Pss'], values['Private_Clean'] + values['Private_Dirty']
+
+
+def worker_pids(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def measure_workers(app_dir, app_spec, database, uploads, workers, requests, anchor):
+    port = suite.free_port()
+    base = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'warning', app_spec],
+        cwd=app_dir, env=app_env(database, uploads))
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {process.returncode}")
+            try:
+                urllib.request.urlopen(base + '/login', timeout=5).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn did not start within 60s")
+                time.sleep(0.05)
+        ready = time.perf_counter() - started
+        # Wait for every worker, then touch each scenario enough times that
+        # all of them have served (and lazily imported) real pages.
+        while len(worker_pids(process.pid)) < workers:
+            time.sleep(0.1)
+        jar = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar), suite.NoRedirect())
+        login = urllib.parse.urlencode({'email': seed.BENCH_USER[0], 'password': seed.BENCH_USER[1]})
+        try:
+            opener.open(base + '/login', login.encode())
+        except urllib.error.HTTPError as e:
+            if e.code != 302:
+                raise
+        ids = suite.entity_ids(database)
+        rng = random.Random(1)
+        for _, build in suite.scenarios(anchor):
+            if build(ids, rng)[0] != 'GET':
+                continue
+            for _ in range(requests):
+                path = build(ids, rng)[1]
+                try:
+                    with opener.open(base + path) as r:
+                        r.read()
+                except urllib.error.HTTPError as e:
+                    e.read()
+        processes = [('master', process.pid)] + [('worker', pid) for pid in worker_pids(process.pid)]
+        return ready, [(role, pid) + memory_kb(pid) for role, pid in processes]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app-dir', default=ROOT, help='checkout whose app.py is measured')
+    parser.add_argument('--app-spec', default=suite.APP_SPEC, help='gunicorn app to start')
+    parser.add_argument('--claims', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=5, help='fresh imports to take the median of')
+    parser.add_argument('--requests', type=int, default=20, help='warm-up requests per GET scenario')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'thwarranty-bench'))
+    args = parser.parse_args()
+
+    anchor = date.today()
+    database, uploads = suite.dataset(args.data_dir, args.claims, 1, anchor)
+    workdir, copy = suite.working_copy(database)
+    try:
+        imported = measure_import(args.app_dir, copy, uploads, args.runs)
+        print(f"import app: {imported['ms']} ms (median of {args.runs}), {imported['rss_mb']} MB RSS, "
+              f"{imported['modules']} modules")
+        print(f"  heavy modules loaded at import: {', '.join(imported['heavy']) or 'none'}")
+        ready, processes = measure_workers(args.app_dir, args.app_spec, copy, uploads, args.workers, args.requests, anchor)
+        print(f"gunicorn ({args.workers} workers): first response after {ready:.2f} s")
+        print(f"  {'process':<8} {'pid':>7} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11}")
+        for role, pid, rss, pss, private in processes:
+            print(f"  {role:<8} {pid:>7} {rss / 1024:>8.1f} {pss / 1024:>8.1f} {private / 1024:>11.1f}")
+        print(f"  {'total':<8} {'':>7} {sum(p[2] for p in processes) / 1024:>8.1f} "
+              f"{sum(p[3] for p in processes) / 1024:>8.1f} {sum(p[4] for p in processes) / 1024:>11.1f}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+"""End-to-end latency benchmarks against seeded data, checked against a baseline.
+
+Seeds a database per size with bench/seed.py (cached between runs), then
+drives each scenario through the Flask test client or a local gunicorn
+and reports p50/p95/p99 latency, SQL queries per request and RSS.
+
+    python bench/suite.py [--claims 1000 --claims 10000] [--server test-client|gunicorn]
+                          [--requests 200] [--save-baseline] [--no-check]
+
+Exits 1 if any scenario regressed past bench/baseline.json: p95 latency
+or RSS more than --tolerance above the stored value, or more queries per
+request than before. Baselines depend on the machine; re-save them with
+--save-baseline after a deliberate change or on new hardware.
+"""
+import argparse
+import hashlib
+import http.cookiejar
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed  # noqa: E402
+
+BASELINE = os.path.join(ROOT, 'bench', 'baseline.json')
+WARMUP = 10
+APP_SPEC = 'app:app'
+# Regressions smaller than this are noise, whatever the percentage.
+MIN_LATENCY_DELTA_MS = 2.0
+
+
+def scenarios(anchor):
+    """(name, request builder) pairs; a builder returns (method, path, form, json)."""
+    window = f"start={anchor - timedelta(days=7)}&end={anchor + timedelta(days=35)}"
+    times = seed.TIMES
+    sections = ['open', 'scheduled', 'deferred', 'closed']
+    return [
+        ('dashboard', lambda ids, rng: ('GET', '/', None, None)),
+        # The dashboard page loads its four sections with separate requests.
+        ('dashboard_section', lambda ids, rng: ('GET', f"/dashboard/{rng.choice(sections)}", None, None)),
+        ('calendar', lambda ids, rng: ('GET', '/calendar', None, None)),
+        ('calendar_api', lambda ids, rng: ('GET', f'/api/calendar?{window}', None, None)),
+        ('view_claim', lambda ids, rng: ('GET', f"/view_claim/{rng.choice(ids['claims'])}", None, None)),
+        ('claim_log', lambda ids, rng: ('GET', f"/claim_log/{rng.choice(ids['claims'])}", None, None)),
+        ('assign_workorder', lambda ids, rng: ('POST', f"/assign_workorder/{rng.choice(ids['claims'])}", {
+            'vendor': str(rng.choice(ids['vendors'])),
+            'assignee': str(rng.choice(ids['assignees'])),
+            'scheduled_date': str(anchor + timedelta(days=rng.randint(0, 30))),
+            'scheduled_time': rng.choice(times),
+            'status': 'Scheduled',
+            'notes': 'benchmark',
+        }, None)),
+        ('update_workorder_date', lambda ids, rng: ('POST', '/api/update_workorder_date', None, {
+            'workorder_id': rng.choice(ids['workorders']),
+            'new_date': str(anchor + timedelta(days=rng.randint(0, 30))),
+        })),
+    ]
+
+
+def rss_mb(pid='self'):
+    """Resident set size of a process (and its children, for a pid) in MB."""
+    pids = [pid]
+    if pid != 'self':
+        try:
+            with open(f'/proc/{pid}/task/{pid}/children') as f:
+                pids += f.read().split()
+        except OSError:
+            pass
+    total = 0
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    if not total and pid == 'self':
+        import resource
+        total = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return total / 1024
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def summarize(timings, queries, errors, rss):
+    return {
+        'p50': round(percentile(timings, 0.5), 2),
+        'p95': round(percentile(timings, 0.95), 2),
+        'p99': round(percentile(timings, 0.99), 2),
+        'queries': round(sum(queries) / len(queries), 2) if queries else None,
+        'errors': errors,
+        'rss_mb': round(rss, 1),
+    }
+
+
+def dataset(data_dir, claims, seed_value, anchor):
+    """Path of a seeded database and its upload folder, creating them once."""
+    # Keyed by the set of migrations too, so a schema change reseeds.
+    migrations = sorted(os.listdir(os.path.join(ROOT, 'migrations', 'versions')))
+    schema = hashlib.sha1('\n'.join(m for m in migrations if m.endswith('.py')).encode()).hexdigest()[:8]
+    name = f"claims-{claims}-seed-{seed_value}-{anchor}-{schema}"
+    database = os.path.join(data_dir, name + '.db')
+    uploads = os.path.join(data_dir, name + '-uploads')
+    if not os.path.exists(database):
+        os.makedirs(data_dir, exist_ok=True)
+        partial = database + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        shutil.rmtree(uploads, ignore_errors=True)
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            counts = pool.apply(seed.seed_database, (partial, claims, seed_value, anchor, uploads))
+        os.replace(partial, database)
+        print(f"  seeded {database}: " + ', '.join(f"{v} {k}" for k, v in counts.items()), flush=True)
+    return database, uploads
+
+
+def working_copy(database):
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    target = os.path.join(workdir, 'warranty.db')
+    shutil.copy(database, target)
+    return workdir, target
+
+
+def entity_ids(database):
+    import sqlite3
+    connection = sqlite3.connect(database)
+    try:
+        return {
+            table: [row[0] for row in connection.execute(f"SELECT id FROM {name} ORDER BY id")]
+            for table, name in [('claims', 'claim'), ('workorders', 'work_order'),
+                                ('vendors', 'vendor'), ('assignees', 'assignee')]
+        }
+    finally:
+        connection.close()
+
+
+def run_test_client(database, uploads, anchor, requests, seed_value):
+    """Runs every scenario in this process through app.test_client()."""
+    module = seed.load_app(database, uploads)
+    from sqlalchemy import event
+    app = module.app
+    app.config['TESTING'] = True
+    with app.app_context():
+        engine = module.db.engine
+    counter = {'queries': 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter['queries'] += 1
+    event.listen(engine, 'before_cursor_execute', count)
+
+    ids = entity_ids(database)
+    client = app.test_client()
+    client.post('/login', data={'email': seed.BENCH_USER[0], 'password': seed.BENCH_USER[1]})
+    results = {}
+    for name, build in scenarios(anchor):
+        rng = random.Random(seed_value)
+        timings, queries, errors = [], [], 0
+        for i in range(WARMUP + requests):
+            method, path, form, body = build(ids, rng)
+            counter['queries'] = 0
+            started = time.perf_counter()
+            response = client.open(path, method=method, data=form, json=body)
+            response.get_data()
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                errors += 1
+            if i >= WARMUP:
+                timings.append(elapsed)
+                queries.append(counter['queries'])
+        results[name] = summarize(timings, queries, errors, rss_mb())
+    return results
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(database, uploads, workers):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + database, UPLOAD_FOLDER=uploads)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'warning', APP_SPEC],
+        cwd=ROOT, env=env)
+    base = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            urllib.request.urlopen(base + '/login', timeout=5).read()
+            return process, base
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 30s")
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def run_gunicorn(database, uploads, anchor, requests, seed_value, workers):
+    """Runs every scenario over HTTP against `gunicorn app:app`.
+
+    Queries per request are not visible from outside the server and are
+    reported as blank; RSS is the master plus its workers.
+    """
+    process, base = start_gunicorn(database, uploads, workers)
+    try:
+        jar = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar), NoRedirect())
+        login = urllib.parse.urlencode({'email': seed.BENCH_USER[0], 'password': seed.BENCH_USER[1]})
+        try:
+            opener.open(base + '/login', login.encode())
+        except urllib.error.HTTPError as e:
+            if e.code != 302:
+                raise
+        ids = entity_ids(database)
+        results = {}
+        for name, build in scenarios(anchor):
+            rng = random.Random(seed_value)
+            timings, errors = [], 0
+            for i in range(WARMUP + requests):
+                method, path, form, body = build(ids, rng)
+                data, headers = None, {}
+                if form is not None:
+                    data = urllib.parse.urlencode(form).encode()
+                elif body is not None:
+                    data, headers = json.dumps(body).encode(), {'Content-Type': 'application/json'}
+                started = time.perf_counter()
+                try:
+                    with opener.open(urllib.request.Request(base + path, data, headers, method=method)) as r:
+                        r.read()
+                except urllib.error.HTTPError as e:
+                    e.read()
+                    if e.code >= 400:
+                        errors += 1
+                elapsed = time.perf_counter() - started
+                if i >= WARMUP:
+                    timings.append(elapsed)
+            results[name] = summarize(timings, [], errors, rss_mb(process.pid))
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def run_size(args, claims, anchor):
+    database, uploads = dataset(args.data_dir, claims, args.seed, anchor)
+    workdir, copy = working_copy(database)
+    try:
+        if args.server == 'gunicorn':
+            return run_gunicorn(copy, uploads, anchor, args.requests, args.seed, args.workers)
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            return pool.apply(run_test_client, (copy, uploads, anchor, args.requests, args.seed))
+    finally:
+        shutil.rmtree(workdir)
+
+
+def regressions(key, result, base, tolerance):
+    found = []
+    if result['errors']:
+        found.append(f"{result['errors']} failed requests")
+    if base is None:
+        return found
+    limit = base['p95'] * (1 + tolerance)
+    if result['p95'] > limit and result['p95'] - base['p95'] > MIN_LATENCY_DELTA_MS:
+        found.append(f"p95 {result['p95']:.1f}ms > {limit:.1f}ms")
+    if result['queries'] is not None and base.get('queries') is not None \
+            and result['queries'] > base['queries'] + 0.5:
+        found.append(f"{result['queries']:.1f} queries/request > {base['queries']:.1f}")
+    if base.get('rss_mb') and result['rss_mb'] > base['rss_mb'] * (1 + tolerance):
+        found.append(f"RSS {result['rss_mb']:.0f}MB > {base['rss_mb'] * (1 + tolerance):.0f}MB")
+    return [f"{key}: {problem}" for problem in found]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--claims', type=int, action='append', help='dataset size; repeatable (default 1000)')
+    parser.add_argument('--server', choices=['test-client', 'gunicorn'], default='test-client')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--anchor', type=date.fromisoformat, default=date.today())
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'thwarranty-bench'))
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95/RSS growth (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--no-check', action='store_true', help='report only, never fail')
+    args = parser.parse_args()
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    baseline = stored.get('results', {})
+
+    results, problems = {}, []
+    print(f"{'scenario':<40} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'RSS MB':>7} {'base p95':>9}")
+    for claims in args.claims or [1000]:
+        for name, result in run_size(args, claims, args.anchor).items():
+            key = f"{args.server}/{claims}/{name}"
+            base = baseline.get(key)
+            results[key] = result
+            queries = '' if result['queries'] is None else f"{result['queries']:.1f}"
+            print(f"{key:<40} {result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} "
+                  f"{queries:>8} {result['rss_mb']:>7.0f} {base['p95'] if base else '-':>9}", flush=True)
+            problems += regressions(key, result, base, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update(results)
+        stored = {
+            'machine': f"{platform.machine()} {os.cpu_count()} cpu, Python {platform.python_version()}",
+            'requests': args.requests,
+            'results': dict(sorted(baseline.items())),
+        }
+        with open(args.baseline, 'w', newline='\r\n') as f:
+            json.dump(stored, f, indent=2)
+            f.write('\n')
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return
+    if problems:
+        print('\nRegressions:')
+        for problem in problems:
+            print(f"  {problem}")
+        if not args.no_check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Queries per authenticated request, with and without the load_user cache.
+
+Runs against a throwaway copy of the database:
+
+    python bench/user_loader.py [--requests 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    source = os.path.join(ROOT, 'instance', 'warranty.db')
+    target = os.path.join(workdir, 'warranty.db')
+    if os.path.exists(source):
+        shutil.copy(source, target)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + target
+
+    from app import create_app, db, User, upgrade
+    from sqlalchemy import event
+    from werkzeug.security import generate_password_hash
+
+    app = create_app({'TESTING': True})
+
+    counts = {'user': 0, 'total': 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counts['total'] += 1
+        if 'FROM user' in statement:
+            counts['user'] += 1
+
+    with app.app_context():
+        upgrade()
+        engine = db.engine
+        user = User.query.filter_by(email='bench@example.com').first()
+        if user is None:
+            user = User(email='bench@example.com', name='Bench',
+                        password=generate_password_hash('bench'))
+            db.session.add(user)
+            db.session.commit()
+    event.listen(engine, 'before_cursor_execute', count)
+
+    # Cheap authenticated endpoints: the user lookup is a large share of their queries.
+    paths = ['/api/search?q=a', '/dashboard/open?limit=1', '/api/calendar?start=2026-01-01&end=2026-02-01']
+    modes = [
+        ('uncached', {'USER_CACHE_TTL': 0, 'SESSION_USER_IDENTITY': False}),
+        ('ttl cache', {'USER_CACHE_TTL': 300, 'SESSION_USER_IDENTITY': False}),
+        ('session identity', {'USER_CACHE_TTL': 300, 'SESSION_USER_IDENTITY': True}),
+    ]
+    print(f"{'mode':<18} {'user queries/req':>17} {'total queries/req':>18}")
+    for label, config in modes:
+        app.config.update(config)
+        app.extensions['warranty'].user_cache.clear()
+        client = app.test_client()
+        client.post('/login', data={'email': 'bench@example.com', 'password': 'bench'})
+        counts.update(user=0, total=0)
+        for i in range(args.requests):
+            client.get(paths[i % len(paths)])
+        print(f"{label:<18} {counts['user'] / args.requests:>17.3f} {counts['total'] / args.requests:>18.3f}")
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
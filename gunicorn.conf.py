@@ -0,0 +1,23 @@
+"""Gunicorn settings, read from the working directory by `gunicorn app:app`."""
+import gc
+
+# Import the app once in the master and fork workers from it, so the
+# interpreter, SQLAlchemy and the app's own modules are shared copy-on-write
+# instead of being imported again by every worker.
+preload_app = True
+# Threads keep one long-lived /events stream from tying up a whole worker.
+worker_class = 'gthread'
+threads = 8
+
+
+def pre_fork(server, worker):
+    # Objects that exist before the fork are never collected in the worker,
+    # so its GC passes don't write to, and un-share, the master's pages.
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    # Drop the worker's /metrics snapshot; a later worker could get its pid.
+    from app import discard_metric_snapshot
+    with server.app.wsgi().app_context():
+        discard_metric_snapshot(worker.pid)
@@ -0,0 +1,26 @@
+"""work order optimistic-concurrency version
+
+Revision ID: 2c9e4b7a1d58
+Revises: e83a5d1c6f27
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c9e4b7a1d58'
+down_revision = 'e83a5d1c6f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('work_order') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('work_order') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,133 @@
+"""baseline schema
+
+Revision ID: 3a1c9e0b7d21
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+Databases created with db.create_all() before migrations existed already
+have these tables, so each one is only created when missing. That lets
+`flask db upgrade` adopt an existing instance/warranty.db in place.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a1c9e0b7d21'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return name in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade():
+    if not _has_table('user'):
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=100), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('password', sa.String(length=200), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+    if not _has_table('vendor'):
+        op.create_table(
+            'vendor',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('contact_number', sa.String(length=50), nullable=True),
+            sa.Column('email', sa.String(length=100), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if not _has_table('assignee'):
+        op.create_table(
+            'assignee',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('contact_number', sa.String(length=50), nullable=True),
+            sa.Column('email', sa.String(length=100), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if not _has_table('claim'):
+        op.create_table(
+            'claim',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('address', sa.String(length=200), nullable=False),
+            sa.Column('homeowner_name', sa.String(length=100), nullable=True),
+            sa.Column('homeowner_email', sa.String(length=100), nullable=True),
+            sa.Column('homeowner_phone', sa.String(length=50), nullable=True),
+            sa.Column('cobuyer_name', sa.String(length=100), nullable=True),
+            sa.Column('cobuyer_email', sa.String(length=100), nullable=True),
+            sa.Column('cobuyer_phone', sa.String(length=50), nullable=True),
+            sa.Column('warranty_type', sa.String(length=100), nullable=True),
+            sa.Column('issue_description', sa.Text(), nullable=True),
+            sa.Column('date_reported', sa.Date(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('assignee_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['assignee_id'], ['assignee.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if not _has_table('claim_photo'):
+        op.create_table(
+            'claim_photo',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('claim_id', sa.Integer(), nullable=False),
+            sa.Column('filename', sa.String(length=200), nullable=False),
+            sa.ForeignKeyConstraint(['claim_id'], ['claim.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if not _has_table('work_order'):
+        op.create_table(
+            'work_order',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('claim_id', sa.Integer(), nullable=False),
+            sa.Column('vendor_id', sa.Integer(), nullable=True),
+            sa.Column('assignee_id', sa.Integer(), nullable=True),
+            sa.Column('scheduled_date', sa.Date(), nullable=True),
+            sa.Column('scheduled_time', sa.String(length=8), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('notes', sa.String(length=200), nullable=True),
+            sa.ForeignKeyConstraint(['assignee_id'], ['assignee.id']),
+            sa.ForeignKeyConstraint(['claim_id'], ['claim.id']),
+            sa.ForeignKeyConstraint(['vendor_id'], ['vendor.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if not _has_table('claim_log'):
+        op.create_table(
+            'claim_log',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('claim_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.Column('action', sa.String(length=200), nullable=False),
+            sa.ForeignKeyConstraint(['claim_id'], ['claim.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if not _has_table('claim_closure'):
+        op.create_table(
+            'claim_closure',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('claim_id', sa.Integer(), nullable=False),
+            sa.Column('reasons', sa.String(length=400), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['claim_id'], ['claim.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('claim_closure')
+    op.drop_table('claim_log')
+    op.drop_table('work_order')
+    op.drop_table('claim_photo')
+    op.drop_table('claim')
+    op.drop_table('assignee')
+    op.drop_table('vendor')
+    op.drop_table('user')
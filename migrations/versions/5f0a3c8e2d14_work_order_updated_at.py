@@ -0,0 +1,31 @@
+"""work order updated_at
+
+Revision ID: 5f0a3c8e2d14
+Revises: c27b5e9d4f80
+Create Date: 2026-10-17 10:00:00.000000
+
+The calendar API derives its ETag and Last-Modified from the newest
+work order change, so the column is indexed for a cheap MAX().
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f0a3c8e2d14'
+down_revision = 'c27b5e9d4f80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('work_order', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_work_order_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('work_order', schema=None) as batch_op:
+        batch_op.drop_index('ix_work_order_updated_at')
+        batch_op.drop_column('updated_at')
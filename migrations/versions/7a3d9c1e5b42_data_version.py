@@ -0,0 +1,30 @@
+"""data version counters for per-process caches
+
+Revision ID: 7a3d9c1e5b42
+Revises: 2c9e4b7a1d58
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3d9c1e5b42'
+down_revision = '2c9e4b7a1d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_version = op.create_table(
+        'data_version',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(data_version, [{'name': 'reference', 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('data_version')
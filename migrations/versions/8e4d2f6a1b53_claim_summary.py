@@ -0,0 +1,81 @@
+"""claim summary projection
+
+Revision ID: 8e4d2f6a1b53
+Revises: 3a1c9e0b7d21
+Create Date: 2026-10-17 09:05:00.000000
+
+The table is filled here from the existing claims, so the dashboard can
+read it straight away; `flask rebuild-claim-summaries` recomputes it.
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4d2f6a1b53'
+down_revision = '3a1c9e0b7d21'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of claim_summary_rows() in app.py as of this revision: each
+# claim's latest scheduled work order (ties to the lowest id) decides its
+# section and assignment.
+BACKFILL = """
+    INSERT INTO claim_summary (claim_id, address, homeowner_name, warranty_type, date_reported, status,
+                               effective_status, latest_workorder_id, scheduled_date, assignment, refreshed_at)
+    SELECT c.id, c.address, c.homeowner_name, c.warranty_type, c.date_reported, c.status,
+           CASE WHEN c.status IN ('Deferred', 'Closed') THEN c.status
+                WHEN w.scheduled_date >= :today THEN 'Scheduled'
+                ELSE 'Open' END,
+           w.id, w.scheduled_date,
+           CASE WHEN a.id IS NOT NULL AND v.id IS NOT NULL THEN a.name || ', ' || v.name
+                WHEN a.id IS NOT NULL THEN a.name
+                WHEN v.id IS NOT NULL THEN v.name
+                ELSE 'Unassigned' END,
+           :now
+    FROM claim c
+    LEFT JOIN (
+        SELECT id, claim_id, scheduled_date, assignee_id, vendor_id,
+               row_number() OVER (PARTITION BY claim_id ORDER BY scheduled_date DESC, id) AS rank
+        FROM work_order WHERE scheduled_date IS NOT NULL
+    ) w ON w.claim_id = c.id AND w.rank = 1
+    LEFT JOIN assignee a ON a.id = w.assignee_id
+    LEFT JOIN vendor v ON v.id = w.vendor_id
+    WHERE c.id NOT IN (SELECT claim_id FROM claim_summary)
+"""
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'claim_summary' not in inspector.get_table_names():
+        op.create_table(
+            'claim_summary',
+            sa.Column('claim_id', sa.Integer(), nullable=False),
+            sa.Column('address', sa.String(length=200), nullable=False),
+            sa.Column('homeowner_name', sa.String(length=100), nullable=True),
+            sa.Column('warranty_type', sa.String(length=100), nullable=True),
+            sa.Column('date_reported', sa.Date(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('effective_status', sa.String(length=20), nullable=False),
+            sa.Column('latest_workorder_id', sa.Integer(), nullable=True),
+            sa.Column('scheduled_date', sa.Date(), nullable=True),
+            sa.Column('assignment', sa.String(length=210), nullable=False),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['claim_id'], ['claim.id']),
+            sa.PrimaryKeyConstraint('claim_id'),
+        )
+    indexes = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('claim_summary')}
+    if 'ix_claim_summary_section' not in indexes:
+        op.create_index('ix_claim_summary_section', 'claim_summary',
+                        ['effective_status', 'date_reported', 'claim_id'], unique=False)
+    now = datetime.now()
+    op.execute(sa.text(BACKFILL).bindparams(today=now.date().isoformat(), now=now.isoformat(sep=' ')))
+
+
+def downgrade():
+    op.drop_index('ix_claim_summary_section', table_name='claim_summary')
+    op.drop_table('claim_summary')
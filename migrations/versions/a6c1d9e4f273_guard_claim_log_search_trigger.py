@@ -0,0 +1,42 @@
+"""skip the claim_log search trigger once the claim is gone
+
+Revision ID: a6c1d9e4f273
+Revises: d2a7f4c8e3b9
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c1d9e4f273'
+down_revision = 'd2a7f4c8e3b9'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copies of claim_search_log_ad in app.py's CLAIM_SEARCH_DDL, before
+# and after this revision. With the guard, deleting the claim first turns
+# its log deletes into a primary key probe each instead of a group_concat.
+GUARDED = """CREATE TRIGGER claim_search_log_ad AFTER DELETE ON claim_log
+    WHEN EXISTS (SELECT 1 FROM claim WHERE id = old.claim_id) BEGIN
+        UPDATE claim_search SET log_text = coalesce(
+            (SELECT group_concat(action, ' ') FROM claim_log WHERE claim_id = old.claim_id), '')
+        WHERE rowid = old.claim_id;
+    END"""
+UNGUARDED = """CREATE TRIGGER claim_search_log_ad AFTER DELETE ON claim_log BEGIN
+        UPDATE claim_search SET log_text = coalesce(
+            (SELECT group_concat(action, ' ') FROM claim_log WHERE claim_id = old.claim_id), '')
+        WHERE rowid = old.claim_id;
+    END"""
+
+
+def upgrade():
+    op.execute("DROP TRIGGER IF EXISTS claim_search_log_ad")
+    op.execute(GUARDED)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS claim_search_log_ad")
+    op.execute(UNGUARDED)
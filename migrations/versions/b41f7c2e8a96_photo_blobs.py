@@ -0,0 +1,42 @@
+"""content-addressed photo storage
+
+Revision ID: b41f7c2e8a96
+Revises: 9d6e1a4b7c35
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41f7c2e8a96'
+down_revision = '9d6e1a4b7c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'photo_blob',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('ext', sa.String(length=10), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('thumb_ready', sa.Boolean(), nullable=False),
+        sa.Column('web_ready', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    with op.batch_alter_table('claim_photo') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_claim_photo_content_hash', ['content_hash'], unique=False)
+        batch_op.create_foreign_key('fk_claim_photo_content_hash', 'photo_blob', ['content_hash'], ['sha256'])
+
+
+def downgrade():
+    with op.batch_alter_table('claim_photo') as batch_op:
+        batch_op.drop_constraint('fk_claim_photo_content_hash', type_='foreignkey')
+        batch_op.drop_index('ix_claim_photo_content_hash')
+        batch_op.drop_column('content_hash')
+    op.drop_table('photo_blob')
@@ -0,0 +1,42 @@
+"""indexes for the hot query paths
+
+Revision ID: c27b5e9d4f80
+Revises: 8e4d2f6a1b53
+Create Date: 2026-10-17 09:10:00.000000
+
+Each index is matched to a query checked by `flask check-query-plans`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27b5e9d4f80'
+down_revision = '8e4d2f6a1b53'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_claim_status', 'claim', ['status']),
+    ('ix_claim_photo_claim_id', 'claim_photo', ['claim_id']),
+    ('ix_claim_closure_claim_id', 'claim_closure', ['claim_id']),
+    ('ix_claim_log_claim_id_timestamp', 'claim_log', ['claim_id', 'timestamp']),
+    ('ix_work_order_claim_id_id', 'work_order', ['claim_id', 'id']),
+    ('ix_work_order_claim_id_scheduled_date', 'work_order', ['claim_id', 'scheduled_date']),
+    ('ix_work_order_scheduled_date_claim_id', 'work_order', ['scheduled_date', 'claim_id']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,39 @@
+"""resumable photo uploads
+
+Revision ID: c3f9a6e1d8b4
+Revises: b7e4d2c9a1f6
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f9a6e1d8b4'
+down_revision = 'b7e4d2c9a1f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'photo_upload',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=True),
+        sa.Column('filename', sa.String(length=200), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['content_hash'], ['photo_blob.sha256']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_photo_upload_created_at', 'photo_upload', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_photo_upload_created_at', table_name='photo_upload')
+    op.drop_table('photo_upload')
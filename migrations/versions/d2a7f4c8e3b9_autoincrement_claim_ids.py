@@ -0,0 +1,78 @@
+"""never reuse claim and claim child ids
+
+Revision ID: d2a7f4c8e3b9
+Revises: c3f9a6e1d8b4
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7f4c8e3b9'
+down_revision = 'c3f9a6e1d8b4'
+branch_labels = None
+depends_on = None
+
+
+# (live table, archive table) whose ids must not be handed out again.
+TABLES = [
+    ('claim', 'archived_claim'),
+    ('work_order', 'archived_work_order'),
+    ('claim_log', 'archived_claim_log'),
+    ('claim_photo', 'archived_claim_photo'),
+    ('claim_closure', 'archived_claim_closure'),
+]
+
+# Frozen copy of the claim_search triggers (see e83a5d1c6f27); rebuilding
+# claim and claim_log drops them.
+TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS claim_search_ai AFTER INSERT ON claim BEGIN
+        INSERT INTO claim_search(rowid, address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text)
+        VALUES (new.id, new.address, new.homeowner_name, new.cobuyer_name, new.issue_description, new.warranty_type, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_au
+    AFTER UPDATE OF address, homeowner_name, cobuyer_name, issue_description, warranty_type ON claim BEGIN
+        UPDATE claim_search SET address = new.address, homeowner_name = new.homeowner_name,
+            cobuyer_name = new.cobuyer_name, issue_description = new.issue_description,
+            warranty_type = new.warranty_type
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_ad AFTER DELETE ON claim BEGIN
+        DELETE FROM claim_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_log_ai AFTER INSERT ON claim_log BEGIN
+        UPDATE claim_search SET log_text = coalesce(log_text, '') || ' ' || new.action
+        WHERE rowid = new.claim_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_log_ad AFTER DELETE ON claim_log BEGIN
+        UPDATE claim_search SET log_text = coalesce(
+            (SELECT group_concat(action, ' ') FROM claim_log WHERE claim_id = old.claim_id), '')
+        WHERE rowid = old.claim_id;
+    END""",
+]
+
+
+def rebuild(autoincrement):
+    for table, _ in TABLES:
+        with op.batch_alter_table(table, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+    for statement in TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade():
+    rebuild(True)
+    # Start each sequence above every id handed out so far, archived or live.
+    for table, archive in TABLES:
+        op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        op.execute(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table}', max("
+            f"coalesce((SELECT max(id) FROM {table}), 0), coalesce((SELECT max(id) FROM {archive}), 0))"
+        )
+
+
+def downgrade():
+    rebuild(False)
@@ -0,0 +1,68 @@
+"""full-text search over claims
+
+Revision ID: e83a5d1c6f27
+Revises: b41f7c2e8a96
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83a5d1c6f27'
+down_revision = 'b41f7c2e8a96'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of CLAIM_SEARCH_DDL in app.py as of this revision.
+DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS claim_search USING fts5(
+        address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_ai AFTER INSERT ON claim BEGIN
+        INSERT INTO claim_search(rowid, address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text)
+        VALUES (new.id, new.address, new.homeowner_name, new.cobuyer_name, new.issue_description, new.warranty_type, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_au
+    AFTER UPDATE OF address, homeowner_name, cobuyer_name, issue_description, warranty_type ON claim BEGIN
+        UPDATE claim_search SET address = new.address, homeowner_name = new.homeowner_name,
+            cobuyer_name = new.cobuyer_name, issue_description = new.issue_description,
+            warranty_type = new.warranty_type
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_ad AFTER DELETE ON claim BEGIN
+        DELETE FROM claim_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_log_ai AFTER INSERT ON claim_log BEGIN
+        UPDATE claim_search SET log_text = coalesce(log_text, '') || ' ' || new.action
+        WHERE rowid = new.claim_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS claim_search_log_ad AFTER DELETE ON claim_log BEGIN
+        UPDATE claim_search SET log_text = coalesce(
+            (SELECT group_concat(action, ' ') FROM claim_log WHERE claim_id = old.claim_id), '')
+        WHERE rowid = old.claim_id;
+    END""",
+]
+
+BACKFILL = """
+    INSERT INTO claim_search(rowid, address, homeowner_name, cobuyer_name, issue_description, warranty_type, log_text)
+    SELECT c.id, c.address, c.homeowner_name, c.cobuyer_name, c.issue_description, c.warranty_type,
+           coalesce((SELECT group_concat(l.action, ' ') FROM claim_log l WHERE l.claim_id = c.id), '')
+    FROM claim c
+"""
+
+
+def upgrade():
+    for statement in DDL:
+        op.execute(statement)
+    op.execute("DELETE FROM claim_search")
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    for trigger in ('claim_search_log_ad', 'claim_search_log_ai', 'claim_search_ad',
+                    'claim_search_au', 'claim_search_ai'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS claim_search")
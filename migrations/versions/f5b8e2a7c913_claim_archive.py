@@ -0,0 +1,104 @@
+"""archive tables for closed claims
+
+Revision ID: f5b8e2a7c913
+Revises: 7a3d9c1e5b42
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b8e2a7c913'
+down_revision = '7a3d9c1e5b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'archived_claim',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('address', sa.String(length=200), nullable=False),
+        sa.Column('homeowner_name', sa.String(length=100), nullable=True),
+        sa.Column('homeowner_email', sa.String(length=100), nullable=True),
+        sa.Column('homeowner_phone', sa.String(length=50), nullable=True),
+        sa.Column('cobuyer_name', sa.String(length=100), nullable=True),
+        sa.Column('cobuyer_email', sa.String(length=100), nullable=True),
+        sa.Column('cobuyer_phone', sa.String(length=50), nullable=True),
+        sa.Column('warranty_type', sa.String(length=100), nullable=True),
+        sa.Column('issue_description', sa.Text(), nullable=True),
+        sa.Column('date_reported', sa.Date(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('assignee_id', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['assignee_id'], ['assignee.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'archived_work_order',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=False),
+        sa.Column('vendor_id', sa.Integer(), nullable=True),
+        sa.Column('assignee_id', sa.Integer(), nullable=True),
+        sa.Column('scheduled_date', sa.Date(), nullable=True),
+        sa.Column('scheduled_time', sa.String(length=8), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('notes', sa.String(length=200), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+        sa.ForeignKeyConstraint(['claim_id'], ['archived_claim.id']),
+        sa.ForeignKeyConstraint(['vendor_id'], ['vendor.id']),
+        sa.ForeignKeyConstraint(['assignee_id'], ['assignee.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_archived_work_order_claim_id', 'archived_work_order', ['claim_id'], unique=False)
+    op.create_table(
+        'archived_claim_log',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.Column('action', sa.String(length=200), nullable=False),
+        sa.ForeignKeyConstraint(['claim_id'], ['archived_claim.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_archived_claim_log_claim_id', 'archived_claim_log', ['claim_id'], unique=False)
+    op.create_table(
+        'archived_claim_photo',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=200), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.ForeignKeyConstraint(['claim_id'], ['archived_claim.id']),
+        sa.ForeignKeyConstraint(['content_hash'], ['photo_blob.sha256']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_archived_claim_photo_claim_id', 'archived_claim_photo', ['claim_id'], unique=False)
+    op.create_index('ix_archived_claim_photo_content_hash', 'archived_claim_photo', ['content_hash'], unique=False)
+    op.create_table(
+        'archived_claim_closure',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=False),
+        sa.Column('reasons', sa.String(length=400), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['claim_id'], ['archived_claim.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_archived_claim_closure_claim_id', 'archived_claim_closure', ['claim_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_archived_claim_closure_claim_id', table_name='archived_claim_closure')
+    op.drop_table('archived_claim_closure')
+    op.drop_index('ix_archived_claim_photo_content_hash', table_name='archived_claim_photo')
+    op.drop_index('ix_archived_claim_photo_claim_id', table_name='archived_claim_photo')
+    op.drop_table('archived_claim_photo')
+    op.drop_index('ix_archived_claim_log_claim_id', table_name='archived_claim_log')
+    op.drop_table('archived_claim_log')
+    op.drop_index('ix_archived_work_order_claim_id', table_name='archived_work_order')
+    op.drop_table('archived_work_order')
+    op.drop_table('archived_claim')
@@ -0,0 +1,61 @@
+"""Runs the app against a throwaway database and throwaway folders."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as warranty  # noqa: E402
+
+DATA_DIR = tempfile.mkdtemp(prefix='thwarranty-tests-')
+TEST_CONFIG = {
+    'TESTING': True,
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(DATA_DIR, 'warranty.db'),
+    'UPLOAD_FOLDER': os.path.join(DATA_DIR, 'uploads'),
+    'ICS_FOLDER': os.path.join(DATA_DIR, 'ics'),
+    'FEED_CACHE_FOLDER': os.path.join(DATA_DIR, 'feeds'),
+    'PDF_CACHE_FOLDER': os.path.join(DATA_DIR, 'pdf_cache'),
+    'METRICS_FOLDER': os.path.join(DATA_DIR, 'metrics'),
+    'FRAGMENT_CACHE_FOLDER': os.path.join(DATA_DIR, 'fragments'),
+}
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = warranty.create_app(TEST_CONFIG)
+    with app.app_context():
+        warranty.upgrade(directory=os.path.join(ROOT, 'migrations'))
+    return app
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        user = warranty.User.query.filter_by(email='tests@example.com').first()
+        if user is None:
+            user = warranty.User(email='tests@example.com', name='Tests', password='tests')
+            warranty.db.session.add(user)
+            warranty.db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user)
+    return client
+
+
+def claim_form(address, **fields):
+    """Form fields for POST /add_claim."""
+    form = {
+        'address': address, 'homeowner_name': 'Pat Owner', 'homeowner_email': 'pat@example.com',
+        'homeowner_phone': '555-0100', 'cobuyer_name': '', 'cobuyer_email': '', 'cobuyer_phone': '',
+        'warranty_type': 'Other', 'issue_description': 'Test issue',
+    }
+    form.update(fields)
+    return form
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import app as warranty
+from conftest import DATA_DIR, ROOT
+
+IMPORT_ONLY = """
+import os, sys
+import app
+assert 'app' not in vars(app)
+assert not os.path.exists(os.environ['UPLOAD_FOLDER'])
+"""
+
+
+def test_import_binds_nothing_and_creates_no_folders(tmp_path):
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + str(tmp_path / 'never.db'),
+               UPLOAD_FOLDER=str(tmp_path / 'uploads'))
+    subprocess.run([sys.executable, '-c', IMPORT_ONLY], cwd=ROOT, env=env, check=True)
+    assert not (tmp_path / 'never.db').exists()
+
+
+def test_create_app_applies_config(app):
+    assert app.config['UPLOAD_PARTIAL_FOLDER'] == os.path.join(DATA_DIR, 'uploads', 'partial')
+    assert os.path.isdir(app.config['UPLOAD_PARTIAL_FOLDER'])
+    with app.app_context():
+        assert warranty.db.engine.url.database == os.path.join(DATA_DIR, 'warranty.db')
+
+
+def app_config(folder):
+    return {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(folder / 'warranty.db'),
+        'EVENTS_MAX_STREAMS': 1,
+        **{key: str(folder / key.lower()) for key in warranty.APP_FOLDERS if key != 'UPLOAD_PARTIAL_FOLDER'},
+    }
+
+
+def test_apps_are_independent(tmp_path):
+    first = warranty.create_app(app_config(tmp_path / 'first'))
+    second = warranty.create_app(dict(app_config(tmp_path / 'second'), USER_CACHE_TTL=0))
+    assert first is not second
+    assert first.config['USER_CACHE_TTL'] == 300 and second.config['USER_CACHE_TTL'] == 0
+    assert first.extensions['warranty'] is not second.extensions['warranty']
+    for app in (first, second):
+        with app.app_context():
+            warranty.upgrade(directory=os.path.join(ROOT, 'migrations'))
+
+    with first.app_context():
+        warranty.db.session.add(warranty.User(email='first@example.com', name='First', password='x'))
+        warranty.db.session.commit()
+        first_user = warranty.User.query.filter_by(email='first@example.com').one().id
+        assert warranty.cached_user(first_user).name == 'First'
+        assert warranty.db.session.execute(warranty.db.text("PRAGMA journal_mode")).scalar() == 'wal'
+    with second.app_context():
+        assert warranty.User.query.filter_by(email='first@example.com').first() is None
+        assert warranty.db.engine.url.database == str(tmp_path / 'second' / 'warranty.db')
+    assert first_user in first.extensions['warranty'].user_cache
+    assert not second.extensions['warranty'].user_cache
+    assert os.path.isdir(tmp_path / 'second' / 'upload_folder' / 'partial')
+
+    response = second.test_client().get('/login')
+    assert response.status_code == 200
+    for app in (first, second):
+        with app.app_context():
+            warranty.db.engine.dispose()
@@ -0,0 +1,54 @@
+import app as warranty
+from conftest import claim_form
+
+
+def add_claim(client, address):
+    response = client.post('/add_claim', data=claim_form(address))
+    assert response.status_code == 302
+    return warranty.Claim.query.filter_by(address=address).one().id
+
+
+def test_archived_claim_ids_are_not_reused(app, client):
+    with app.app_context():
+        archived_id = add_claim(client, '1 Archive Lane')
+        newest_id = add_claim(client, '2 Archive Lane')
+        warranty.run_write_transaction(lambda: warranty.archive_claims([archived_id]))
+        assert client.post(f'/delete_claim/{newest_id}').status_code == 302
+
+        # SQLite would hand out max(id) + 1 == archived_id without AUTOINCREMENT.
+        new_id = add_claim(client, '3 Archive Lane')
+        assert new_id not in (archived_id, newest_id)
+        assert warranty.db.session.get(warranty.ArchivedClaim, archived_id) is not None
+        assert client.get(f'/view_claim/{new_id}').status_code == 200
+
+
+def test_restore_claim_after_new_claims(app, client):
+    with app.app_context():
+        archived_id = add_claim(client, '4 Archive Lane')
+        warranty.run_write_transaction(lambda: warranty.archive_claims([archived_id]))
+        add_claim(client, '5 Archive Lane')
+
+        assert warranty.run_write_transaction(lambda: warranty.restore_claim(archived_id))
+        assert warranty.db.session.get(warranty.Claim, archived_id).address == '4 Archive Lane'
+
+
+def test_archive_takes_finished_jobs_and_keeps_the_claim_searchable(app, client, user):
+    with app.app_context():
+        archived_id = add_claim(client, '6 Archive Lane')
+        live_id = add_claim(client, '7 Archive Lane')
+        for claim_id, action in [(archived_id, 'Gutter resealed'), (live_id, 'Gutter inspected')]:
+            warranty.db.session.add(warranty.ClaimLog(claim_id=claim_id, user_id=user, action=action))
+        warranty.enqueue_job('photo_derivatives', {}, claim_id=archived_id).status = 'done'
+        warranty.db.session.commit()
+
+        warranty.run_write_transaction(lambda: warranty.archive_claims([archived_id]))
+        assert warranty.Job.query.filter_by(claim_id=archived_id).count() == 0
+        assert warranty.ArchivedClaimLog.query.filter_by(claim_id=archived_id).count() >= 1
+        results = {result['id']: result['archived'] for result in warranty.search_claims('gutter')}
+        assert results == {archived_id: True, live_id: False}
+        assert [result['id'] for result in warranty.search_claims('resealed')] == [archived_id]
+
+        # Deleting a live claim's log still re-indexes it.
+        warranty.ClaimLog.query.filter_by(claim_id=live_id, action='Gutter inspected').delete()
+        warranty.db.session.commit()
+        assert [result['id'] for result in warranty.search_claims('gutter')] == [archived_id]
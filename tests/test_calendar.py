@@ -0,0 +1,54 @@
+import app as warranty
+
+CALENDAR_RANGE = '/api/calendar?start=2026-11-01&end=2026-12-01'
+
+
+def test_calendar_etag_follows_the_claims_counter(app, client):
+    first = client.get(CALENDAR_RANGE)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get(CALENDAR_RANGE, headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        claim = warranty.Claim(address='30 Calendar Court')
+        warranty.db.session.add(claim)
+        warranty.db.session.flush()
+        warranty.db.session.add(warranty.WorkOrder(claim_id=claim.id, scheduled_date=warranty.date(2026, 11, 9),
+                                                   scheduled_time='09:00', status='Scheduled'))
+        warranty.run_write_transaction(lambda: warranty.commit_claim_changes([claim.id]))
+
+    second = client.get(CALENDAR_RANGE, headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    assert '30 Calendar Court' in second.get_data(as_text=True)
+
+
+def test_feed_changes_with_its_work_orders(app, client):
+    with app.app_context():
+        vendor = warranty.Vendor(name='Feed Roofing')
+        claim = warranty.Claim(address='31 Feed Street')
+        warranty.db.session.add_all([vendor, claim])
+        warranty.db.session.flush()
+        workorder = warranty.WorkOrder(claim_id=claim.id, vendor_id=vendor.id, status='Scheduled',
+                                       scheduled_date=warranty.date(2026, 11, 10), scheduled_time='09:00')
+        warranty.db.session.add(workorder)
+        warranty.run_write_transaction(lambda: warranty.commit_claim_changes([claim.id]))
+        url = f'/feeds/vendor/{vendor.id}.ics?token=' + warranty.feed_token('vendor', vendor.id)
+        workorder_id, version = workorder.id, workorder.version
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert 'DTSTART:20261110T150000Z' in first.get_data(as_text=True)
+    etag = first.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    moved = client.post('/api/update_workorder_date', json={
+        'workorder_id': workorder_id, 'new_date': '2026-11-12', 'new_time': '13:30', 'version': version})
+    assert moved.status_code == 200
+
+    second = client.get(url, headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    body = second.get_data(as_text=True)
+    assert 'DTSTART:20261112T193000Z' in body
+    assert '20261110T150000Z' not in body
@@ -0,0 +1,27 @@
+import app as warranty
+
+
+def claims_generation():
+    return warranty.db.session.query(warranty.DataVersion.version).filter_by(name='claims').scalar() or 0
+
+
+def latest_change_event():
+    return warranty.db.session.query(warranty.db.func.max(warranty.ChangeEvent.id)).scalar()
+
+
+def test_no_claim_ids_leaves_caches_alone(app):
+    with app.app_context():
+        generation, event = claims_generation(), latest_change_event()
+        warranty.run_write_transaction(lambda: warranty.commit_claim_changes([]))
+        assert claims_generation() == generation
+        assert latest_change_event() == event
+
+
+def test_claim_change_bumps_the_generation(app):
+    with app.app_context():
+        claim = warranty.Claim(address='20 Generation Road')
+        warranty.db.session.add(claim)
+        warranty.db.session.commit()
+        generation = claims_generation()
+        warranty.run_write_transaction(lambda: warranty.commit_claim_changes([claim.id]))
+        assert claims_generation() == generation + 1
@@ -0,0 +1,89 @@
+import glob
+import importlib.util
+import os
+from datetime import date, datetime, timedelta
+
+import app as warranty
+from conftest import ROOT
+
+
+def baseline_sections(claim_ids, now):
+    """The dashboard's per-claim logic from before the ClaimSummary projection."""
+    claims = warranty.Claim.query.filter(warranty.Claim.id.in_(claim_ids)).all()
+    workorders = warranty.WorkOrder.query.order_by(warranty.WorkOrder.id).all()
+    expected = {}
+    for claim in claims:
+        wos = [wo for wo in workorders if wo.claim_id == claim.id]
+        if claim.status in ("Deferred", "Closed"):
+            status = claim.status
+        elif any(wo.scheduled_date and wo.scheduled_date >= now for wo in wos):
+            status = "Scheduled"
+        else:
+            status = "Open"
+        scheduled_date, assignment = "", "Unassigned"
+        scheduled_wos = [wo for wo in wos if wo.scheduled_date]
+        if scheduled_wos:
+            latest = max(scheduled_wos, key=lambda wo: wo.scheduled_date)
+            scheduled_date = latest.scheduled_date.strftime('%Y-%m-%d')
+            assigned = [person.name for person in (latest.assignee, latest.vendor) if person]
+            assignment = ', '.join(assigned) if assigned else "Unassigned"
+        expected[claim.id] = (status, scheduled_date, assignment)
+    return expected
+
+
+def projected_sections(claim_ids):
+    rows = warranty.ClaimSummary.query.filter(warranty.ClaimSummary.claim_id.in_(claim_ids))
+    return {row.claim_id: (row.effective_status,
+                           row.scheduled_date.strftime('%Y-%m-%d') if row.scheduled_date else "",
+                           row.assignment) for row in rows}
+
+
+def add_claims():
+    session = warranty.db.session
+    today = date.today()
+    vendor = warranty.Vendor(name='Summary Plumbing')
+    assignee = warranty.Assignee(name='Summary Tech')
+    session.add_all([vendor, assignee])
+    claims = {name: warranty.Claim(address=f'{name} Summary Street', status=status) for name, status in [
+        ('open', 'Open'), ('lapsed', 'Open'), ('scheduled', 'Open'), ('tied', 'Open'),
+        ('deferred', 'Deferred'), ('closed', 'Closed')]}
+    session.add_all(claims.values())
+    session.flush()
+
+    def workorder(claim, days, **people):
+        session.add(warranty.WorkOrder(claim_id=claims[claim].id, scheduled_date=today + timedelta(days=days),
+                                       scheduled_time='09:00', status='Scheduled', **people))
+    workorder('lapsed', -3, vendor_id=vendor.id)
+    workorder('scheduled', -10, assignee_id=assignee.id)
+    workorder('scheduled', 5, assignee_id=assignee.id, vendor_id=vendor.id)
+    workorder('tied', 2, vendor_id=vendor.id)
+    workorder('tied', 2, assignee_id=assignee.id)
+    workorder('deferred', 7, assignee_id=assignee.id)
+    workorder('closed', -1)
+    session.add(warranty.WorkOrder(claim_id=claims['open'].id, status='Pending'))
+    session.flush()
+    return [claim.id for claim in claims.values()]
+
+
+def test_projection_matches_the_per_claim_logic(app):
+    with app.app_context():
+        claim_ids = add_claims()
+        warranty.run_write_transaction(lambda: warranty.commit_claim_changes(claim_ids))
+        expected = baseline_sections(claim_ids, date.today())
+        assert {status for status, _, _ in expected.values()} == {'Open', 'Scheduled', 'Deferred', 'Closed'}
+        assert projected_sections(claim_ids) == expected
+
+
+def test_migration_backfill_matches_the_per_claim_logic(app):
+    path, = glob.glob(os.path.join(ROOT, 'migrations', 'versions', '8e4d2f6a1b53_*.py'))
+    spec = importlib.util.spec_from_file_location('claim_summary_migration', path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with app.app_context():
+        claim_ids = add_claims()
+        warranty.db.session.commit()
+        now = datetime.now()
+        warranty.db.session.execute(warranty.db.text(migration.BACKFILL),
+                                    {'today': now.date().isoformat(), 'now': now.isoformat(sep=' ')})
+        warranty.db.session.commit()
+        assert projected_sections(claim_ids) == baseline_sections(claim_ids, now.date())
@@ -0,0 +1,27 @@
+import io
+
+import app as warranty
+from conftest import claim_form
+
+
+def test_add_claim_with_photo_has_summary(app, client):
+    form = claim_form('10 Summary Street', photos=(io.BytesIO(b'not really a jpeg'), 'front.jpg'))
+    assert client.post('/add_claim', data=form).status_code == 302
+    with app.app_context():
+        claim = warranty.Claim.query.filter_by(address='10 Summary Street').one()
+        assert len(claim.photos) == 1
+        assert warranty.db.session.get(warranty.ClaimSummary, claim.id) is not None
+
+
+def test_add_claim_failing_photo_stores_nothing(app, client, monkeypatch):
+    def broken_store(stream, name):
+        raise OSError('disk full')
+    monkeypatch.setattr(warranty, 'store_photo', broken_store)
+
+    form = claim_form('11 Summary Street', photos=(io.BytesIO(b'photo'), 'front.jpg'))
+    response = client.post('/add_claim', data=form)
+    assert response.status_code == 200
+    with client.session_transaction() as session:
+        assert 'disk full' in session['_flashes'][-1][1]
+    with app.app_context():
+        assert warranty.Claim.query.filter_by(address='11 Summary Street').count() == 0
@@ -0,0 +1,51 @@
+import json
+
+import app as warranty
+
+
+def sse_messages(body):
+    """(id, event, data) for each message in a text/event-stream body."""
+    messages = []
+    for block in body.strip().split('\n\n'):
+        fields = {}
+        for line in block.split('\n'):
+            name, _, value = line.partition(': ')
+            fields[name] = value
+        if 'event' in fields:
+            messages.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    return messages
+
+
+def test_events_stream_a_claim_change(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'EVENTS_STREAM_SECONDS', 0)
+    with app.app_context():
+        since = warranty.latest_change_id()
+        claim = warranty.Claim(address='60 Event Street', status='Deferred')
+        warranty.db.session.add(claim)
+        warranty.db.session.flush()
+        warranty.run_write_transaction(lambda: warranty.commit_claim_changes([claim.id]))
+        claim_id = claim.id
+
+    response = client.get('/events', headers={'Last-Event-ID': str(since)})
+    assert response.mimetype == 'text/event-stream'
+    messages = sse_messages(response.get_data(as_text=True))
+    assert [(event, data) for _, event, data in messages] == [('claim', {
+        'id': claim_id, 'section': 'deferred', 'status': 'Deferred',
+        'assignment': 'Unassigned', 'scheduled_date': '',
+    })]
+    assert int(messages[0][0]) > since
+
+
+def test_dashboard_row_is_rendered_for_one_claim(app, client):
+    with app.app_context():
+        claim = warranty.Claim(address='62 Event Street', status='Deferred')
+        warranty.db.session.add(claim)
+        warranty.db.session.flush()
+        warranty.run_write_transaction(lambda: warranty.commit_claim_changes([claim.id]))
+        claim_id = claim.id
+
+    html = client.get(f'/dashboard/row/{claim_id}').get_data(as_text=True)
+    assert html.count('<tr ') == 1
+    assert '<span class="status-deferred">Deferred</span>' in html
+    assert f'/defer_claim/{claim_id}' in html
+    assert client.get('/dashboard/row/999999').status_code == 404
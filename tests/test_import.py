@@ -0,0 +1,15 @@
+import io
+
+import app as warranty
+
+
+def test_csv_errors_name_the_line_after_multiline_fields(app):
+    csv_text = (
+        'name,contact_number\n'
+        '"Acme\nPlumbing",555-0101\n'  # lines 2-3
+        ',555-0102\n'                  # line 4: no name
+    )
+    with app.app_context():
+        report = warranty.import_records('vendors', io.BytesIO(csv_text.encode()), 'csv', dry_run=True)
+    assert report['inserted'] == 1
+    assert report['errors'] == [(4, 'name: required')]
@@ -0,0 +1,54 @@
+import io
+import json
+
+import pytest
+from sqlalchemy import exc
+
+import app as warranty
+
+
+class StopWorker(Exception):
+    pass
+
+
+def test_worker_survives_database_errors(app, monkeypatch):
+    calls = {'requeue': 0, 'run': 0}
+    sleeps = []
+
+    def requeue():
+        calls['requeue'] += 1
+
+    def run_pending():
+        calls['run'] += 1
+        if calls['run'] == 1:
+            raise exc.OperationalError('SELECT', {}, Exception('database is locked'))
+        return 0
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise StopWorker
+
+    monkeypatch.setattr(warranty, 'requeue_stale_jobs', requeue)
+    monkeypatch.setattr(warranty, 'run_pending_jobs', run_pending)
+    monkeypatch.setattr(warranty.time, 'sleep', sleep)
+    with app.app_context(), pytest.raises(StopWorker):
+        warranty.worker_loop()
+
+    assert calls['run'] == 2
+    assert sleeps == [warranty.JOB_ERROR_BACKOFF_SECONDS[0], warranty.JOB_POLL_SECONDS]
+    # Stale leases are looked for once every JOB_REQUEUE_SECONDS, not on every poll.
+    assert calls['requeue'] == 1
+
+
+def test_photo_derivatives_finish_for_files_that_are_not_images(app):
+    with app.app_context():
+        blob = warranty.store_photo(io.BytesIO(b'%PDF-1.4 not a photo'), 'receipt.jpg')
+        warranty.db.session.commit()
+        job = next(job for job in warranty.Job.query.filter_by(kind='photo_derivatives', status='queued')
+                   if json.loads(job.payload)['sha256'] == blob.sha256)
+        assert warranty.run_job(job)
+        job = warranty.db.session.get(warranty.Job, job.id)
+        assert job.status == 'done'
+        assert job.result.startswith('Not an image')
+        assert not warranty.db.session.get(warranty.PhotoBlob, blob.sha256).thumb_ready
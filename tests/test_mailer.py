@@ -0,0 +1,104 @@
+import socket
+import socketserver
+import threading
+from email.message import EmailMessage
+
+import pytest
+
+import app as warranty
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: no extensions, every command accepted."""
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            connection = server.connections
+            server.open_sockets.append(self.request)
+        self.reply('220 stub ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.reply('354 end with .')
+                body = []
+                for line in iter(self.rfile.readline, b''):
+                    if line.rstrip(b'\r\n') == b'.':
+                        break
+                    body.append(line)
+                with server.lock:
+                    server.messages.append((connection, b''.join(body)))
+                self.reply('250 queued')
+            elif command == b'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+    def reply(self, text):
+        self.wfile.write(text.encode() + b'\r\n')
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubSMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.open_sockets = []
+
+    def drop_connections(self):
+        """Hangs up on every client, as a server does on its idle timeout."""
+        with self.lock:
+            sockets, self.open_sockets = self.open_sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def smtp_server(app, monkeypatch):
+    server = StubSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for key, value in {'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': server.server_address[1],
+                       'MAIL_USE_TLS': False, 'MAIL_USERNAME': None, 'MAIL_TIMEOUT': 5}.items():
+        monkeypatch.setitem(app.config, key, value)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def message(subject):
+    msg = EmailMessage()
+    msg['From'] = 'warranty@example.com'
+    msg['To'] = 'vendor@example.com'
+    msg['Subject'] = subject
+    msg.set_content('Work order scheduled.')
+    return msg
+
+
+def test_mailer_reuses_its_connection_and_reconnects_after_a_drop(app, smtp_server):
+    mailer = warranty.Mailer()
+    with app.app_context():
+        mailer.send(message('first'))
+        mailer.send(message('second'))
+        assert smtp_server.connections == 1
+
+        smtp_server.drop_connections()
+        mailer.send(message('third'))
+        mailer.close()
+
+    assert smtp_server.connections == 2
+    assert [connection for connection, _ in smtp_server.messages] == [1, 1, 2]
+    for (_, body), subject in zip(smtp_server.messages, [b'first', b'second', b'third']):
+        assert b'Subject: ' + subject in body
+    assert mailer.smtp is None
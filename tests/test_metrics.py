@@ -0,0 +1,39 @@
+import json
+import os
+
+import app as warranty
+
+
+def test_metrics_without_token_only_answers_this_host(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 404
+
+
+def test_metrics_token_is_required_when_set(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'secret')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secret'},
+                          environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    assert response.status_code == 200
+
+
+def test_snapshots_of_dead_processes_are_dropped(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    dead_pid = 2 ** 22 + 1  # above Linux's pid_max
+    with app.app_context():
+        path = warranty.metric_snapshot_path(dead_pid)
+    with open(path, 'w') as f:
+        json.dump({'counters': {'http_requests_total': {'route="/gone"': 99}}, 'histograms': {}}, f)
+
+    body = app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'route="/gone"' not in body
+    assert not os.path.exists(path)
+
+    with open(path, 'w') as f:
+        f.write('{}')
+    with app.app_context():
+        warranty.discard_metric_snapshot(dead_pid)
+    assert not os.path.exists(path)
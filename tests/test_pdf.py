@@ -0,0 +1,31 @@
+import os
+
+import app as warranty
+
+
+def pages(n):
+    return [[f"Work order {n}", "Scheduled Date: 2026-11-02"]]
+
+
+def test_bulk_render_uses_one_kept_pool(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PDF_POOL_THRESHOLD', 2)
+    monkeypatch.setitem(app.config, 'PDF_RENDER_PROCESSES', 2)
+    with app.app_context():
+        page_sets = [pages(f"pool-{i}") for i in range(3)]
+        rendered = warranty.render_workorder_pdfs_parallel(page_sets)
+        assert sorted(rendered) == sorted(warranty.pdf_content_hash(p) for p in page_sets)
+        assert all(data.startswith(b'%PDF') for data in rendered.values())
+        pool = warranty.pdf_render_pool()
+        warranty.render_workorder_pdfs_parallel([pages(f"again-{i}") for i in range(3)])
+        assert warranty.pdf_render_pool() is pool
+
+
+def test_cache_is_pruned_to_its_cap(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PDF_CACHE_MAX_BYTES', 3000)
+    folder = app.config['PDF_CACHE_FOLDER']
+    with app.app_context():
+        for i in range(20):
+            warranty.pdf_cache_put(f"{i:064x}", b'x' * 1000)
+        sizes = [entry.stat().st_size for entry in os.scandir(folder) if entry.name.endswith('.pdf')]
+        assert sum(sizes) <= 3000
+        assert os.path.exists(os.path.join(folder, f"{19:064x}.pdf"))
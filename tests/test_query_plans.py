@@ -0,0 +1,37 @@
+"""The hot read paths keep using the indexes they were tuned for.
+
+Same checks as `flask check-query-plans`, run against a freshly migrated
+database so a model or migration change that drops an index fails here.
+"""
+import pytest
+
+import app as warranty
+
+
+HOT_PATHS = [
+    'view_claim latest work order',
+    'view_claim photos',
+    'view_claim_log',
+    'view_claim_log next page',
+    'calendar range',
+    'dashboard section',
+]
+
+
+@pytest.fixture(scope='module')
+def plans(app):
+    with app.app_context():
+        return {name: (warranty.explain_query_plan(query), required, forbidden)
+                for name, query, required, forbidden in warranty.hot_query_plans()}
+
+
+@pytest.mark.parametrize('name', HOT_PATHS)
+def test_hot_query_uses_its_index(plans, name):
+    plan, required, forbidden = plans[name]
+    assert any(required in line for line in plan), plan
+    assert not any(bad in line for bad in forbidden for line in plan), plan
+
+
+def test_every_hot_query_is_covered(plans):
+    # A path added to hot_query_plans() gets listed in HOT_PATHS too.
+    assert sorted(plans) == sorted(HOT_PATHS)
@@ -0,0 +1,65 @@
+from datetime import date
+
+import app as warranty
+
+
+def add_workorders(count):
+    claim = warranty.Claim(address='40 Reschedule Row')
+    warranty.db.session.add(claim)
+    warranty.db.session.flush()
+    workorders = [warranty.WorkOrder(claim_id=claim.id, scheduled_date=date(2026, 11, 2),
+                                     scheduled_time='09:00', status='Scheduled') for _ in range(count)]
+    warranty.db.session.add_all(workorders)
+    warranty.db.session.commit()
+    return claim.id, [(workorder.id, workorder.version) for workorder in workorders]
+
+
+def state(claim_id, ids):
+    warranty.db.session.expire_all()
+    rows = {wo.id: (wo.scheduled_date, wo.version) for wo in
+            warranty.WorkOrder.query.filter(warranty.WorkOrder.id.in_(ids))}
+    logs = warranty.ClaimLog.query.filter_by(claim_id=claim_id).count()
+    return rows, logs
+
+
+def test_stale_version_is_a_conflict_for_that_move_only(app, client):
+    with app.app_context():
+        claim_id, ((first, first_version), (second, second_version)) = add_workorders(2)
+    response = client.post('/api/workorders/reschedule', json={'moves': [
+        {'workorder_id': first, 'new_date': '2026-11-05', 'version': first_version},
+        {'workorder_id': second, 'new_date': '2026-11-06', 'version': second_version - 1},
+    ]})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['applied'] == 1 and not body['success']
+    assert [result['status'] for result in body['results']] == ['ok', 'conflict']
+    assert body['results'][1]['version'] == second_version
+
+    with app.app_context():
+        rows, logs = state(claim_id, [first, second])
+    assert rows[first] == (date(2026, 11, 5), first_version + 1)
+    assert rows[second] == (date(2026, 11, 2), second_version)
+    assert logs == 1
+
+    single = client.post('/api/update_workorder_date', json={
+        'workorder_id': second, 'new_date': '2026-11-06', 'version': second_version - 1})
+    assert single.status_code == 409
+    assert single.get_json()['version'] == second_version
+
+
+def test_atomic_batch_rolls_back_every_move(app, client):
+    with app.app_context():
+        claim_id, ((first, first_version), (second, second_version)) = add_workorders(2)
+        before = state(claim_id, [first, second])
+        generation = warranty.claims_generation()
+    response = client.post('/api/workorders/reschedule', json={'atomic': True, 'moves': [
+        {'workorder_id': first, 'new_date': '2026-11-05', 'version': first_version},
+        {'workorder_id': second, 'new_date': '2026-11-06', 'version': second_version + 7},
+    ]})
+    body = response.get_json()
+    assert body['applied'] == 0
+    assert [result['status'] for result in body['results']] == ['not_applied', 'conflict']
+
+    with app.app_context():
+        assert state(claim_id, [first, second]) == before
+        assert warranty.claims_generation() == generation
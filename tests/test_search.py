@@ -0,0 +1,55 @@
+import app as warranty
+
+
+def found(text):
+    return [result['id'] for result in warranty.search_claims(text)]
+
+
+def test_index_follows_claim_and_log_changes(app, user):
+    with app.app_context():
+        session = warranty.db.session
+        claim = warranty.Claim(address='1 Zephyrquartz Lane', issue_description='Door sticks')
+        session.add(claim)
+        session.commit()
+        assert found('zephyrquartz') == [claim.id]
+
+        claim.address = '1 Marblewren Lane'
+        session.commit()
+        assert found('zephyrquartz') == []
+        assert found('marblewren') == [claim.id]
+
+        entry = warranty.ClaimLog(claim_id=claim.id, user_id=user, action='Replaced the quillhinge')
+        session.add(entry)
+        session.commit()
+        assert found('quillhinge') == [claim.id]
+
+        session.delete(entry)
+        session.commit()
+        assert found('quillhinge') == []
+
+        session.delete(claim)
+        session.commit()
+        assert found('marblewren') == []
+
+
+def test_results_are_ranked_by_weighted_bm25_over_every_match(app):
+    with app.app_context():
+        session = warranty.db.session
+        in_address = warranty.Claim(address='2 Tindervale Court', issue_description='Leak')
+        session.add(in_address)
+        session.flush()
+        # Newer claims that only mention the term in lower-weighted columns.
+        in_issue = [warranty.Claim(address=f'{i} Other Street', issue_description='Tindervale drain slow')
+                    for i in range(3, 6)]
+        session.add_all(in_issue)
+        session.commit()
+
+        ids = found('tindervale')
+        assert ids[0] == in_address.id
+        assert sorted(ids[1:]) == sorted(claim.id for claim in in_issue)
+        scores = [result['score'] for result in warranty.search_claims('tindervale')]
+        assert scores == sorted(scores)
+
+        pages = [result['id'] for offset in range(4) for result in
+                 warranty.search_claims('tindervale', limit=1, offset=offset)]
+        assert pages == ids
@@ -0,0 +1,88 @@
+import base64
+import hashlib
+import os
+
+import app as warranty
+
+
+def add_claim(app, address):
+    with app.app_context():
+        claim = warranty.Claim(address=address)
+        warranty.db.session.add(claim)
+        warranty.db.session.commit()
+        return claim.id
+
+
+def start_upload(client, data, **fields):
+    response = client.post('/api/uploads', json={'filename': 'photo.jpg', 'size': len(data), **fields})
+    assert response.status_code == 201
+    return response.headers['Location']
+
+
+def send(client, url, chunk, offset, checksum=None):
+    headers = {'Upload-Offset': str(offset), 'Content-Type': 'application/offset+octet-stream'}
+    if checksum is not None:
+        headers['Upload-Checksum'] = 'sha256 ' + base64.b64encode(checksum).decode()
+    return client.patch(url, data=chunk, headers=headers)
+
+
+def test_wrong_offset_is_a_conflict(client):
+    data = os.urandom(1000)
+    url = start_upload(client, data)
+    assert send(client, url, data[:400], 0).status_code == 200
+    response = send(client, url, data[400:], 100)
+    assert response.status_code == 409
+    assert response.headers['Upload-Offset'] == '400'
+
+
+def test_chunk_with_bad_checksum_is_dropped(client):
+    data = os.urandom(1000)
+    url = start_upload(client, data)
+    response = send(client, url, data[:500], 0, checksum=hashlib.sha256(b'something else').digest())
+    assert response.status_code == 460
+    assert response.headers['Upload-Offset'] == '0'
+    assert send(client, url, data[:500], 0, checksum=hashlib.sha256(data[:500]).digest()).status_code == 200
+    assert client.head(url).headers['Upload-Offset'] == '500'
+
+
+def test_file_with_wrong_sha256_is_rejected(client):
+    data = os.urandom(1000)
+    url = start_upload(client, data, sha256=hashlib.sha256(b'another file').hexdigest())
+    response = send(client, url, data, 0)
+    assert response.status_code == 460
+    assert client.head(url).status_code == 404
+
+
+def test_upload_resumes_and_attaches_to_its_claim(app, client):
+    claim_id = add_claim(app, '50 Upload Avenue')
+    data = os.urandom(3000)
+    url = start_upload(client, data, claim_id=claim_id)
+    assert send(client, url, data[:1200], 0).get_json()['complete'] is False
+
+    # After a dropped connection the client asks where to carry on from.
+    offset = int(client.head(url).headers['Upload-Offset'])
+    assert offset == 1200
+    response = send(client, url, data[offset:], offset)
+    assert response.status_code == 200
+    assert response.get_json()['complete'] is True
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    with app.app_context():
+        blob = warranty.db.session.get(warranty.PhotoBlob, sha256)
+        assert blob.ref_count == 1
+        photo, = warranty.ClaimPhoto.query.filter_by(claim_id=claim_id).all()
+        assert photo.content_hash == sha256
+        with open(os.path.join(app.config['UPLOAD_FOLDER'], blob.filename), 'rb') as f:
+            assert f.read() == data
+
+    # The same photo on a second claim shares the stored file.
+    other_claim = add_claim(app, '52 Upload Avenue')
+    url = start_upload(client, data)
+    assert send(client, url, data, 0).get_json()['complete'] is True
+    response = client.post(url + '/attach', json={'claim_id': other_claim})
+    assert response.get_json() == {'success': True, 'id': url.rsplit('/', 1)[1], 'claim_id': other_claim,
+                                   'complete': True}
+    with app.app_context():
+        assert warranty.db.session.get(warranty.PhotoBlob, sha256).ref_count == 2
+        assert warranty.ClaimPhoto.query.filter_by(claim_id=other_claim, content_hash=sha256).count() == 1
+        assert warranty.PhotoUpload.query.filter_by(content_hash=sha256).count() == 0